@@ -0,0 +1,53 @@
+# backend/bench/bench_asr_pool.py
+# 测量识别工作池在并发场景下的吞吐随线程数的变化
+#
+# 用法（在 backend 目录下，需要完整的 vosk-model）：
+#   python -m bench.bench_asr_pool sample.wav -c 16 -w 1 2 4 8
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from speech.audio_decode import decode_to_pcm  # noqa: E402
+from speech.asr_pool import RecognizerPool  # noqa: E402
+
+
+async def run_once(pcm: bytes, workers: int, concurrency: int) -> float:
+    pool = RecognizerPool(workers=workers, max_queue=concurrency, queue_timeout=600)
+    pool.warm_up()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(pool.transcribe(pcm) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+
+    pool.shutdown()
+    return elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("wav")
+    ap.add_argument("-c", "--concurrency", type=int, default=8)
+    ap.add_argument("-w", "--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = ap.parse_args()
+
+    with open(args.wav, "rb") as f:
+        pcm = decode_to_pcm(f.read())
+    audio_seconds = len(pcm) / 2 / 16000
+
+    print(f"{'workers':>8}{'elapsed s':>12}{'utt/s':>10}{'x realtime':>12}")
+    for w in args.workers:
+        elapsed = asyncio.run(run_once(pcm, w, args.concurrency))
+        print(
+            f"{w:>8}{elapsed:>12.2f}{args.concurrency / elapsed:>10.2f}"
+            f"{audio_seconds * args.concurrency / elapsed:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# backend/bench/bench_decode.py
+# 对比单次请求的音频预处理耗时：
+#   旧路径：NamedTemporaryFile → ffmpeg 子进程 → asr_temp.wav → wave 读回
+#   新路径：decode_to_pcm（WAV 进程内转换 / 其它格式走提前拉起的 ffmpeg 备用进程，仍是每个请求一个进程）
+#
+# 用法（在 backend 目录下）：
+#   python -m bench.bench_decode                  # 自动生成 3 秒测试音频
+#   python -m bench.bench_decode a.webm b.wav -n 50
+
+import argparse
+import math
+import os
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from speech.audio_decode import decode_to_pcm, ffmpeg_worker  # noqa: E402
+
+FIXTURE_DIR = os.path.join(BACKEND_DIR, "tmp", "bench")
+
+
+def make_fixtures():
+    """生成 3 秒 44.1kHz 双声道测试音，外加 ffmpeg 转出的 webm/ogg/mp3 版本"""
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    wav_path = os.path.join(FIXTURE_DIR, "tone_44k_stereo.wav")
+
+    rate, seconds = 44100, 3
+    frames = bytearray()
+    for i in range(rate * seconds):
+        v = int(8000 * math.sin(2 * math.pi * 440 * i / rate))
+        frames += struct.pack("<hh", v, v)
+    with wave.open(wav_path, "wb") as wf:
+        wf.setnchannels(2)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(bytes(frames))
+
+    paths = [wav_path]
+    for ext, codec in [("webm", "libopus"), ("ogg", "libvorbis"), ("mp3", "libmp3lame")]:
+        out = os.path.join(FIXTURE_DIR, f"tone.{ext}")
+        r = subprocess.run(
+            ["ffmpeg", "-y", "-loglevel", "error", "-i", wav_path, "-c:a", codec, out]
+        )
+        if r.returncode == 0:
+            paths.append(out)
+    return paths
+
+
+def legacy_path(data: bytes) -> bytes:
+    """复刻旧版 handle_speech 的处理：两次落盘 + 每次请求启动 ffmpeg"""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".webm") as f:
+        f.write(data)
+        temp_input_path = f.name
+
+    wav_path = os.path.join(FIXTURE_DIR, "asr_temp.wav")
+    subprocess.run(
+        ["ffmpeg", "-y", "-loglevel", "quiet", "-i", temp_input_path,
+         "-ac", "1", "-ar", "16000", "-f", "wav", wav_path],
+        check=True,
+    )
+    os.remove(temp_input_path)
+
+    with wave.open(wav_path, "rb") as wf:
+        return wf.readframes(wf.getnframes())
+
+
+def timed(fn, data, n):
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn(data)
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return {
+        "mean": statistics.mean(samples),
+        "p50": samples[len(samples) // 2],
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("files", nargs="*")
+    ap.add_argument("-n", type=int, default=20)
+    args = ap.parse_args()
+
+    files = args.files or make_fixtures()
+    ffmpeg_worker.warm_up()
+
+    print(f"{'file':<28}{'path':<10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for path in files:
+        with open(path, "rb") as f:
+            data = f.read()
+        name = os.path.basename(path)
+
+        for label, fn in [("legacy", legacy_path), ("memory", decode_to_pcm)]:
+            fn(data)  # 预热
+            r = timed(fn, data, args.n)
+            print(f"{name:<28}{label:<10}{r['mean']:>10.1f}{r['p50']:>10.1f}{r['p95']:>10.1f}")
+
+    ffmpeg_worker.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+# backend/bench/bench_e2e.py
+# 端到端基准：本地仿真日历（bench/fake_calendar.py）+ 无头 Chromium，不需要 Google 登录
+#
+# 场景：
+#   calendar  解析 → check_conflict → create_event，给出吞吐与每步耗时（StepTrace 汇总）
+#   scan      清空索引后：逐天抓取 vs 周视图范围抓取，覆盖同样的天数
+#   speech    完整的 /api/speech 流程（上传 → 解码 → 识别 → 解析 → 冲突 → 创建），
+#             使用 bench/fixtures 下的 WAV（先运行 python -m bench.make_fixtures；需要完整的 vosk-model）
+# 结果写入 bench/results/e2e-<时间>.json，--baseline 可与之前的结果对比。
+# --lean 以精简页面模式运行（gcal/lean.py），结果里的 browser_network 给出每次操作的请求数 / 字节。
+#
+# 用法（在 backend 目录下，需要 playwright install chromium）：
+#   python -m bench.bench_e2e
+#   python -m bench.bench_e2e -n 40 -c 2 --pool 2 --scenarios calendar scan
+#   python -m bench.bench_e2e --baseline bench/results/e2e-20251120-101500.json
+#   python -m bench.bench_e2e --lean --baseline bench/results/<不带 --lean 的结果>.json
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from bench.fake_calendar import FakeCalendar  # noqa: E402
+from bench.parser_corpus import UTTERANCES  # noqa: E402
+
+BENCH_DIR = os.path.join(BACKEND_DIR, "bench")
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+
+def percentiles(samples) -> dict:
+    data = sorted(samples)
+    if not data:
+        return {}
+
+    def pick(q):
+        return round(data[min(len(data) - 1, int(q * len(data)))] * 1000, 1)
+
+    return {
+        "count": len(data),
+        "mean_ms": round(sum(data) / len(data) * 1000, 1),
+        "p50_ms": pick(0.5),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": round(data[-1] * 1000, 1),
+    }
+
+
+def git_rev() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+# -------------------------
+# 场景：日历操作
+# -------------------------
+async def bench_calendar(op, n: int, concurrency: int, spread_days: int, rng: random.Random) -> dict:
+    from nlp.parser_v2 import parse_schedule_from_text_v2
+
+    jobs = []
+    for text in (UTTERANCES * (n // len(UTTERANCES) + 1))[:n]:
+        parsed = parse_schedule_from_text_v2(text)
+        if parsed.get("missing_fields"):
+            continue
+        # 打散到多天，避免同一句反复撞上自己刚创建的事件
+        shift = timedelta(days=rng.randrange(spread_days))
+        jobs.append((parsed["title"], parsed["start"] + shift, parsed["end"] + shift))
+
+    sem = asyncio.Semaphore(concurrency)
+    conflict_lat, create_lat, total_lat = [], [], []
+    status = {}
+
+    async def one(title, start_dt, end_dt):
+        async with sem:
+            t0 = time.perf_counter()
+            conflict = await op.check_conflict(start_dt.date(), start_dt, end_dt)
+            t1 = time.perf_counter()
+            conflict_lat.append(t1 - t0)
+            if conflict:
+                result = "conflict"
+            else:
+                ok = await op.create_event(title, start_dt, end_dt)
+                create_lat.append(time.perf_counter() - t1)
+                result = "ok" if ok else "error"
+            total_lat.append(time.perf_counter() - t0)
+            status[result] = status.get(result, 0) + 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(*j) for j in jobs))
+    elapsed = time.perf_counter() - t0
+
+    return {
+        "operations": len(jobs),
+        "elapsed_s": round(elapsed, 2),
+        "ops_per_s": round(len(jobs) / elapsed, 2),
+        "status": status,
+        "latency": {
+            "total": percentiles(total_lat),
+            "check_conflict": percentiles(conflict_lat),
+            "create_event": percentiles(create_lat),
+        },
+    }
+
+
+# -------------------------
+# 场景：逐天抓取 vs 范围抓取
+# -------------------------
+async def bench_scan(op, days: int) -> dict:
+    start = date.today()
+    end = start + timedelta(days=days - 1)
+
+    t0 = time.perf_counter()
+    for i in range(days):
+        await op.scrape_day_events(start + timedelta(days=i))
+    per_day = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    found = await op.scrape_range_events(start, end)
+    ranged = time.perf_counter() - t0
+
+    return {
+        "days": days,
+        "per_day_s": round(per_day, 2),
+        "range_s": round(ranged, 2),
+        "speedup": round(per_day / ranged, 2) if ranged else None,
+        "events_found": sum(len(v) for v in found.values()),
+    }
+
+
+# -------------------------
+# 场景：完整语音流程
+# -------------------------
+async def bench_speech(op, rounds: int) -> dict:
+    manifest_path = os.path.join(FIXTURE_DIR, "manifest.json")
+    if not os.path.exists(manifest_path):
+        return {"skipped": "没有语音样本，先运行 python -m bench.make_fixtures"}
+
+    import httpx
+    import main as app_main
+    from speech import asr_vosk
+    from speech.asr_pool import asr_pool
+
+    try:
+        asr_vosk.load_model()
+        asr_pool.warm_up()
+    except Exception as e:
+        return {"skipped": f"识别模型不可用：{e!r}"}
+
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    samples = []
+    for item in manifest:
+        with open(os.path.join(FIXTURE_DIR, item["file"]), "rb") as f:
+            samples.append((item, f.read()))
+
+    # 跳过浏览器登录流程，直接使用指向仿真日历的操作器
+    app_main.calendar_operator = op
+
+    latencies, status, exact = [], {}, 0
+    transport = httpx.ASGITransport(app=app_main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        t0 = time.perf_counter()
+        for r in range(rounds):
+            for i, (item, data) in enumerate(samples):
+                t1 = time.perf_counter()
+                res = await client.post(
+                    "/api/speech",
+                    files={"file": (item["file"], data, "audio/wav")},
+                    # 每次请求用不同的会话，避免冲突候选被下一句当成确认回复
+                    headers={"X-Client-Id": f"bench-{r}-{i}"},
+                )
+                latencies.append(time.perf_counter() - t1)
+                body = res.json()
+                status[body.get("status", res.status_code)] = status.get(body.get("status", res.status_code), 0) + 1
+                recognized = (body.get("user_text") or "").replace(" ", "")
+                exact += recognized == item["text"].replace(" ", "")
+        elapsed = time.perf_counter() - t0
+
+    total = rounds * len(samples)
+    audio_s = rounds * sum(item.get("seconds", 0) for item, _ in samples)
+    return {
+        "requests": total,
+        "elapsed_s": round(elapsed, 2),
+        "requests_per_s": round(total / elapsed, 2),
+        "audio_x_realtime": round(audio_s / elapsed, 2) if audio_s else None,
+        "status": status,
+        "exact_transcripts": exact,
+        "latency": percentiles(latencies),
+    }
+
+
+# -------------------------
+# 结果对比
+# -------------------------
+def compare(current: dict, baseline: dict):
+    print(f"\n与基线对比（{baseline['meta'].get('git')} → {current['meta'].get('git')}）：")
+
+    def walk(cur, base, path=""):
+        for k, v in cur.items():
+            b = base.get(k) if isinstance(base, dict) else None
+            p = f"{path}.{k}" if path else k
+            if isinstance(v, dict):
+                walk(v, b or {}, p)
+            elif isinstance(v, (int, float)) and isinstance(b, (int, float)) and b and (
+                k.endswith("_ms") or k.endswith("_s") or k.endswith("per_s") or k.endswith("bytes")
+            ):
+                print(f"  {p:<55}{b:>10}{v:>10}{(v - b) / b * 100:>+9.1f}%")
+
+    walk({k: v for k, v in current.items() if k != "meta"}, baseline)
+
+
+async def run(args) -> dict:
+    cal = FakeCalendar(
+        latency_ms=args.latency_ms, dialog_delay_ms=args.dialog_delay_ms, asset_kb=args.asset_kb
+    )
+    cal.seed(args.seed_per_day, max(args.spread_days, args.scan_days) + 10)
+    base_url = cal.start()
+
+    # 必须在导入 gcal 模块之前设置，页面池 / XHR 过滤都以它为准
+    os.environ["CALENDAR_BASE_URL"] = base_url
+
+    from playwright.async_api import async_playwright
+    from gcal.calendar_ops import CalendarOperator
+    from gcal.event_index import EventIndex
+    from gcal import lean
+    from gcal.page_pool import CalendarPagePool
+    from gcal import trace
+    from monitor.metrics import metrics
+
+    tmp = tempfile.mkdtemp(prefix="bench_e2e_")
+    results = {
+        "meta": {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "git": git_rev(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        }
+    }
+
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=True, args=lean.launch_args(args.lean))
+        context = await browser.new_context(locale="zh-CN")
+        await lean.prepare_context(context, args.lean)
+        pool = CalendarPagePool(context, size=args.pool, lean=args.lean)
+        await pool.warm_up()
+
+        def operator():
+            # 每个场景一个新索引，互不影响
+            index = EventIndex(path=os.path.join(tmp, f"index_{time.perf_counter_ns()}.json"))
+            return CalendarOperator(context, pool=pool, index=index)
+
+        rng = random.Random(args.rng_seed)
+        if "calendar" in args.scenarios:
+            print(">>> 场景 calendar ...")
+            results["calendar"] = await bench_calendar(operator(), args.n, args.concurrency, args.spread_days, rng)
+        if "scan" in args.scenarios:
+            print(">>> 场景 scan ...")
+            results["scan"] = await bench_scan(operator(), args.scan_days)
+        if "speech" in args.scenarios:
+            print(">>> 场景 speech ...")
+            results["speech"] = await bench_speech(operator(), args.rounds)
+
+        results["browser_steps"] = trace.breakdown()
+        results["browser_network"] = {
+            "totals": lean.totals.to_dict(),
+            "per_operation": trace.network_breakdown(),
+        }
+        results["pipeline"] = metrics.snapshot()
+        results["fake_calendar"] = {"events": cal.count()}
+
+        await pool.close()
+        await browser.close()
+
+    cal.stop()
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scenarios", nargs="+", default=["calendar", "scan", "speech"],
+                    choices=["calendar", "scan", "speech"])
+    ap.add_argument("-n", type=int, default=30, help="calendar 场景的操作数")
+    ap.add_argument("-c", "--concurrency", type=int, default=1)
+    ap.add_argument("--pool", type=int, default=2, help="页面池大小")
+    ap.add_argument("--rounds", type=int, default=2, help="speech 场景把样本跑几轮")
+    ap.add_argument("--spread-days", type=int, default=14)
+    ap.add_argument("--scan-days", type=int, default=14)
+    ap.add_argument("--seed-per-day", type=int, default=2, help="仿真日历每天预置的事件数")
+    ap.add_argument("--latency-ms", type=float, default=50, help="仿真日历的数据请求延迟")
+    ap.add_argument("--dialog-delay-ms", type=float, default=150, help="仿真弹窗动画时间")
+    ap.add_argument("--asset-kb", type=int, default=200, help="仿真日历页面的图片 / 字体资源大小（KB）")
+    ap.add_argument("--lean", action="store_true", help="精简页面模式：不加载图片 / 字体，关闭动画")
+    ap.add_argument("--rng-seed", type=int, default=0)
+    ap.add_argument("--out", help="结果文件，默认 bench/results/e2e-<时间>.json")
+    ap.add_argument("--baseline", help="与之前的结果文件对比")
+    args = ap.parse_args()
+
+    results = asyncio.run(run(args))
+
+    out = args.out or os.path.join(RESULTS_DIR, f"e2e-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    print(json.dumps({k: v for k, v in results.items() if k != "meta"}, ensure_ascii=False, indent=2))
+    print(f"\n结果已保存：{out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
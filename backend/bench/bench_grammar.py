@@ -0,0 +1,114 @@
+# backend/bench/bench_grammar.py
+# 对比开放词表识别与语法约束识别（speech/grammar.py）的速度和准确率
+#
+# 样本来自 bench/fixtures（python -m bench.make_fixtures）。每个样本分别用
+#   open     开放词表识别器
+#   grammar  语法约束识别器，置信度不足时回退到开放词表（与 ASR_GRAMMAR=1 时的线上行为一致）
+# 解码，给出耗时、字错误率（CER）以及解析结果（标题 / 开始 / 结束）与原文解析结果一致的比例。
+#
+# 用法（在 backend 目录下，需要完整的 vosk-model；模型需支持运行时语法，如 vosk-model-small-cn）：
+#   python -m bench.bench_grammar
+#   python -m bench.bench_grammar -n 5 --min-conf 0.5
+
+import argparse
+import json
+import os
+import sys
+import time
+import wave
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from nlp.parser_v2 import parse_schedule_from_text_v2  # noqa: E402
+from speech import grammar  # noqa: E402
+
+FIXTURE_DIR = os.path.join(BACKEND_DIR, "bench", "fixtures")
+
+
+def edit_distance(a: str, b: str) -> int:
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+def parsed_key(text: str):
+    r = parse_schedule_from_text_v2(text)
+    return r.get("title"), r.get("start"), r.get("end")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", "--repeat", type=int, default=3, help="每个样本解码几次取最小值")
+    ap.add_argument("--min-conf", type=float, default=grammar.MIN_CONFIDENCE, help="回退阈值")
+    args = ap.parse_args()
+
+    manifest_path = os.path.join(FIXTURE_DIR, "manifest.json")
+    if not os.path.exists(manifest_path):
+        print("没有语音样本，先运行 python -m bench.make_fixtures")
+        return
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    grammar.MIN_CONFIDENCE = args.min_conf
+    phrases = json.loads(grammar.grammar_json())
+    print(f"短语列表：{len(phrases)} 条（模型词表过滤：{'是' if grammar.model_vocabulary() else '否'}）")
+
+    try:
+        from speech import asr_vosk
+
+        open_rec = asr_vosk.new_recognizer(16000)
+        grammar_rec = asr_vosk.new_recognizer(16000, grammar=True)
+    except Exception as e:
+        print(f"识别模型不可用：{e!r}")
+        return
+
+    def timed(fn):
+        best, out = None, None
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            out = fn()
+            open_rec.Reset()
+            grammar_rec.Reset()
+            elapsed = time.perf_counter() - t0
+            best = elapsed if best is None else min(best, elapsed)
+        return best, out.replace(" ", "")
+
+    modes = {
+        "open": lambda pcm: asr_vosk.transcribe_pcm(pcm, rec=open_rec),
+        "grammar": lambda pcm: asr_vosk.transcribe_pcm(pcm, rec=grammar_rec, fallback_rec=open_rec),
+    }
+    totals = {m: {"s": 0.0, "errors": 0, "parsed": 0} for m in modes}
+    chars = 0
+
+    print(f"{'#':>3}{'open ms':>9}{'gram ms':>9}  open / grammar")
+    for i, item in enumerate(manifest):
+        with wave.open(os.path.join(FIXTURE_DIR, item["file"]), "rb") as w:
+            pcm = w.readframes(w.getnframes())
+        ref = item["text"].replace(" ", "")
+        chars += len(ref)
+        expected = parsed_key(item["text"])
+
+        row, texts = f"{i:>3}", []
+        for m, fn in modes.items():
+            elapsed, text = timed(lambda: fn(pcm))
+            totals[m]["s"] += elapsed
+            totals[m]["errors"] += edit_distance(ref, text)
+            totals[m]["parsed"] += parsed_key(text) == expected
+            row += f"{elapsed * 1000:>9.0f}"
+            texts.append(text)
+        print(row + "  " + " / ".join(texts))
+
+    n = len(manifest)
+    print()
+    for m, t in totals.items():
+        print(f"{m:<8} 解码 {t['s']:6.2f}s  CER {t['errors'] / chars * 100:5.1f}%  解析一致 {t['parsed']}/{n}")
+    print(f"语法约束识别耗时为开放词表的 {totals['grammar']['s'] / totals['open']['s'] * 100:.0f}%（含回退）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# backend/bench/bench_parser.py
+# 解析器微基准：单遍 token 解析（parser_v2）vs 原多遍正则实现（parser_v2_regex）
+# token 解析分别给出缓存未命中（miss）与命中（hit）两种情况。
+# 两种实现交替计时，报告加速比的中位数和范围；范围跨过 1.0 时结论为“持平”，不算更快
+#
+# 用法（在 backend 目录下）：
+#   python -m bench.bench_parser            # 默认交替 15 组，每组 200 轮语料
+#   python -m bench.bench_parser -n 500 -r 30
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from nlp import parser_v2, parser_v2_regex  # noqa: E402
+from bench.parser_corpus import UTTERANCES, EVENT_LABELS  # noqa: E402
+
+
+def safe(fn):
+    # 旧实现对部分输入会抛异常（如把“2025年”当成小时），计时时一并计入
+    def wrapper(text):
+        try:
+            return fn(text)
+        except ValueError:
+            return None
+    return wrapper
+
+
+def elapsed(fn, corpus, rounds: int) -> float:
+    """fn 把语料跑 rounds 轮的耗时（秒）"""
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for text in corpus:
+            fn(text)
+    return time.perf_counter() - t0
+
+
+def compare(old, new, corpus, rounds: int, repeat: int) -> list:
+    """
+    old / new 交替各跑一组，返回每组的加速比（old 耗时 / new 耗时）。
+    两者分开各跑几遍再比，机器负载的起伏会整个算到其中一方头上；交替跑时两边受到的影响相同
+    """
+    ratios = []
+    for _ in range(repeat):
+        a = elapsed(old, corpus, rounds)
+        b = elapsed(new, corpus, rounds)
+        ratios.append(a / b)
+    return ratios
+
+
+def verdict(ratios) -> str:
+    lo, hi = min(ratios), max(ratios)
+    if lo > 1.0:
+        return "更快"
+    if hi < 1.0:
+        return "更慢"
+    return "持平（差异在抖动范围内）"
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", "--rounds", type=int, default=200, help="每组跑几轮语料")
+    ap.add_argument("-r", "--repeat", type=int, default=15, help="交替跑几组")
+    args = ap.parse_args()
+
+    cases = [
+        ("utterance", UTTERANCES, "parse_schedule_from_text_v2"),
+        ("event label", EVENT_LABELS, "parse_time"),
+    ]
+
+    cache = parser_v2.parse_cache
+    maxsize = cache.maxsize
+
+    # 加速比 = regex 耗时 / token 解析耗时，给出中位数和最小 ~ 最大
+    print(
+        f"{'corpus':<14}{'function':<30}{'regex /s':>12}"
+        f"{'miss /s':>12}{'speedup':>10}{'range':>14}{'hit speedup':>13}"
+    )
+    summary = []
+    for name, corpus, func in cases:
+        old = safe(getattr(parser_v2_regex, func))
+        new = getattr(parser_v2, func)
+        n = args.rounds * len(corpus)
+
+        cache.clear()
+        cache.maxsize = 0
+        miss = compare(old, new, corpus, args.rounds, args.repeat)
+        old_rate = n / elapsed(old, corpus, args.rounds)
+        cache.maxsize = maxsize
+        hit = compare(old, new, corpus, args.rounds, args.repeat)
+
+        m = statistics.median(miss)
+        print(
+            f"{name:<14}{func:<30}{old_rate:>12.0f}{old_rate * m:>12.0f}{m:>9.2f}x"
+            f"{f'{min(miss):.2f}~{max(miss):.2f}':>14}{statistics.median(hit):>12.2f}x"
+        )
+        summary.append(f"{name} 缓存未命中时{verdict(miss)}")
+
+    print("cache:", cache.stats())
+    print("结论（与 parser_v2_regex 相比）：" + "；".join(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# backend/bench/bench_vad.py
+# 测量 VAD（speech/vad.py）对识别耗时的影响
+#
+# 样本来自 bench/fixtures（python -m bench.make_fixtures）。TTS 样本几乎没有静音，
+# 这里按真实录音的样子在首尾补上静音 + 底噪，--join 再把相邻两句拼成一段长录音，然后对比：
+#   整段：不做 VAD 直接识别 vs 与 asr_pool.recognize 一样切掉首尾静音后识别（解码耗时、送进识别器的音频秒数、转写是否一致）
+#   流式：按 250ms 分片喂入，StreamingVAD 判定说完的时刻 vs 录音结束的时刻
+#
+# 用法（在 backend 目录下，需要完整的 vosk-model；没有模型时只输出 VAD 切分统计）：
+#   python -m bench.bench_vad
+#   python -m bench.bench_vad --lead-ms 1000 --tail-ms 2000 --noise-rms 80 --join
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import wave
+from array import array
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from speech.vad import StreamingVAD, speech_regions  # noqa: E402
+
+FIXTURE_DIR = os.path.join(BACKEND_DIR, "bench", "fixtures")
+BYTES_PER_S = 32000
+STREAM_CHUNK = 8000  # 250ms，与前端 MediaRecorder 分片间隔一致
+
+
+def noise(ms: int, rms: int, rng: random.Random) -> bytes:
+    n = 16 * ms
+    return array("h", (int(rng.gauss(0, rms)) for _ in range(n))).tobytes()
+
+
+def load_samples(args) -> list:
+    with open(os.path.join(FIXTURE_DIR, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    rng = random.Random(0)
+    clips = []
+    for item in manifest:
+        with wave.open(os.path.join(FIXTURE_DIR, item["file"]), "rb") as w:
+            clips.append((item["text"], w.readframes(w.getnframes())))
+
+    if args.join:
+        # 两句之间停顿 1 秒，模拟一次说了两件事的长录音
+        clips = [
+            (a[0] + " " + b[0], a[1] + noise(1000, args.noise_rms, rng) + b[1])
+            for a, b in zip(clips[::2], clips[1::2])
+        ]
+    return [
+        (text, noise(args.lead_ms, args.noise_rms, rng) + pcm + noise(args.tail_ms, args.noise_rms, rng))
+        for text, pcm in clips
+    ]
+
+
+def stream_endpoint(pcm: bytes):
+    """按分片喂入，返回 (判定说完时已收到的音频秒数, 实际送进识别器的秒数)"""
+    vad = StreamingVAD()
+    received = fed = 0
+    for i in range(0, len(pcm), STREAM_CHUNK):
+        chunk = pcm[i:i + STREAM_CHUNK]
+        received += len(chunk)
+        out, ended = vad.process(chunk)
+        fed += len(out)
+        if ended:
+            break
+    return received / BYTES_PER_S, fed / BYTES_PER_S
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--lead-ms", type=int, default=800, help="句首补的静音")
+    ap.add_argument("--tail-ms", type=int, default=1500, help="句尾补的静音（用户说完到点停止的时间）")
+    ap.add_argument("--noise-rms", type=int, default=60, help="静音部分的底噪强度")
+    ap.add_argument("--join", action="store_true", help="两句拼成一段长录音，测切句")
+    ap.add_argument("-n", "--repeat", type=int, default=3, help="每个样本解码几次取最小值")
+    args = ap.parse_args()
+
+    if not os.path.exists(os.path.join(FIXTURE_DIR, "manifest.json")):
+        print("没有语音样本，先运行 python -m bench.make_fixtures")
+        return
+    samples = load_samples(args)
+
+    try:
+        from speech.asr_vosk import new_recognizer, transcribe_pcm
+
+        rec = new_recognizer(16000)
+    except Exception as e:
+        print(f"识别模型不可用（{e!r}），只输出 VAD 切分统计\n")
+        rec = None
+
+    def decode(pcm_list):
+        best, text = None, ""
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            parts = []
+            for pcm in pcm_list:
+                parts.append(transcribe_pcm(pcm, rec=rec))
+                rec.Reset()
+            elapsed = time.perf_counter() - t0
+            best = elapsed if best is None else min(best, elapsed)
+            text = " ".join(parts)
+        return best, text.replace(" ", "")
+
+    totals = {"audio": 0.0, "kept": 0.0, "full": 0.0, "vad": 0.0, "vad_split": 0.0, "same": 0, "early": 0.0}
+    print(f"{'#':>3}{'audio s':>9}{'kept s':>8}{'regions':>9}{'stream end s':>14}{'full ms':>9}{'vad ms':>8}  same")
+    for i, (text, pcm) in enumerate(samples):
+        t0 = time.perf_counter()
+        regions = speech_regions(pcm)
+        # 与 RecognizerPool.recognize 一致：第一次开口到最后一次停声作为一段，没找到语音时整段识别
+        segments = [pcm[regions[0][0]:regions[-1][1]]] if regions else [pcm]
+        vad_cost = time.perf_counter() - t0
+        audio_s = len(pcm) / BYTES_PER_S
+        kept_s = sum(len(s) for s in segments) / BYTES_PER_S
+        end_s, _ = stream_endpoint(pcm)
+        totals["audio"] += audio_s
+        totals["kept"] += kept_s
+        totals["vad_split"] += vad_cost
+        totals["early"] += audio_s - end_s
+
+        row = f"{i:>3}{audio_s:>9.2f}{kept_s:>8.2f}{len(regions):>9}{end_s:>14.2f}"
+        if rec is not None:
+            full_s, full_text = decode([pcm])
+            vad_s, vad_text = decode(segments)
+            vad_s += vad_cost
+            same = full_text == vad_text
+            totals["full"] += full_s
+            totals["vad"] += vad_s
+            totals["same"] += same
+            row += f"{full_s * 1000:>9.0f}{vad_s * 1000:>8.0f}  {'yes' if same else vad_text}"
+        print(row)
+
+    n = len(samples)
+    print(f"\n样本 {n} 段，共 {totals['audio']:.1f}s 音频，VAD 保留 {totals['kept']:.1f}s"
+          f"（{totals['kept'] / totals['audio'] * 100:.0f}%），切分本身 {totals['vad_split'] * 1000:.1f}ms")
+    print(f"流式：平均比录音结束提前 {totals['early'] / n:.2f}s 判定说完")
+    if rec is not None:
+        print(f"解码：不做 VAD {totals['full']:.2f}s → VAD {totals['vad']:.2f}s"
+              f"（{(1 - totals['vad'] / totals['full']) * 100:.0f}% 减少），转写一致 {totals['same']}/{n}")
+
+
+if __name__ == "__main__":
+    main()
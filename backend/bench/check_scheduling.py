@@ -0,0 +1,258 @@
+# backend/bench/check_scheduling.py
+# 排期逻辑的脚本级检查：解析结果能否创建（valid_span）、索引的跨零点区间、空闲时段推荐、候选回复、
+# 重复日程展开、写入队列串行化、索引与后台刷新的交错等不经过浏览器的部分。
+# 任何一条不通过时退出码为 1，可以和 diff_parser 一起放进 CI。
+#
+# 用法（在 backend 目录下）：
+#   python -m bench.check_scheduling
+
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from gcal.calendar_ops import CalendarOperator  # noqa: E402
+from gcal.event_index import DayIndex, EventIndex, FRESH  # noqa: E402
+from gcal.slots import find_free_slots, suggest_slots  # noqa: E402
+from gcal.write_queue import CONFLICT, CREATED, WriteQueue  # noqa: E402
+from main import valid_span  # noqa: E402
+from nlp import parser_v2  # noqa: E402
+from nlp.confirm import REJECT, parse_reply  # noqa: E402
+from nlp.recurrence import DAILY, MONTHLY, WEEKLY, Recurrence, expand  # noqa: E402
+
+failures = []
+
+
+def check(name: str, ok: bool, detail=""):
+    print(f"{'ok ' if ok else '✗  '} {name}" + (f"  {detail}" if detail and not ok else ""))
+    if not ok:
+        failures.append(name)
+
+
+# -----------------------------
+# valid_span：同一天、结束晚于开始；结束于次日零点算当天结束
+# -----------------------------
+def check_valid_span():
+    for text, expected in [
+        ("明天晚上十一点提醒我关窗", True),
+        ("明天二十三点发版", True),
+        ("明天下午三点开会", True),
+        ("今天晚上十点到一点加班", False),
+        ("今天上午八点到八点开会", False),
+    ]:
+        r = parser_v2.parse_schedule_from_text_v2(text)
+        got = valid_span(r["start"], r["end"])
+        check(f"valid_span {text}", got == expected, f"{r['start']} ~ {r['end']} → {got}")
+
+
+# -----------------------------
+# 重复日程展开：时间窗内的次数、星期 / 几号、永远不命中的规则要能结束
+# -----------------------------
+def check_recurrence():
+    start = datetime(2026, 1, 1, 23, 0)  # 星期四
+    end = start + timedelta(hours=1)
+    window_end = start + timedelta(days=28)
+
+    def count(rule, **kw):
+        return len(list(expand(start, end, rule, **kw)))
+
+    check("每天 28 天窗口 → 28 次", count(Recurrence(DAILY), window_end=window_end) == 28)
+    check("每周一三五 28 天窗口 → 12 次", count(Recurrence(WEEKLY, (0, 2, 4)), window_end=window_end) == 12)
+    check("每月十五号 一年 → 12 次", count(Recurrence(MONTHLY, monthday=15)) == 12)
+    check("每月三十一号 一年 → 7 次（没有 31 号的月份跳过）", count(Recurrence(MONTHLY, monthday=31)) == 7)
+    check("空星期列表不会无限展开", count(Recurrence(WEEKLY, ())) == 0)
+    check("不存在的几号不会无限展开", count(Recurrence(MONTHLY, monthday=32)) == 0)
+    firsts = list(expand(start, end, Recurrence(DAILY), window_start=start + timedelta(hours=1), window_end=window_end))
+    check(
+        "window_start 之后才开始；23 点的一小时结束于次日零点且可创建",
+        firsts[0][0] == start + timedelta(days=1) and all(valid_span(s, e) for s, e in firsts),
+        firsts[:2],
+    )
+
+
+def temp_index() -> EventIndex:
+    return EventIndex(path=os.path.join(tempfile.mkdtemp(), "event_index.json"))
+
+
+# -----------------------------
+# 索引重叠判断：相接不算重叠；结束于次日零点占到当天结束；零时长不占时间
+# -----------------------------
+def check_overlaps():
+    d = DayIndex()
+    d.add(23 * 60, 0, "夜班")  # 23:00 → 次日 00:00
+    check("23:00~00:00 入索引后占到当天结束", d.events == [(1380, 1440, "夜班")], d.events)
+    check("23:30~00:00 与之重叠", d.overlaps(23 * 60 + 30, 0))
+    check("22:00~23:00 与之相接，不算重叠", not d.overlaps(22 * 60, 23 * 60))
+    d.add(0, 60, "凌晨")
+    check("00:00 开始的事件照常入索引", d.overlaps(30, 90))
+    check("01:00~02:00 与 00:00~01:00 相接，不算重叠", not d.overlaps(60, 120))
+    d.add(600, 600, "零时长")
+    check("零时长事件不入索引", len(d.events) == 2, d.events)
+    check("零时长查询不算重叠", not d.overlaps(23 * 60 + 30, 23 * 60 + 30))
+    check("结束早于开始按零时长处理，不占住当天余下时间", not d.overlaps(20 * 60, 19 * 60))
+
+    day = date.today() + timedelta(days=1)  # 已过去的日期在写文件时会被清掉
+    at = datetime.combine(day, datetime.min.time())
+    index = temp_index()
+    index.replace_day(day, [(at.replace(hour=23), at + timedelta(days=1), "夜班")])
+    check("EventIndex 23:00~次日零点", index.overlaps(day, at.replace(hour=23, minute=30), at + timedelta(days=1)))
+    got = index.overlaps_many([
+        (at.replace(hour=22), at.replace(hour=23)),
+        (at.replace(hour=23, minute=30), at + timedelta(days=1)),
+        (at + timedelta(days=1), at + timedelta(days=1, hours=1)),  # 次日没有索引
+    ])
+    check("overlaps_many 与输入同序", got == [False, True, False], got)
+
+
+# -----------------------------
+# 空闲时段：工作时间内、不早于 now、离原定时间最近
+# -----------------------------
+def check_slots():
+    day = date(2026, 3, 2)
+    at = datetime.combine(day, datetime.min.time())
+    hour = timedelta(hours=1)
+    busy = [(at.replace(hour=10), at.replace(hour=11)), (at.replace(hour=10, minute=30), at.replace(hour=12))]
+    before = at - timedelta(days=1)
+
+    got = suggest_slots(busy, at.replace(hour=10), hour, now=before)
+    check(
+        "10:00 被占 → 最近的 09:00 和 12:00",
+        got[:2] == [(at.replace(hour=9), at.replace(hour=10)), (at.replace(hour=12), at.replace(hour=13))],
+        got,
+    )
+    check("候选都不与忙碌区间重叠", all(not (s < be and e > bs) for s, e in got for bs, be in busy), got)
+    got = suggest_slots(busy, at.replace(hour=10), hour, now=at.replace(hour=9, minute=10))
+    check("早于 now 的开始时间不给", all(s >= at.replace(hour=9, minute=10) for s, _ in got), got)
+    check("时长不为正 → 没有候选", suggest_slots(busy, at.replace(hour=10), timedelta(0), now=before) == [])
+    got = suggest_slots([(at.replace(hour=9), at.replace(hour=18))], at.replace(hour=10), hour, now=before)
+    check("工作时间全被占 → 没有候选", got == [], got)
+    got = suggest_slots([], at.replace(hour=17, minute=30), hour, now=before)
+    check("不超出工作时间", got and all(e <= at.replace(hour=18) for _, e in got), got)
+
+    got = find_free_slots(busy + [(at + timedelta(days=1, hours=8), at + timedelta(days=1, hours=19))], day, day + timedelta(days=1), hour)
+    check(
+        "find_free_slots 跨两天：第二天整天被占",
+        got == [(at.replace(hour=9), at.replace(hour=10)), (at.replace(hour=12), at.replace(hour=18))],
+        got,
+    )
+
+
+# -----------------------------
+# 候选时段的简短回复
+# -----------------------------
+def check_replies():
+    for text, expected in [
+        ("好的", 0),
+        ("就这个吧", 0),
+        ("第二个", 1),
+        ("第3个", 2),
+        ("第四个", None),  # 只有三个候选
+        ("算了", REJECT),
+        ("好，三点吧", None),  # 重新给了时间
+        ("好的明天下午三点开会", None),
+        ("", None),
+    ]:
+        got = parse_reply(text, 3)
+        check(f"回复 {text!r} → {expected}", got == expected, got)
+
+
+# -----------------------------
+# 后台刷新与创建交错：刷新先开始、后结束，不能把刚创建的事件覆盖掉
+# -----------------------------
+def check_refresh_race():
+    async def run():
+        day = date.today() + timedelta(days=1)
+        at = datetime.combine(day, datetime.min.time())
+        index = temp_index()
+        index.replace_day(day, [])
+        op = CalendarOperator(None, pool=object(), index=index)
+
+        scraping, created = asyncio.Event(), asyncio.Event()
+
+        async def scrape_day_events(d):
+            # 模拟抓取：开始时页面上还没有新事件，等创建完成后才返回
+            scraping.set()
+            await created.wait()
+            return []
+
+        op.scrape_day_events = scrape_day_events
+        op._schedule_refresh(day)
+        refresh = op._refreshing[day.isoformat()]
+        await scraping.wait()
+        index.add_event(at.replace(hour=15), at.replace(hour=16), "开会")
+        created.set()
+        await refresh
+
+        check(
+            "刷新晚于创建结束：新事件仍在索引里",
+            index.overlaps(day, at.replace(hour=15, minute=30), at.replace(hour=16)),
+            index.events(day),
+        )
+
+        # 创建之后才开始的刷新照常写回
+        op.scrape_day_events = lambda d: asyncio.sleep(0, result=[(at.replace(hour=9), at.replace(hour=10), "晨会")])
+        op._schedule_refresh(day)
+        await op._refreshing[day.isoformat()]
+        check(
+            "创建之后开始的刷新照常覆盖",
+            index.events(day) == [(540, 600, "晨会")] and index.freshness(day) == FRESH,
+            index.events(day),
+        )
+
+    asyncio.run(run())
+
+
+# -----------------------------
+# 写入队列：同一时段的两个并发创建只有一个成功
+# -----------------------------
+def check_write_queue():
+    async def run():
+        day = date.today() + timedelta(days=1)
+        at = datetime.combine(day, datetime.min.time())
+        index = temp_index()
+        index.replace_day(day, [])
+        queue = WriteQueue(index=index)
+
+        class Op:
+            async def scrape_range_events(self, start, end):
+                return {}
+
+            async def check_conflict(self, d, start_dt, end_dt):
+                await asyncio.sleep(0)
+                return index.overlaps(d, start_dt, end_dt)
+
+            async def create_event(self, title, start_dt, end_dt):
+                await asyncio.sleep(0.01)  # 模拟保存耗时，让另一个请求有机会插进来
+                index.add_event(start_dt, end_dt, title)
+                return True
+
+        op = Op()
+        got = await asyncio.gather(
+            queue.check_and_create(op, "开会", at.replace(hour=15), at.replace(hour=16)),
+            queue.check_and_create(op, "面试", at.replace(hour=15, minute=30), at.replace(hour=16)),
+            queue.check_and_create(op, "晨会", (at + timedelta(days=1)).replace(hour=15), (at + timedelta(days=1)).replace(hour=16)),
+        )
+        check("同一时段并发创建：先到的创建，后到的冲突；别的日期不受影响", got == [CREATED, CONFLICT, CREATED], got)
+        check("分区锁用完即删", not queue._locks, queue._locks)
+
+    asyncio.run(run())
+
+
+def main():
+    check_valid_span()
+    check_overlaps()
+    check_slots()
+    check_replies()
+    check_recurrence()
+    check_write_queue()
+    check_refresh_race()
+    print(f"\n共 {len(failures)} 条不通过")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# backend/bench/diff_parser.py
+# 解析器差分对照 + 基准：同一份语料分别交给
+#   legacy   nlp/parser.py（最初版本）
+#   regex    nlp/parser_v2_regex.py（多遍正则）
+#   engine   nlp/parser_v2.py（规则表引擎 nlp/engine.py）
+# 逐条比较解析出的 开始 / 结束 时间，列出有分歧的句子；parser_corpus.EXPECTED 里有基准答案的，
+# 再检查引擎是否与之一致；EXPECTED_ITEMS 检查一句多件事 / 重复日程的拆分结果（只有引擎支持），
+# EXPECTED_TITLES 检查引擎提取的标题。
+# 任何一条不一致时退出码为 1，可以直接放进 CI。最后给出三者的吞吐量。
+#
+# 用法（在 backend 目录下）：
+#   python -m bench.diff_parser             # 差分 + 基准
+#   python -m bench.diff_parser --no-bench  # 只做差分
+#   python -m bench.diff_parser -n 500 -r 15
+
+import argparse
+import os
+import statistics
+import sys
+from datetime import date
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from nlp import parser, parser_v2, parser_v2_regex  # noqa: E402
+from bench.bench_parser import elapsed  # noqa: E402
+from bench.parser_corpus import UTTERANCES, EVENT_LABELS, EXPECTED, EXPECTED_ITEMS, EXPECTED_TITLES  # noqa: E402
+
+PARSERS = {
+    "legacy": parser.parse_schedule_from_text,
+    "regex": parser_v2_regex.parse_schedule_from_text_v2,
+    "engine": parser_v2.parse_schedule_from_text_v2,
+}
+
+
+def interval(fn, text: str):
+    """→ ("HH:MM", "HH:MM") / None（没解析出时间）/ "ERR"（抛异常）"""
+    try:
+        r = fn(text)
+    except Exception:
+        return "ERR"
+    if not r.get("start") or not r.get("end"):
+        return None
+    return r["start"].strftime("%H:%M"), r["end"].strftime("%H:%M")
+
+
+def fmt(v) -> str:
+    if v is None:
+        return "-"
+    if v == "ERR":
+        return "ERR"
+    return f"{v[0]}~{v[1]}"
+
+
+def items(text: str):
+    """parse_schedule_items → [(相对今天的天数 / None, 开始, 结束, RRULE / None)]"""
+    r = parser_v2.parse_schedule_items(text)
+    today = date.today()
+    out = []
+    for e in r.get("events", []):
+        rule = e.get("recurrence")
+        out.append((
+            None if rule else (e["start"].date() - today).days,
+            e["start"].strftime("%H:%M"),
+            e["end"].strftime("%H:%M"),
+            rule.to_rrule() if rule else None,
+        ))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", "--rounds", type=int, default=100)
+    ap.add_argument("-r", "--repeat", type=int, default=9)
+    ap.add_argument("--no-bench", action="store_true")
+    args = ap.parse_args()
+
+    corpus = list(dict.fromkeys(UTTERANCES + EVENT_LABELS + list(EXPECTED)))
+    agree = {name: 0 for name in PARSERS if name != "engine"}
+    wrong = []
+
+    print(f"{'legacy':<14}{'regex':<14}{'engine':<14}{'expected':<14}text")
+    for text in corpus:
+        got = {name: interval(fn, text) for name, fn in PARSERS.items()}
+        for name in agree:
+            agree[name] += got[name] == got["engine"]
+
+        mark = ""
+        if text in EXPECTED:
+            if got["engine"] != EXPECTED[text]:
+                wrong.append(text)
+                mark = "  ✗"
+        if len(set(map(str, got.values()))) > 1 or mark:
+            exp = fmt(EXPECTED[text]) if text in EXPECTED else ""
+            print(
+                f"{fmt(got['legacy']):<14}{fmt(got['regex']):<14}{fmt(got['engine']):<14}{exp:<14}{text}{mark}"
+            )
+
+    n = len(corpus)
+    print(f"\n语料 {n} 条；与引擎一致：" + "，".join(f"{k} {v}/{n}" for k, v in agree.items()))
+    print(f"基准答案 {len(EXPECTED)} 条，引擎不一致 {len(wrong)} 条")
+
+    wrong_items = 0
+    for text, expected in EXPECTED_ITEMS.items():
+        got = items(text)
+        if got != expected:
+            wrong_items += 1
+            print(f"  ✗ {text}\n    期望 {expected}\n    实际 {got}")
+    print(f"多件事 / 重复日程 {len(EXPECTED_ITEMS)} 条，不一致 {wrong_items} 条")
+
+    wrong_titles = 0
+    for text, expected in EXPECTED_TITLES.items():
+        got = parser_v2.parse_schedule_from_text_v2(text).get("title")
+        if got != expected:
+            wrong_titles += 1
+            print(f"  ✗ {text}\n    期望标题 {expected}\n    实际标题 {got}")
+    print(f"标题 {len(EXPECTED_TITLES)} 条，不一致 {wrong_titles} 条")
+
+    if not args.no_bench:
+        # 旧实现会对部分输入抛异常，计时时一并计入；引擎的解析缓存关掉，测的是实际扫描
+        cache = parser_v2.parse_cache
+        maxsize, cache.maxsize = cache.maxsize, 0
+        cache.clear()
+        # 三者交替计时，取每个解析器各组耗时的中位数
+        times = {name: [] for name in PARSERS}
+        for _ in range(args.repeat):
+            for name, fn in PARSERS.items():
+                times[name].append(elapsed(lambda t, fn=fn: interval(fn, t), corpus, args.rounds))
+        rates = {name: args.rounds * len(corpus) / statistics.median(ts) for name, ts in times.items()}
+        print(f"\n{'parser':<10}{'parses /s':>12}{'vs legacy':>11}{'vs regex':>10}")
+        for name, r in rates.items():
+            print(f"{name:<10}{r:>12.0f}{r / rates['legacy']:>10.2f}x{r / rates['regex']:>9.2f}x")
+        cache.maxsize = maxsize
+
+    sys.exit(1 if wrong or wrong_items or wrong_titles else 0)
+
+
+if __name__ == "__main__":
+    main()
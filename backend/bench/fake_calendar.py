@@ -0,0 +1,152 @@
+# backend/bench/fake_calendar.py
+# 本地仿真日历服务：页面见 fake_calendar.html，事件存在内存里
+#
+# 基准测试把 CALENDAR_BASE_URL 指向这里，CalendarOperator 不需要真实的 Google 登录。
+# 也可以单独运行，在浏览器里查看：
+#   python -m bench.fake_calendar --port 8800 --seed 3
+
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+PAGE_PATH = Path(__file__).with_name("fake_calendar.html")
+API_PATH = "/calendar/u/0/events"
+
+SEED_TITLES = ["周会", "一对一沟通", "需求评审", "客户电话", "代码评审", "午餐会", "面试"]
+
+
+class FakeCalendar:
+    def __init__(self, latency_ms: float = 50, dialog_delay_ms: float = 150, asset_kb: int = 200):
+        # latency_ms：每个数据请求的服务端延迟；dialog_delay_ms：弹窗出现前的动画时间
+        # asset_kb：页面引用的头像图片 + 字体的总大小，模拟真实页面里可以省掉的静态资源
+        self.latency_ms = latency_ms
+        half = max(1, asset_kb // 2) * 1024
+        rng = random.Random(asset_kb)
+        self.assets = {
+            "/static/avatar.png": (rng.randbytes(half), "image/png"),
+            "/static/font.woff2": (rng.randbytes(half), "font/woff2"),
+        }
+        self.page = PAGE_PATH.read_text(encoding="utf-8").replace(
+            "__DIALOG_DELAY_MS__", str(int(dialog_delay_ms))
+        ).encode("utf-8")
+        self._events = {}  # "YYYY-MM-DD" → [event]
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._server = None
+
+    # -------------------------
+    # 事件存储
+    # -------------------------
+    def add(self, day: str, title: str, sh: int, sm: int, eh: int, em: int) -> dict:
+        with self._lock:
+            e = {"id": f"evt{self._next_id}", "date": day, "title": title,
+                 "sh": sh, "sm": sm, "eh": eh, "em": em}
+            self._next_id += 1
+            self._events.setdefault(day, []).append(e)
+        return e
+
+    def between(self, start: str, end: str) -> list:
+        with self._lock:
+            return [e for d, evts in self._events.items() if start <= d <= end for e in evts]
+
+    def count(self) -> int:
+        with self._lock:
+            return sum(len(v) for v in self._events.values())
+
+    def seed(self, per_day: int, days: int, start: date = None, rng: random.Random = None):
+        """从 start 起 days 天，每天随机放 per_day 个工作时间内的整点事件"""
+        rng = rng or random.Random(0)
+        start = start or date.today()
+        for i in range(days):
+            d = (start + timedelta(days=i)).isoformat()
+            for h in rng.sample(range(9, 18), per_day):
+                self.add(d, rng.choice(SEED_TITLES), h, 0, h + 1, 0)
+
+    # -------------------------
+    # HTTP 服务
+    # -------------------------
+    def _handler(self):
+        cal = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, ctype: str, max_age: int = 0):
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                if max_age:
+                    self.send_header("Cache-Control", f"public, max-age={max_age}")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _json(self, data):
+                self._send(200, json.dumps(data, ensure_ascii=False).encode("utf-8"), "application/json")
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == API_PATH:
+                    q = parse_qs(url.query)
+                    time.sleep(cal.latency_ms / 1000)
+                    self._json(cal.between(q["from"][0], q["to"][0]))
+                elif url.path in cal.assets:
+                    self._send(200, *cal.assets[url.path], max_age=3600)
+                elif url.path.startswith("/calendar"):
+                    self._send(200, cal.page, "text/html; charset=utf-8")
+                else:
+                    self.send_response(302)
+                    self.send_header("Location", "/calendar/u/0/r")
+                    self.end_headers()
+
+            def do_POST(self):
+                if urlparse(self.path).path != API_PATH:
+                    self._send(404, b"", "text/plain")
+                    return
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                time.sleep(cal.latency_ms / 1000)
+                self._json(cal.add(body["date"], body["title"], body["sh"], body["sm"], body["eh"], body["em"]))
+
+        return Handler
+
+    def start(self, port: int = 0) -> str:
+        """后台线程启动服务，返回 base URL（CALENDAR_BASE_URL）"""
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="fake-calendar", daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8800)
+    ap.add_argument("--latency-ms", type=float, default=50)
+    ap.add_argument("--asset-kb", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=2, help="每天预置的事件数")
+    ap.add_argument("--days", type=int, default=14)
+    args = ap.parse_args()
+
+    cal = FakeCalendar(args.latency_ms, asset_kb=args.asset_kb)
+    cal.seed(args.seed, args.days)
+    url = cal.start(args.port)
+    print(f"仿真日历已启动：{url}/calendar/u/0/r   （CALENDAR_BASE_URL={url}）")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        cal.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# backend/bench/make_fixtures.py
+# 生成端到端基准用的语音样本：用本机 TTS（pyttsx3）朗读语料，转成 16kHz 单声道 WAV
+#
+# 输出 bench/fixtures/NN.wav 和 manifest.json（文件名 → 原文），bench_e2e 据此上传并核对识别结果。
+# 用法（在 backend 目录下，需要可用的 TTS 引擎；非 WAV 输出需要 ffmpeg）：
+#   python -m bench.make_fixtures            # 语料前 10 条
+#   python -m bench.make_fixtures -n 30
+
+import argparse
+import json
+import os
+import sys
+import wave
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from bench.parser_corpus import UTTERANCES  # noqa: E402
+from speech.audio_decode import decode_to_pcm  # noqa: E402
+from speech.tts import get_engine  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+MANIFEST = os.path.join(FIXTURE_DIR, "manifest.json")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=10, help="取语料前 n 条")
+    args = ap.parse_args()
+
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    engine = get_engine()
+    manifest = []
+
+    for i, text in enumerate(UTTERANCES[: args.n]):
+        raw = os.path.join(FIXTURE_DIR, f"{i:02d}.raw")
+        engine.save_to_file(text, raw)
+        engine.runAndWait()
+
+        with open(raw, "rb") as f:
+            pcm = decode_to_pcm(f.read())
+        os.remove(raw)
+
+        name = f"{i:02d}.wav"
+        with wave.open(os.path.join(FIXTURE_DIR, name), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(16000)
+            w.writeframes(pcm)
+
+        manifest.append({"file": name, "text": text, "seconds": round(len(pcm) / 32000, 2)})
+        print(f"{name}  {len(pcm) / 32000:5.2f}s  {text}")
+
+    with open(MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    print(f"已生成 {len(manifest)} 个样本：{FIXTURE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# backend/bench/parser_corpus.py
+# 解析器基准 / 对照用语料：用户口述的日程 + Google Calendar 事件块的 aria-label
+
+from datetime import date
+
+UTTERANCES = [
+    "明天上午十点到十一点和公司 CEO 开会",
+    "今天下午三点开会",
+    "明天早上九点到十点",
+    "后天晚上七点吃饭",
+    "下周三上午十点项目评审",
+    "明天9点到10点跟客户电话会议",
+    "今天14:00-15:30 写周报",
+    "明天下午两点和产品经理对需求",
+    "下周五下午四点团队分享",
+    "后天上午九点半去医院体检",
+    "今天晚上八点健身",
+    "明天十点开会",
+    "下周一早上八点出差去上海",
+    "明天下午3点到5点面试候选人",
+    "今天上午11点到12点一对一沟通",
+    "明天中午十二点和朋友吃饭",
+    "后天下午四点到六点打球",
+    "明天上午十点",
+    "今天下午五点去接孩子",
+    "下周日上午十点家庭聚会",
+    "明天九点到十点半代码评审",
+    "今天晚上九点到十点看书",
+    "明天上午八点二十五分晨会",
+    "帮我记一下明天开会",
+    "明天早上七点起床跑步",
+    "后天10:30到11:30财务对账",
+    "下周二下午两点到三点季度复盘",
+    "今天下午一点到两点午休",
+    "明天上午十点一起讨论方案",
+    "明天晚上十一点提醒我关窗",
+]
+
+EVENT_LABELS = [
+    "下午2点至下午3点，项目周会，王小明，已接受，2025年11月20日",
+    "上午10点至上午11点，一对一沟通，已接受，2025年11月20日",
+    "10:00 到 11:00，需求评审，会议室 A，2025年11月21日",
+    "下午3点至下午4点30分，客户电话，2025年11月21日",
+    "上午9点至上午9点30分，晨会，2025年11月22日",
+    "下午1点 - 下午2点，午餐会，2025年11月22日",
+    "14:00-15:00 设计评审",
+    "上午11点至中午12点，面试，2025年11月23日",
+    "晚上7点至晚上9点，团队聚餐，2025年11月23日",
+    "下午4点至下午5点，代码评审，张三，2025年11月24日",
+    "全天，公司年会，2025年11月25日",
+    "上午8点至上午8点45分，站会，2025年11月26日",
+]
+
+# 对照基准：文本 → (开始, 结束)，"HH:MM"；无法解析时为 None。
+# 覆盖几个解析器之间有分歧的说法：半点、两端各带时段词、二十几点、跨中午、事件块的 en dash 分隔
+EXPECTED = {
+    "明天上午十点到十一点和公司 CEO 开会": ("10:00", "11:00"),
+    "后天上午九点半去医院体检": ("09:30", "10:30"),
+    "明天九点到十点半代码评审": ("09:00", "10:30"),
+    "明天上午八点二十五分晨会": ("08:25", "09:25"),
+    "今天14:00-15:30 写周报": ("14:00", "15:30"),
+    "明天中午十二点和朋友吃饭": ("12:00", "13:00"),
+    "帮我记一下明天开会": None,
+    "明天下午三点到晚上五点开会": ("15:00", "17:00"),
+    "明天上午十一点到下午一点午餐会": ("11:00", "13:00"),
+    "明天上午十一点到一点培训": ("11:00", "13:00"),
+    "今天两点半到三点半喝咖啡": ("02:30", "03:30"),
+    "今天二十三点发版": ("23:00", "00:00"),
+    "今天二十点到二十二点值班": ("20:00", "22:00"),
+    "明天中午一点取快递": ("13:00", "14:00"),
+    "明天早上十点和下午的同事开会": ("10:00", "11:00"),
+    "下午2点至下午3点，项目周会，王小明，已接受，2025年11月20日": ("14:00", "15:00"),
+    "上午11点至中午12点，面试，2025年11月23日": ("11:00", "12:00"),
+    "上午11点至下午1点，午餐会，2025年11月23日": ("11:00", "13:00"),
+    "10:00 – 11:00，需求评审，会议室 A": ("10:00", "11:00"),
+    "下午3点至下午4点30分，客户电话，2025年11月21日": ("15:00", "16:30"),
+    "全天，公司年会，2025年11月25日": None,
+    # Vosk 的识别结果按词用空格分隔
+    "明天 上午 十点 半 开会": ("10:30", "11:30"),
+    "明天 上午 十 点 三十 分 开会": ("10:30", "11:30"),
+    "明天 下午 三 点 十五 开会": ("15:15", "16:15"),
+    "明天 上午 十 点 半 到 十一 点 半 评审": ("10:30", "11:30"),
+    "明天 三 点 一起 吃饭": ("03:00", "04:00"),
+    # 晚上十二点是当天结束（次日零点），不是中午
+    "今天晚上十二点提醒我": ("00:00", "01:00"),
+    "今天晚上十点到十二点加班": ("22:00", "00:00"),
+    "周三下午三点开会": ("15:00", "16:00"),
+}
+
+def _until(weekday: int) -> int:
+    """今天到最近的星期 weekday（含今天）的天数"""
+    return (weekday - date.today().weekday()) % 7
+
+
+# 一句多件事 / 重复日程（parser_v2.parse_schedule_items）：
+# 文本 → [(相对今天的天数，重复日程为 None, 开始, 结束, RRULE 或 None)]
+EXPECTED_ITEMS = {
+    "明天上午十点开会，下午三点看牙": [(1, "10:00", "11:00", None), (1, "15:00", "16:00", None)],
+    "明天下午三点开会然后五点吃饭": [(1, "15:00", "16:00", None), (1, "17:00", "18:00", None)],
+    "明天晚上八点吃饭，九点看电影": [(1, "20:00", "21:00", None), (1, "21:00", "22:00", None)],
+    "明天上午九点开会，十点评审": [(1, "09:00", "10:00", None), (1, "10:00", "11:00", None)],
+    "每周一三五上午九点站会": [(None, "09:00", "10:00", "FREQ=WEEKLY;BYDAY=MO,WE,FR")],
+    "每个工作日上午九点半晨会": [(None, "09:30", "10:30", "FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR")],
+    "每周五到周一上午十点值班": [(None, "10:00", "11:00", "FREQ=WEEKLY;BYDAY=MO,FR,SA,SU")],
+    "每周末上午十点打球": [(None, "10:00", "11:00", "FREQ=WEEKLY;BYDAY=SA,SU")],
+    "今天晚上十二点提醒我": [(1, "00:00", "01:00", None)],
+    "今天晚上十点到十二点加班": [(0, "22:00", "00:00", None)],
+    # 不带“下”的星期 X：今天起最近的一个（含今天）
+    "周三下午三点开会": [(_until(2), "15:00", "16:00", None)],
+    "星期天上午十点爬山": [(_until(6), "10:00", "11:00", None)],
+    "下周三上午十点项目评审": [(_until(2) + 7, "10:00", "11:00", None)],
+}
+
+# 标题：时间 / 日期 / 重复规则的词都要从标题里去掉
+EXPECTED_TITLES = {
+    "周三下午三点开会": "开会",
+    "星期天上午十点爬山": "爬山",
+    "这周五下午两点评审": "评审",
+    "下周三上午十点项目评审": "项目评审",
+    "每周末上午十点打球": "打球",
+    "今天晚上十二点提醒我": "提醒我",
+}
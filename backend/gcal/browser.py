@@ -1,26 +1,40 @@
 # backend/gcal/browser.py
 import asyncio
+import logging
 from pathlib import Path
 from playwright.async_api import async_playwright
 
+from gcal.config import CALENDAR_BASE_URL, CALENDAR_HOME
+from gcal.lean import LEAN_MODE, launch_args, prepare_context, prepare_page
+from gcal.waits import HOUR_ROW_SELECTOR, wait_hour_rows
+
+log = logging.getLogger(__name__)
+
 # 项目 backend 目录
 BACKEND_DIR = Path(__file__).resolve().parents[1]
 # 用于持久化登录状态的用户数据目录（Chrome 用户目录）
 USER_DATA_DIR = BACKEND_DIR / "playwright_user_data"
 USER_DATA_DIR.mkdir(parents=True, exist_ok=True)
+# 精简模式下给持久化 profile 固定一块较大的磁盘缓存，脚本 / 样式表跨重启复用
+DISK_CACHE_ARGS = [f"--disk-cache-dir={USER_DATA_DIR / 'cache'}", "--disk-cache-size=268435456"]
 
 class PlaywrightManager:
     def __init__(self):
         self._pw = None
         self.context = None
-
-    async def launch(self, headful: bool = True):
-        """启动带持久化用户目录的浏览器，并确保最终停在真正的 Google Calendar 主界面。"""
+        self.lean = LEAN_MODE
+
+    async def launch(self, headful: bool = True, lean: bool = LEAN_MODE):
+        """
+        启动带持久化用户目录的浏览器，并确保最终停在真正的 Google Calendar 主界面。
+        lean=True（默认取 BROWSER_LEAN）时不加载图片、拦截字体 / 媒体 / 第三方请求并关闭动画，见 gcal/lean.py。
+        只用于首次登录、导出登录状态（gcal/shards.py）；日历操作都走分片各自的页面池。
+        """
         if self.context:
-            print(">>> 已有 Playwright context，直接复用")
+            log.info("已有 Playwright context，直接复用")
             return self.context
 
-        print(">>> 启动 Playwright ...")
+        log.info("启动 Playwright ...")
         self._pw = await async_playwright().start()
 
         # ⭐ 使用 launch_persistent_context，保证 USER_DATA_DIR 里记录完整登录状态
@@ -31,6 +45,7 @@ class PlaywrightManager:
                 "--disable-blink-features=AutomationControlled",
                 "--disable-infobars",
                 "--start-maximized",
+                *(launch_args(lean) + DISK_CACHE_ARGS if lean else []),
             ],
             viewport={"width": 1280, "height": 900},
             user_agent=(
@@ -40,45 +55,58 @@ class PlaywrightManager:
             ),
         )
 
+        self.lean = lean
+        await prepare_context(self.context, lean)
         page = await self.context.new_page()
+        await prepare_page(page, lean)
 
         # 1️⃣ 尝试直接打开日历，看是不是已经登录
-        calendar_url = "https://calendar.google.com/calendar/u/0/r"
-        print(">>> 尝试直接打开日历:", calendar_url)
+        calendar_url = CALENDAR_HOME
+        log.info("尝试直接打开日历: %s", calendar_url)
         try:
             await page.goto(calendar_url, wait_until="load", timeout=60000)
         except Exception as e:
-            print(">>> 打开日历出错:", repr(e))
+            log.warning("打开日历出错: %r", e)
 
-        await page.wait_for_timeout(2000)
+        # 等到要么离开日历（跳去登录 / 宣传页），要么日视图小时行渲染出来，二者先到为准
+        try:
+            await page.wait_for_function(
+                """
+                ([sel, prefix]) => !location.href.startsWith(prefix)
+                    || document.querySelectorAll(sel).length >= 24
+                """,
+                arg=[HOUR_ROW_SELECTOR, f"{CALENDAR_BASE_URL}/calendar"],
+                timeout=10000,
+            )
+        except Exception as e:
+            log.warning("等待日历界面超时: %r", e)
         current_url = page.url
-        print(">>> 当前打开 URL:", current_url)
+        log.info("当前打开 URL: %s", current_url)
 
         # ✅ 只有真正在 calendar.google.com/calendar/... 才算“已登录”
-        if current_url.startswith("https://calendar.google.com/calendar"):
-            print(">>> 检测到已在 Google Calendar 主界面，视为登录成功（复用 USER_DATA_DIR）")
+        if current_url.startswith(f"{CALENDAR_BASE_URL}/calendar"):
+            log.info("检测到已在 Google Calendar 主界面，视为登录成功（复用 USER_DATA_DIR）")
             return self.context
 
         # ❌ 不在日历主界面（包括 workspace.google.com 宣传页），视为未登录
-        print(">>> 当前不是 Calendar 主界面（可能是 workspace 介绍页 / 未登录），进入登录流程 ...")
+        log.info("当前不是 Calendar 主界面（可能是 workspace 介绍页 / 未登录），进入登录流程 ...")
 
         # 2️⃣ 跳到 Google 专门的 Calendar 登录入口
         login_url = (
             "https://accounts.google.com/ServiceLogin?"
             "service=cl&continue=https://calendar.google.com/calendar&hl=zh-CN"
         )
-        print(">>> 跳转登录页:", login_url)
+        log.info("跳转登录页: %s", login_url)
         await page.goto(login_url, wait_until="load")
 
         print(">>> 请在弹出的浏览器中完成 Google 登录（包括 MFA）")
         input(">>> 登录完成后，请回到这里按回车继续... ")
 
         # 3️⃣ 登录完成后，再次打开日历确认
-        print(">>> 登录完成，重新进入 Calendar 主界面 ...")
+        log.info("登录完成，重新进入 Calendar 主界面 ...")
         await page.goto(calendar_url, wait_until="load")
-        await page.wait_for_timeout(2000)
-        print(">>> 登录流程结束，后续将复用 USER_DATA_DIR 目录中的登录状态")
-
+        await wait_hour_rows(page, timeout=30000)
+        log.info("登录流程结束，后续将复用 USER_DATA_DIR 目录中的登录状态")
         return self.context
 
     async def close(self):
@@ -2,19 +2,177 @@
 # 2025 年终极版本 —— 带稳定冲突检测 + 稳定事件创建
 
 import asyncio
-from datetime import datetime
+import logging
+import os
+import re
+from contextlib import AsyncExitStack
+from datetime import date as date_cls, datetime, time as time_cls, timedelta
 from typing import Optional
-from nlp import parser_v2  # 用它里面的 parse_time 来解析事件时间
+from nlp import parser_v2  # 用它里面的 parse_time 来解析事件时间（规则表见 nlp/engine.py）
+from gcal import slots
+from gcal.event_index import event_index, FRESH, STALE
+from gcal.page_pool import PoolTimeout, create_page_pool
+from gcal.trace import StepTrace
+from gcal.waits import XHRTracker, is_calendar_save, wait_hour_rows, wait_input_values
+
+log = logging.getLogger(__name__)
+
+
+# ====================================================
+#  事件块文本 → 时间段
+# ====================================================
+def label_interval(date, combined: str):
+    """事件块的 aria-label + 文本 → (start_dt, end_dt)；与用户口述共用同一个解析引擎，全天事件等无时间的返回 None"""
+    t = parser_v2.parse_time(combined)
+
+    if t:
+        # 从零点加钟点：晚上十二点为 24:00，落到次日零点
+        midnight = datetime(date.year, date.month, date.day)
+        if t[0] == "range":
+            (h1, m1), (h2, m2) = t[1], t[2]
+            return (
+                midnight + timedelta(hours=h1, minutes=m1),
+                midnight + timedelta(hours=h2, minutes=m2),
+            )
+        # 单点事件，默认 1 小时
+        h, m = t[1]
+        start = midnight + timedelta(hours=h, minutes=m)
+        return start, start + timedelta(hours=1)
+    return None
+
+
+# aria-label 末尾的日期（月视图 / 找不到所在列时使用）
+LABEL_DATE_RE = re.compile(r"(\d{4})年(\d{1,2})月(\d{1,2})日")
+
+# 视图中所有日期列 / 日期格及其中的事件块。
+# data-datekey 编码：((年 - 1970) << 9) | (月 << 5) | 日
+EXTRACT_VIEW_JS = """
+() => {
+    const decode = (key) => {
+        const k = parseInt(key, 10);
+        if (!k) return null;
+        return [(k >> 9) + 1970, (k >> 5) & 15, k & 31];
+    };
+    const days = Array.from(document.querySelectorAll('[data-datekey]'))
+        .map(el => decode(el.getAttribute('data-datekey')))
+        .filter(Boolean);
+    const events = Array.from(document.querySelectorAll('div[data-eventid]')).map(el => {
+        const col = el.closest('[data-datekey]');
+        const aria = el.getAttribute('aria-label') || "";
+        const text = (el.innerText || "").replace(/\\s+/g, " ").trim();
+        return {
+            date: col ? decode(col.getAttribute('data-datekey')) : null,
+            combined: (aria + " " + text).trim(),
+        };
+    });
+    return { days, events };
+}
+"""
+
+
+# 提前打开弹窗（gcal/speculate.py）至少要留一个空闲页面给其他请求；借页面最多等这么久
+PREPARE_MIN_IDLE = int(os.environ.get("SPECULATE_MIN_IDLE_PAGES", 2))
+PREPARE_CHECKOUT_TIMEOUT = float(os.environ.get("SPECULATE_CHECKOUT_TIMEOUT", 2.0))
+
+
+TITLE_SELECTORS = [
+    '[aria-label="添加标题"]',
+    '[aria-label="活动名称"]',
+    '[aria-label="标题"]',
+    '[aria-label="标题（可选）"]',
+]
+
+
+class PreparedCreate:
+    """
+    提前借出一个页面，切到目标日期并打开新建弹窗（语音还没识别完时就可以做）。
+    commit：只剩填写 + 保存；cancel：关掉弹窗、归还页面。二者只会生效一次。
+    """
+
+    def __init__(self, op, day):
+        self.op = op
+        self.day = day
+        self.page = None
+        self.dialog = None
+        self.done = False
+        self._stack = AsyncExitStack()
+        self._after = []
+
+    def on_release(self, callback):
+        """归还页面之后再调用的异步回调（如释放借用的浏览器分片）"""
+        self._after.append(callback)
+
+    async def _close(self):
+        try:
+            await self._stack.aclose()
+        finally:
+            for callback in self._after:
+                await callback()
+            self._after = []
+
+    async def open(self, hour: int = 9):
+        trace = StepTrace("prepare_create")
+        try:
+            self.page = await self._stack.enter_async_context(
+                self.op.pool.page(self.day, trace=trace, timeout=PREPARE_CHECKOUT_TIMEOUT)
+            )
+            self.dialog = await self.op._open_dialog(self.page, hour, trace)
+        except BaseException:
+            trace.finish(False)
+            await self._fail()
+            raise
+        trace.finish(True)
+        return self
+
+    async def commit(self, title: str, start_dt: datetime, end_dt: datetime) -> bool:
+        if self.done:
+            raise RuntimeError("弹窗已经提交或取消")
+        trace = StepTrace("create_prepared")
+        try:
+            await self.op._fill_dialog(self.page, self.dialog, title, start_dt, end_dt, trace)
+        except Exception as e:
+            log.error("创建失败：%s", e)
+            trace.finish(False)
+            await self._fail()
+            return False
+
+        trace.finish(True)
+        self.done = True
+        await self._close()
+        log.info("创建成功：%s", title)
+        self.op.index.add_event(start_dt, end_dt, title)
+        return True
+
+    async def cancel(self):
+        if self.done:
+            return
+        self.done = True
+        try:
+            if self.page is not None and not self.page.is_closed():
+                await self.page.keyboard.press("Escape")
+        except Exception:
+            self.op.pool.invalidate(self.page)
+        await self._close()
+
+    async def _fail(self):
+        self.done = True
+        if self.page is not None:
+            self.op.pool.invalidate(self.page)
+        await self._close()
+
 
 class CalendarOperator:
-    def __init__(self, context):
+    def __init__(self, context, pool=None, index=event_index):
         self.context = context
+        # 预热好的日历页面池，借出时已切到目标日期的日视图；没有 context（只读索引）时为 None
+        self.pool = pool if pool is not None or context is None else create_page_pool(context)
+        self.index = index
+        self._refreshing = {}  # 日期 → 后台刷新任务
 
-    async def open_calendar(self):
-        page = await self.context.new_page()
-        await page.goto("https://calendar.google.com/calendar/u/0/r", wait_until="domcontentloaded")
-        await page.wait_for_selector("div.XsRa1c", timeout=30000)
-        return page
+    @classmethod
+    def reader(cls, index=event_index) -> "CalendarOperator":
+        """只读本地索引的操作器（suggest_slots / busy_intervals），没有浏览器也没有页面池"""
+        return cls(None, index=index)
 
     # ====================================================
     #  创建日程（你之前的逻辑我保留，只修正一些细节）
@@ -27,76 +185,186 @@ class CalendarOperator:
         location: Optional[str] = None,
         description: Optional[str] = None,
     ):
-        page = await self.open_calendar()
-        url = f"https://calendar.google.com/calendar/u/0/r/day/{start_dt.year}/{start_dt.month}/{start_dt.day}"
+        trace = StepTrace("create_event")
+        try:
+            async with self.pool.page(start_dt.date(), trace=trace) as page:
+                try:
+                    await self._fill_and_save(page, title, start_dt, end_dt, trace)
+                except Exception:
+                    await page.screenshot(path=f"error_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png", full_page=True)
+                    raise
+
+        except Exception as e:
+            log.error("创建失败：%s", e)
+            trace.finish(False)
+            return False
+
+        trace.finish(True)
+        log.info("创建成功：%s", title)
+        self.index.add_event(start_dt, end_dt, title)
+        return True
 
+    async def prepare_create(self, day, hour: int = 9):
+        """
+        提前打开 day 的新建弹窗，返回 PreparedCreate。
+        空闲页面少于 PREPARE_MIN_IDLE，或在 PREPARE_CHECKOUT_TIMEOUT 内借不到页面时返回 None（调用方走普通创建），
+        不为了猜测占用别的请求要用的页面
+        """
+        if self.pool.available() < PREPARE_MIN_IDLE:
+            return None
         try:
-            # 打开日期
-            await page.goto(url, wait_until="domcontentloaded")
-            await asyncio.sleep(1.2)
+            return await PreparedCreate(self, day).open(hour)
+        except PoolTimeout:
+            log.info("提前打开弹窗：没有空闲页面，放弃")
+            return None
 
-            # 强制切换为日视图
+    # ====================================================
+    #  批量创建：同一天的事件共用一个已导航的页面
+    # ====================================================
+    async def create_events(self, events: list) -> list:
+        """
+        events: [{"title", "start", "end"}]，返回与输入同序的结果：
+            {"index", "title", "start", "end", "status": ok | conflict | error, "message"}
+
+        1. 批内冲突：按输入顺序，与同一批中先出现的事件重叠的判为冲突
+        2. 日历冲突：check_conflicts（缺索引的日期合并成一次范围抓取，其后整批查本地索引）
+        3. 按天分组，每天借出一个页面连续填写；不同日期并发使用页面池中的多个页面
+        """
+        results = [
+            {
+                "index": i,
+                "title": e["title"],
+                "start": e["start"],
+                "end": e["end"],
+                "status": None,
+                "message": "",
+            }
+            for i, e in enumerate(events)
+        ]
+
+        # ---- 批内冲突 ----
+        accepted = {}  # 日期 → [(start, end, index)]
+        for r in results:
+            for s, e, j in accepted.get(r["start"].date(), []):
+                if s < r["end"] and e > r["start"]:
+                    r["status"] = "conflict"
+                    r["message"] = f"与本批第 {j + 1} 条日程时间重叠"
+                    break
+            else:
+                accepted.setdefault(r["start"].date(), []).append((r["start"], r["end"], r["index"]))
+
+        # ---- 日历冲突（缺索引的日期合并抓取一次，整批查一遍索引） ----
+        pending = [r for r in results if r["status"] is None]
+        conflicts = await self.check_conflicts([(r["start"], r["end"]) for r in pending])
+        by_day = {}
+        for r, conflict in zip(pending, conflicts):
+            if conflict:
+                r["status"] = "conflict"
+                r["message"] = "与日历中已有日程时间重叠"
+            by_day.setdefault(r["start"].date(), []).append(r)
+
+        # ---- 按天创建 ----
+        async def create_day(day, items):
+            items = [r for r in items if r["status"] is None]
+            if not items:
+                return
+            trace = StepTrace("create_events")
+            try:
+                async with self.pool.page(day, trace=trace) as page:
+                    for r in sorted(items, key=lambda r: r["start"]):
+                        try:
+                            await self._fill_and_save(page, r["title"], r["start"], r["end"], trace)
+                        except Exception as e:
+                            log.error("批量创建失败：%s %s", r["title"], e)
+                            r["status"] = "error"
+                            r["message"] = str(e)
+                            # 关掉残留弹窗继续下一条；页面归还时关闭补新
+                            self.pool.invalidate(page)
+                            await page.keyboard.press("Escape")
+                            continue
+                        r["status"] = "ok"
+                        self.index.add_event(r["start"], r["end"], r["title"])
+                        log.info("创建成功：%s", r["title"])
+            except Exception as e:
+                log.error("批量创建失败：%s %s", day, e)
+                for r in items:
+                    if r["status"] is None:
+                        r["status"] = "error"
+                        r["message"] = str(e)
+            trace.finish(all(r["status"] == "ok" for r in items))
+
+        await asyncio.gather(*(create_day(d, items) for d, items in by_day.items()))
+        return results
+
+    async def _fill_and_save(self, page, title: str, start_dt: datetime, end_dt: datetime, trace: StepTrace):
+        """在已切到目标日期日视图的页面上：点击小时行 → 填写弹窗 → 保存"""
+        dialog = await self._open_dialog(page, start_dt.hour, trace)
+        await self._fill_dialog(page, dialog, title, start_dt, end_dt, trace)
+
+    async def _open_dialog(self, page, hour_index: int, trace: StepTrace):
+        """点击小时行，等新建弹窗出现且标题输入框可用，返回弹窗 locator"""
+        # 强制切换为日视图，等 24 个小时行渲染完成
+        async with trace.step("grid_ready"):
             await page.keyboard.press("1")
-            await asyncio.sleep(1.2)
+            await wait_hour_rows(page, timeout=5000)
 
-            # 点击时间行
-            hour_index = start_dt.hour
-            print(">>> 要点击的时间行 index:", hour_index)
+        # 点击时间行
+        log.debug("要点击的时间行 index: %d", hour_index)
 
-            rows = page.locator("div.XsRa1c")
-            count = await rows.count()
+        rows = page.locator("div.XsRa1c")
+        count = await rows.count()
 
-            if count < 24:
-                raise RuntimeError(f"❌ 小时行数量异常：{count}")
+        if count < 24:
+            raise RuntimeError(f"❌ 小时行数量异常：{count}")
 
-            row = rows.nth(hour_index)
+        row = rows.nth(hour_index)
 
+        async with trace.step("click_row"):
             await row.scroll_into_view_if_needed()
-            await asyncio.sleep(0.2)
+            await row.wait_for(state="visible", timeout=2000)
             await row.click(force=True)
 
-            print(f"✔ 已点击小时行: {hour_index}")
+        log.debug("已点击小时行: %d", hour_index)
 
-            # 等待弹窗
-            dialog = page.locator("div[role='dialog']").first
+        # 等待弹窗，且标题输入框可见（弹窗动画结束、可以输入）
+        dialog = page.locator("div[role='dialog']").first
+        async with trace.step("dialog_open"):
             await dialog.wait_for(state="visible", timeout=8000)
-            await asyncio.sleep(0.6)
-
-            # ---- 标题 ----
-            title_selectors = [
-                '[aria-label="添加标题"]',
-                '[aria-label="活动名称"]',
-                '[aria-label="标题"]',
-                '[aria-label="标题（可选）"]',
-            ]
-
-            for sel in title_selectors:
+            await dialog.locator(", ".join(TITLE_SELECTORS)).first.wait_for(state="visible", timeout=3000)
+        return dialog
+
+    async def _fill_dialog(self, page, dialog, title: str, start_dt: datetime, end_dt: datetime, trace: StepTrace):
+        """在已打开的新建弹窗里填写标题 / 时间并保存"""
+        # ---- 标题 ----
+        async with trace.step("fill_title"):
+            for sel in TITLE_SELECTORS:
                 tbox = dialog.locator(sel)
                 if await tbox.count():
                     await tbox.fill(title)
-                    print("✔ 已填写标题:", sel)
+                    log.debug("已填写标题: %s", sel)
                     break
 
-            # ---- 时间输入 ----
-            start_labels = ["开始时间", "开始", "开始日期"]
-            end_labels = ["结束时间", "结束", "结束日期"]
+        # ---- 时间输入 ----
+        start_labels = ["开始时间", "开始", "开始日期"]
+        end_labels = ["结束时间", "结束", "结束日期"]
 
-            async def find_input(labels):
-                for lbl in labels:
-                    sel = f'input[aria-label="{lbl}"]'
-                    box = dialog.locator(sel)
-                    if await box.count():
-                        return box
-                return None
+        async def find_input(labels):
+            for lbl in labels:
+                sel = f'input[aria-label="{lbl}"]'
+                box = dialog.locator(sel)
+                if await box.count():
+                    return lbl, box
+            return None, None
 
-            start_input = await find_input(start_labels)
-            end_input = await find_input(end_labels)
+        async with trace.step("fill_time"):
+            start_label, start_input = await find_input(start_labels)
+            end_label, end_input = await find_input(end_labels)
 
             if start_input and end_input:
                 s = start_dt.strftime("%H:%M")
                 e = end_dt.strftime("%H:%M")
 
-                print(f"✔ 写入时间 {s} → {e}")
+                log.debug("写入时间 %s → %s", s, e)
 
                 for box, val in [(start_input, s), (end_input, e)]:
                     await box.evaluate(
@@ -112,177 +380,283 @@ class CalendarOperator:
                         val
                     )
 
-            await asyncio.sleep(0.5)
-
-            # ---- 保存 ----
-            print(">>> 点击保存")
-            await dialog.locator("button:has-text('保存')").click(force=True)
-            await asyncio.sleep(1.0)
-
-            try:
-                await dialog.wait_for(state="detached", timeout=5000)
-            except:
-                pass
-
-            print("🎉 创建成功：", title)
-            return True
-
-        except Exception as e:
-            print("❌ 创建失败：", e)
-            await page.screenshot(path=f"error_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png", full_page=True)
-            return False
-
-        finally:
-            await page.close()
+                # 等页面接受新值（框架可能在 blur 后重新格式化，超时则按原流程继续保存）
+                try:
+                    await wait_input_values(page, {start_label: s, end_label: e})
+                except Exception:
+                    log.warning("时间输入框的值未按预期更新，继续保存")
+
+        # ---- 保存 ----
+        log.debug("点击保存")
+        async with trace.step("save"):
+            async with XHRTracker(page) as net:
+                # 点击之前开始等，才看得到点击发出的保存请求
+                saved = asyncio.ensure_future(
+                    page.wait_for_event("response", predicate=is_calendar_save, timeout=5000)
+                )
+                try:
+                    await dialog.locator("button:has-text('保存')").click(force=True)
+                except BaseException:
+                    saved.cancel()
+                    raise
+
+                try:
+                    await dialog.wait_for(state="detached", timeout=5000)
+                except:
+                    pass
+
+                # 保存请求返回后再归还页面，避免下一次操作打断写入
+                try:
+                    response = await saved
+                    if not response.ok:
+                        log.warning("保存请求返回 %s", response.status)
+                except Exception as e:
+                    log.warning("未等到保存请求的响应：%r", e)
+                # 保存后页面还会刷新当天的事件，等这些请求也结束
+                if not await net.idle(quiet_ms=100, timeout=5000):
+                    log.warning("保存后的请求未在超时内结束")
 
     # ====================================================
-    #  冲突检测 —— 最终版（parser_v2 + 自定义备份解析）
+    #  冲突检测 —— 优先查本地索引，必要时才抓取页面
     # ====================================================
     async def check_conflict(self, date, start_dt: datetime, end_dt: datetime) -> bool:
         """
-        根据事件块的 aria-label / innerText 解析出时间段，进行重叠判断。
+        索引新鲜：直接查询（微秒级）
+        索引陈旧：先用旧数据回答，后台刷新当天
+        没有索引 / 过期太久：同步抓取当天所在的一周并写入索引（同周其他日期随后直接命中索引）
         """
-        from datetime import datetime, timedelta
-        import re
+        state = self.index.freshness(date)
 
-        page = await self.open_calendar()
-        try:
-            print("\n" + "=" * 80)
-            print("开始冲突检测（最终版）")
-            print(f"目标日期   : {date.strftime('%Y-%m-%d %A')}")
-            print(f"目标时间段 : {start_dt.strftime('%H:%M')} ~ {end_dt.strftime('%H:%M')}")
-            print("=" * 80)
-
-            # 打开当天日视图
-            url = f"https://calendar.google.com/calendar/u/0/r/day/{date.year}/{date.month}/{date.day}"
-            await page.goto(url, wait_until="load", timeout=90000)
-            await page.keyboard.press("1")  # 日视图
-            await asyncio.sleep(1.5)
+        if state in (FRESH, STALE):
+            if state == STALE:
+                self._schedule_refresh(date)
+            conflict = self.index.overlaps(date, start_dt, end_dt)
+            log.debug("冲突检测（本地索引 %s）：%s %s ~ %s → %s", state, date, start_dt.strftime('%H:%M'), end_dt.strftime('%H:%M'), conflict)
+            return conflict
 
-            # 获取所有事件
-            events = await page.evaluate(
-                """
-                () => {
-                    const list = Array.from(document.querySelectorAll('div[data-eventid]'));
-                    return list.map(el => {
-                        const aria = el.getAttribute('aria-label') || "";
-                        const text = (el.innerText || "").replace(/\\s+/g, " ").trim();
-                        return {
-                            aria,
-                            text,
-                            combined: (aria + " " + text).trim()
-                        };
-                    });
-                }
-                """
-            )
+        try:
+            await self.scrape_range_events(date, date)
+        except Exception as e:
+            log.error("冲突检测异常：%s", e)
+            return True  # 出错误时禁止创建，避免误操作
 
-            print(f"当天事件数量: {len(events)}")
-            print("-" * 80)
-
-            def parse_cn_time_span(label: str):
-                """
-                备用解析方法（parser_v2 失败时使用）
-                支持格式：
-                 - 10:00 到 11:00
-                 - 上午10点 - 上午11点
-                 - 下午2点 - 3点
-                """
-                # 1) 10:00 - 11:00 格式
-                m = re.search(r"(\\d{1,2}):(\\d{2}).*?(\\d{1,2}):(\\d{2})", label)
-                if m:
-                    sh, sm, eh, em = map(int, m.groups())
-                    return sh, sm, eh, em
-
-                # 2) 上午/下午 X点 - 上午/下午 Y点
-                m = re.search(
-                    r"(上午|下午|中午)?\\s*(\\d{1,2})点.*?(上午|下午|中午)?\\s*(\\d{1,2})点",
-                    label
-                )
-                if m:
-                    p1, h1, p2, h2 = m.groups()
-                    h1, h2 = int(h1), int(h2)
+        conflict = self.index.overlaps(date, start_dt, end_dt)
+        log.debug("最终结论：存在冲突，不允许创建事件" if conflict else "最终结论：无冲突，可以创建事件")
+        return conflict
 
-                    def to24(h, prefix):
-                        if prefix in ("下午", "中午"):
-                            if h < 12:
-                                return h + 12
-                        return h
+    async def check_conflicts(self, intervals) -> list:
+        """
+        一组 (start_dt, end_dt)（如重复日程展开后的全部实例）一次检测，返回与输入同序的 [bool]：
+        没有可用索引的日期合并成一次范围抓取（周视图一次覆盖 7 天），之后整组只查一遍索引。
+        抓取失败的日期一律按冲突处理。
+        """
+        days = sorted({s.date() for s, _ in intervals})
+        missing = []
+        for d in days:
+            state = self.index.freshness(d)
+            if state == STALE:
+                self._schedule_refresh(d)
+            elif state != FRESH:
+                missing.append(d)
+
+        failed = set()
+        if missing:
+            try:
+                await self.scrape_range_events(missing[0], missing[-1])
+            except Exception as e:
+                log.error("冲突检测异常：%s", e)
+                failed = set(missing)
 
-                    sh = to24(h1, p1 or p2)
-                    eh = to24(h2, p2 or p1)
-                    return sh, 0, eh, 0
+        flags = self.index.overlaps_many(intervals)
+        return [f or s.date() in failed for (s, _), f in zip(intervals, flags)]
 
-                return None
+    def _schedule_refresh(self, date):
+        key = date.isoformat()
+        if key in self._refreshing:
+            return
 
-            conflict_found = False
+        async def refresh():
+            try:
+                # 后台刷新不占写入队列的当天锁：期间创建的事件由写入序号保护，不会被覆盖掉
+                since = self.index.write_token()
+                self.index.replace_day(date, await self.scrape_day_events(date), since=since)
+                log.debug("后台刷新日程索引完成：%s", key)
+            except Exception as e:
+                log.warning("后台刷新日程索引失败：%s %r", key, e)
+            finally:
+                self._refreshing.pop(key, None)
 
-            for idx, evt in enumerate(events):
-                combined = evt["combined"]
+        self._refreshing[key] = asyncio.create_task(refresh())
 
-                print(f"[事件 {idx}] 文本: {combined}")
+    # ====================================================
+    #  范围抓取 —— 一次加载周 / 月视图覆盖多天
+    # ====================================================
+    async def scrape_range_events(self, start_date, end_date, view: str = "week") -> dict:
+        """
+        按视图逐个加载（默认周视图，一次覆盖 7 天），直到覆盖 start_date ~ end_date。
+        视图中出现的每一天（包括没有事件的）都写入本地索引。
+        返回 {date: [(start_dt, end_dt, 文本)]}，只含请求范围内的日期。
 
-                if not combined:
-                    print("  → 空文本，跳过")
-                    print("-" * 80)
+        月视图一次覆盖整月，但某天事件过多时会折叠成“还有 N 项”，结果可能不完整。
+        """
+        since = self.index.write_token()
+        covered = {}
+        cursor = start_date
+        while cursor <= end_date:
+            days, intervals = await self.scrape_view_events(cursor, view)
+            if cursor not in days:
+                # 视图里找不到日期列（页面结构变化）：退回单日抓取
+                log.warning("%s 视图未识别出日期列，改用日视图：%s", view, cursor)
+                days, intervals = {cursor}, await self.scrape_day_events(cursor)
+
+            for d in days:
+                covered.setdefault(d, [])
+            for iv in intervals:
+                d = iv[0].date()
+                if d in covered:
+                    covered[d].append(iv)
+            cursor = max(days) + timedelta(days=1)
+
+        self.index.replace_days(covered, since=since)
+        return {d: v for d, v in covered.items() if start_date <= d <= end_date}
+
+    async def scrape_view_events(self, day, view: str = "week"):
+        """加载 day 所在的周 / 月视图，返回 (视图覆盖的日期集合, [(start_dt, end_dt, 文本)])"""
+        trace = StepTrace(f"scrape_{view}")
+        try:
+            async with self.pool.page(day, trace=trace, view=view) as page:
+                async with trace.step("extract"):
+                    data = await page.evaluate(EXTRACT_VIEW_JS)
+        except Exception:
+            trace.finish(False)
+            raise
+        trace.finish(True)
+
+        days = {date_cls(*d) for d in data["days"]}
+        intervals = []
+        for evt in data["events"]:
+            combined = evt["combined"]
+            if not combined:
+                continue
+            if evt["date"]:
+                d = date_cls(*evt["date"])
+            else:
+                m = LABEL_DATE_RE.search(combined)
+                if not m:
                     continue
+                d = date_cls(*map(int, m.groups()))
+            span = label_interval(d, combined)
+            if span is None:
+                continue
+            intervals.append((span[0], span[1], combined))
 
-                # 第一优先：用 parser_v2
-                t = parser_v2.parse_time(combined)
-
-                evt_start = evt_end = None
-
-                if t:
-                    mode = t[0]
+        log.debug("%s 视图抓取：%d 天，%d 个事件", view, len(days), len(intervals))
+        return days, intervals
 
-                    if mode == "range":
-                        (h1, m1), (h2, m2) = t[1], t[2]
-                        evt_start = datetime(date.year, date.month, date.day, h1, m1)
-                        evt_end = datetime(date.year, date.month, date.day, h2, m2)
-                    else:
-                        # 单点事件，默认 1 小时
-                        h, m = t[1]
-                        evt_start = datetime(date.year, date.month, date.day, h, m)
-                        evt_end = evt_start + timedelta(hours=1)
-
-                    print(f"  → parser_v2 成功解析: {evt_start.strftime('%H:%M')} ~ {evt_end.strftime('%H:%M')}")
+    # ====================================================
+    #  空闲时段查询
+    # ====================================================
+    async def find_free_slots(
+        self,
+        start_date,
+        end_date,
+        duration: timedelta,
+        work_start: time_cls = slots.WORK_START,
+        work_end: time_cls = slots.WORK_END,
+    ) -> list:
+        """start_date ~ end_date 工作时间内长度不少于 duration 的空档；索引缺失的日期用范围抓取补齐"""
+        days = []
+        d = start_date
+        while d <= end_date:
+            days.append(d)
+            d += timedelta(days=1)
+
+        missing = [d for d in days if self.index.freshness(d) not in (FRESH, STALE)]
+        if missing:
+            await self.scrape_range_events(min(missing), max(missing))
+
+        return slots.find_free_slots(
+            self.busy_intervals(days), start_date, end_date, duration, work_start, work_end
+        )
+
+    def suggest_slots(self, start_dt: datetime, end_dt: datetime, n: int = 3) -> list:
+        """冲突时给出当天离原定时间最近的 n 个空闲时段（check_conflict 之后索引里已有当天数据）"""
+        return slots.suggest_slots(self.busy_intervals([start_dt.date()]), start_dt, end_dt - start_dt, n)
+
+    def busy_intervals(self, days) -> list:
+        """本地索引中各天的忙碌区间 [(start_dt, end_dt)]"""
+        busy = []
+        for d in days:
+            midnight = datetime.combine(d, time_cls())
+            for s, e, _ in self.index.events(d):
+                busy.append((midnight + timedelta(minutes=s), midnight + timedelta(minutes=e)))
+        return busy
 
-                else:
-                    # 第二优先：自定义正则解析
-                    span = parse_cn_time_span(combined)
+    # ====================================================
+    #  抓取当天事件 —— 解析引擎（nlp/engine.py）
+    # ====================================================
+    async def scrape_day_events(self, date) -> list:
+        """
+        打开日视图，根据事件块的 aria-label / innerText 解析出时间段。
+        返回 [(start_dt, end_dt, 文本)]
+        """
+        trace = StepTrace("scrape_day")
+        try:
+            intervals = await self._scrape_day(date, trace)
+        except Exception:
+            trace.finish(False)
+            raise
+        trace.finish(True)
+        return intervals
+
+    async def _scrape_day(self, date, trace: StepTrace) -> list:
+        async with self.pool.page(date, trace=trace) as page:
+            log.debug("抓取当天事件：%s", date.strftime('%Y-%m-%d %A'))
+
+            # 页面池已切到当天日视图，且当天数据请求已结束
+            async with trace.step("grid_ready"):
+                await page.keyboard.press("1")  # 日视图
+                await wait_hour_rows(page, timeout=5000)
 
-                    if not span:
-                        print("  → 未能解析时间，跳过")
-                        print("-" * 80)
-                        continue
+            # 获取所有事件
+            async with trace.step("extract"):
+                events = await page.evaluate(
+                    """
+                    () => {
+                        const list = Array.from(document.querySelectorAll('div[data-eventid]'));
+                        return list.map(el => {
+                            const aria = el.getAttribute('aria-label') || "";
+                            const text = (el.innerText || "").replace(/\\s+/g, " ").trim();
+                            return {
+                                aria,
+                                text,
+                                combined: (aria + " " + text).trim()
+                            };
+                        });
+                    }
+                    """
+                )
 
-                    sh, sm, eh, em = span
-                    evt_start = datetime(date.year, date.month, date.day, sh, sm)
-                    evt_end = datetime(date.year, date.month, date.day, eh, em)
+            log.debug("当天事件数量: %d", len(events))
 
-                    print(f"  → 备用解析: {evt_start.strftime('%H:%M')} ~ {evt_end.strftime('%H:%M')}")
+            intervals = []
 
-                # =========== 重叠判断 ===========
-                overlap = not (end_dt <= evt_start or start_dt >= evt_end)
-                print(f"  → 是否冲突: {overlap}")
+            for idx, evt in enumerate(events):
+                combined = evt["combined"]
 
-                if overlap:
-                    conflict_found = True
-                    print("  ❌ 发生时间冲突!")
+                if not combined:
+                    log.debug("[事件 %d] 空文本，跳过", idx)
+                    continue
 
-                print("-" * 80)
+                span = label_interval(date, combined)
 
-            if conflict_found:
-                print("最终结论：存在冲突，不允许创建事件")
-            else:
-                print("最终结论：无冲突，可以创建事件")
+                if span is None:
+                    log.debug("[事件 %d] 未能解析时间，跳过：%s", idx, combined)
+                    continue
 
-            print("=" * 80 + "\\n")
-            return conflict_found
+                evt_start, evt_end = span
+                log.debug("[事件 %d] %s ~ %s %s", idx, evt_start.strftime('%H:%M'), evt_end.strftime('%H:%M'), combined)
 
-        except Exception as e:
-            print("冲突检测异常：", e)
-            return True  # 出错误时禁止创建，避免误操作
+                intervals.append((evt_start, evt_end, combined))
 
-        finally:
-            await page.close()
+            return intervals
@@ -0,0 +1,10 @@
+# backend/gcal/config.py
+# 日历站点地址：默认 Google Calendar；基准测试时指向本地的仿真日历（bench/fake_calendar.py）
+
+import os
+
+CALENDAR_BASE_URL = os.environ.get("CALENDAR_BASE_URL", "https://calendar.google.com").rstrip("/")
+CALENDAR_HOME = f"{CALENDAR_BASE_URL}/calendar/u/0/r"
+
+# 日历标识：写入队列按（日历, 日期）分区，多账号 / 多日历时各自独立
+CALENDAR_ID = os.environ.get("CALENDAR_ID", "primary")
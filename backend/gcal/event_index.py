@@ -0,0 +1,261 @@
+# backend/gcal/event_index.py
+# 本地日程索引：按天保存已知事件的时间区间，冲突检测不必每次都打开浏览器抓取
+#
+# - 每天一个按开始时间排序的区间表，附带“前缀最大结束时间”，重叠查询 O(log n)
+# - 数据来源：日 / 周视图抓取的事件 + create_event 成功后的增量写入
+# - 超过 ttl 视为陈旧：先用旧数据回答，同时后台刷新；超过 max_age 才同步重新抓取
+# - 持久化到 JSON，重启后仍可使用；写文件合并 SAVE_DELAY 秒内的改动、放到线程里做，不阻塞事件循环，
+#   已经过去的日期写入前删掉
+# - 抓取结果写回前先比对写入序号：抓取开始之后又有 add_event 的日期不覆盖（页面上可能还没有新事件，
+#   覆盖会丢掉它并把当天标成 fresh，之后的冲突检测就会放过重复预订）
+
+import asyncio
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from datetime import date as date_cls, datetime
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+INDEX_PATH = BACKEND_DIR / "tmp" / "event_index.json"
+
+FRESH = "fresh"
+STALE = "stale"
+EXPIRED = "expired"
+MISSING = "missing"
+
+DAY_MINUTES = 24 * 60
+
+SAVE_DELAY = float(os.environ.get("EVENT_INDEX_SAVE_DELAY", 1.0))
+
+
+def _minutes(dt: datetime) -> int:
+    return dt.hour * 60 + dt.minute
+
+
+def _span(start: int, end: int):
+    # 结束于零点（23:00 → 00:00）视为持续到当天结束；其他结束不晚于开始的（零时长、解析错的）
+    # 按零时长处理，add 时丢弃、查询时不算重叠，不会把当天余下的时间都占住
+    if end == 0 and start > 0:
+        return start, DAY_MINUTES
+    return start, max(start, end)
+
+
+class DayIndex:
+    """单日区间表：区间以当天零点起的分钟数表示"""
+
+    def __init__(self, fetched_at: float = 0.0):
+        self.fetched_at = fetched_at
+        self.starts = []
+        self.events = []      # (start, end, title)，与 starts 同序
+        self._max_end = []    # _max_end[i] = max(end for events[0..i])
+
+    def _rebuild(self):
+        self._max_end = []
+        m = -1
+        for _, end, _ in self.events:
+            m = max(m, end)
+            self._max_end.append(m)
+
+    def add(self, start: int, end: int, title: str = ""):
+        start, end = _span(start, end)
+        if end <= start:
+            return
+        i = bisect.bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.events.insert(i, (start, end, title))
+        self._rebuild()
+
+    def overlaps(self, start: int, end: int) -> bool:
+        """是否存在 s < end 且 e > start 的事件"""
+        start, end = _span(start, end)
+        if end <= start:
+            return False
+        i = bisect.bisect_left(self.starts, end)
+        return i > 0 and self._max_end[i - 1] > start
+
+    def to_json(self) -> dict:
+        return {"fetched_at": self.fetched_at, "events": [list(e) for e in self.events]}
+
+    @classmethod
+    def from_json(cls, data: dict) -> "DayIndex":
+        day = cls(data.get("fetched_at", 0.0))
+        day.events = sorted(tuple(e) for e in data.get("events", []))
+        day.starts = [e[0] for e in day.events]
+        day._rebuild()
+        return day
+
+
+class EventIndex:
+    def __init__(
+        self,
+        path: Path = INDEX_PATH,
+        ttl: float = 300.0,
+        max_age: float = 3600.0,
+    ):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_age = max_age
+        self._days = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._save_handle = None
+        self._writes = 0
+        self._added = {}  # 日期 → 最近一次 add_event 时的写入序号
+        self.load()
+
+    # -------------------------
+    # 查询
+    # -------------------------
+    def freshness(self, day: date_cls) -> str:
+        entry = self._days.get(day.isoformat())
+        if entry is None:
+            return MISSING
+        age = time.time() - entry.fetched_at
+        if age <= self.ttl:
+            return FRESH
+        if age <= self.max_age:
+            return STALE
+        return EXPIRED
+
+    def overlaps(self, day: date_cls, start_dt: datetime, end_dt: datetime) -> bool:
+        entry = self._days.get(day.isoformat())
+        if entry is None:
+            return False
+        return entry.overlaps(_minutes(start_dt), _minutes(end_dt))
+
+    def overlaps_many(self, intervals) -> list:
+        """一组 (start_dt, end_dt)（如重复日程的全部实例）→ 与输入同序的 [bool]；每天只查一次条目"""
+        entries = {}
+        out = []
+        for start_dt, end_dt in intervals:
+            key = start_dt.date().isoformat()
+            if key not in entries:
+                entries[key] = self._days.get(key)
+            entry = entries[key]
+            out.append(entry is not None and entry.overlaps(_minutes(start_dt), _minutes(end_dt)))
+        return out
+
+    def events(self, day: date_cls) -> list:
+        entry = self._days.get(day.isoformat())
+        return list(entry.events) if entry else []
+
+    # -------------------------
+    # 写入
+    # -------------------------
+    def write_token(self) -> int:
+        """抓取开始前取一次，写回时作为 since 传给 replace_day(s)"""
+        return self._writes
+
+    def _outdated(self, key: str, since) -> bool:
+        """since 之后当天有过 add_event：抓取结果可能不含新事件，丢弃"""
+        if since is None or self._added.get(key, 0) <= since:
+            return False
+        log.debug("抓取开始后 %s 有新写入，丢弃这次抓取结果", key)
+        return True
+
+    def replace_day(self, day: date_cls, intervals, since: int = None):
+        """
+        用一次完整抓取的结果覆盖当天数据；intervals: [(start_dt, end_dt, title)]。
+        since：抓取开始前的 write_token()，之后当天有 add_event 时不覆盖
+        """
+        if self._outdated(day.isoformat(), since):
+            return
+        entry = DayIndex(time.time())
+        for s, e, title in intervals:
+            entry.add(_minutes(s), _minutes(e), title)
+        with self._lock:
+            self._days[day.isoformat()] = entry
+        self.save()
+
+    def replace_days(self, days: dict, since: int = None):
+        """一次范围抓取覆盖多天：{date: [(start_dt, end_dt, title)]}，只写一次文件；since 同 replace_day"""
+        now = time.time()
+        entries = {}
+        for day, intervals in days.items():
+            if self._outdated(day.isoformat(), since):
+                continue
+            entry = DayIndex(now)
+            for s, e, title in intervals:
+                entry.add(_minutes(s), _minutes(e), title)
+            entries[day.isoformat()] = entry
+        with self._lock:
+            self._days.update(entries)
+        self.save()
+
+    def add_event(self, start_dt: datetime, end_dt: datetime, title: str = ""):
+        """create_event 成功后调用；当天还没有抓取过时不建条目（避免把不完整数据当成 fresh）"""
+        key = start_dt.date().isoformat()
+        # 没有条目也要记下：进行中的抓取写回时据此丢弃结果
+        self._writes += 1
+        self._added[key] = self._writes
+        entry = self._days.get(key)
+        if entry is None:
+            return
+        entry.add(_minutes(start_dt), _minutes(end_dt), title)
+        self.save()
+
+    # -------------------------
+    # 持久化
+    # -------------------------
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        self._days = {k: DayIndex.from_json(v) for k, v in data.items()}
+
+    def save(self):
+        """
+        记下有改动。在事件循环里调用时，SAVE_DELAY 秒内的多次改动合并成一次写入，
+        并放到线程池里写文件；没有事件循环（脚本 / 测试）时直接写
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if self._save_handle is None:
+            self._save_handle = loop.call_later(SAVE_DELAY, self._save_in_thread)
+
+    def _save_in_thread(self):
+        self._save_handle = None
+        # 快照在事件循环线程里取（DayIndex 只在这里修改），序列化和写文件交给线程
+        data = self._snapshot()
+        asyncio.get_running_loop().run_in_executor(None, self._write, data)
+
+    def flush(self):
+        """立即写入（退出时调用，丢掉还没到时间的合并写入）"""
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        self._write(self._snapshot())
+
+    def _snapshot(self) -> dict:
+        today = date_cls.today().isoformat()
+        with self._lock:
+            for k in [k for k in self._days if k < today]:
+                del self._days[k]
+            for k in [k for k in self._added if k < today]:
+                del self._added[k]
+            return {k: v.to_json() for k, v in self._days.items()}
+
+    def _write(self, data: dict):
+        with self._write_lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+
+
+event_index = EventIndex(
+    ttl=float(os.environ.get("EVENT_INDEX_TTL", 300)),
+    max_age=float(os.environ.get("EVENT_INDEX_MAX_AGE", 3600)),
+)
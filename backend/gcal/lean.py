@@ -0,0 +1,140 @@
+# backend/gcal/lean.py
+# 精简页面模式（BROWSER_LEAN=1 开启）与每个页面的网络流量统计
+#
+# 精简模式：
+#   - 不加载图片（Chromium 启动参数），字体 / 媒体文件与已知第三方域名（统计、广告、头像）直接拦截
+#   - 注入样式关闭 CSS 动画 / 过渡，点击前不必等元素动画结束
+# 拦截用 CDP 的 Network.setBlockedURLs 而不是 page.route：Playwright 开启路由后会禁用 HTTP 缓存，
+# 而脚本 / 样式表这些静态资源正需要留在（持久化 profile 的）缓存里。
+#
+# 流量统计不论是否精简都开启：每个页面一个 CDP 会话，累计请求数 / 传输字节 / 命中缓存 / 被拦截数，
+# 页面池据此给每次操作记上字节数（StepTrace.count），用于对比精简前后的差别。
+
+import json
+import logging
+import os
+from dataclasses import dataclass
+
+log = logging.getLogger(__name__)
+
+LEAN_MODE = os.environ.get("BROWSER_LEAN", "0") == "1"
+
+# 启动参数：整个浏览器不加载图片
+LEAN_LAUNCH_ARGS = ["--blink-settings=imagesEnabled=false"]
+
+BLOCKED_URL_PATTERNS = [
+    # 字体 / 媒体
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*.mp4", "*.webm", "*.mp3", "*.ogg",
+    # 统计 / 广告 / 日志上报
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*play.google.com/log*",
+    "*csp.withgoogle.com*",
+    # 字体服务、头像与顶栏（One Google bar）
+    "*fonts.googleapis.com*",
+    "*fonts.gstatic.com*",
+    "*googleusercontent.com*",
+    "*ogs.google.com*",
+]
+
+NO_ANIMATION_CSS = """
+*, *::before, *::after {
+  animation-duration: 0s !important;
+  animation-delay: 0s !important;
+  transition-duration: 0s !important;
+  transition-delay: 0s !important;
+  scroll-behavior: auto !important;
+}
+"""
+
+# 文档开始解析前就执行，此时可能还没有 <head>，等 DOMContentLoaded 再插入
+_INJECT_STYLE_JS = """
+(css => {
+  const add = () => {
+    const s = document.createElement("style");
+    s.textContent = css;
+    (document.head || document.documentElement).append(s);
+  };
+  if (document.readyState === "loading") document.addEventListener("DOMContentLoaded", add);
+  else add();
+})(%s)
+"""
+
+
+@dataclass
+class NetStats:
+    requests: int = 0
+    bytes: int = 0      # 实际经网络传输的字节（含响应头，命中缓存的不算）
+    cached: int = 0
+    blocked: int = 0
+
+    def to_dict(self) -> dict:
+        return {"requests": self.requests, "bytes": self.bytes, "cached": self.cached, "blocked": self.blocked}
+
+
+_page_stats = {}
+# 所有页面累计，供 /api/metrics 与基准查看
+totals = NetStats()
+
+
+def launch_args(lean: bool = LEAN_MODE) -> list:
+    return list(LEAN_LAUNCH_ARGS) if lean else []
+
+
+def stats_for(page):
+    return _page_stats.get(page)
+
+
+async def prepare_context(context, lean: bool = LEAN_MODE):
+    """context 级别：之后打开 / 整页加载的每个页面都注入关闭动画的样式"""
+    if lean:
+        await context.add_init_script(script=_INJECT_STYLE_JS % json.dumps(NO_ANIMATION_CSS))
+
+
+async def prepare_page(page, lean: bool = LEAN_MODE) -> NetStats:
+    """
+    页面级别：开启流量统计；精简模式下再设置拦截规则。
+    必须在页面加载日历之前调用，已经加载完的页面（如登录检查页）补注入一次样式。
+    """
+    stats = _page_stats.get(page)
+    if stats is not None:
+        return stats
+    stats = _page_stats[page] = NetStats()
+    page.on("close", lambda _: _page_stats.pop(page, None))
+
+    try:
+        cdp = await page.context.new_cdp_session(page)
+    except Exception as e:
+        # 非 Chromium 内核没有 CDP，只能不统计
+        log.debug("无法创建 CDP 会话，跳过流量统计：%r", e)
+        return stats
+
+    def on_response(e):
+        if e.get("response", {}).get("fromDiskCache") or e.get("response", {}).get("fromPrefetchCache"):
+            stats.cached += 1
+            totals.cached += 1
+
+    def on_finished(e):
+        n = int(e.get("encodedDataLength") or 0)
+        stats.requests += 1
+        stats.bytes += n
+        totals.requests += 1
+        totals.bytes += n
+
+    def on_failed(e):
+        if e.get("blockedReason"):
+            stats.blocked += 1
+            totals.blocked += 1
+
+    cdp.on("Network.responseReceived", on_response)
+    cdp.on("Network.loadingFinished", on_finished)
+    cdp.on("Network.loadingFailed", on_failed)
+    await cdp.send("Network.enable")
+
+    if lean:
+        await cdp.send("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        if page.url != "about:blank":
+            await page.add_style_tag(content=NO_ANIMATION_CSS)
+    return stats
@@ -0,0 +1,230 @@
+# backend/gcal/page_pool.py
+# 日历页面池：预先打开若干已加载完成的日历标签页，操作时借出、用完归还
+#
+# - 借出时切换到目标日期的日 / 周 / 月视图：优先用前端路由（pushState + popstate）切换，
+#   失败才整页 goto，省掉每次完整加载 Google Calendar 的开销
+# - 借出前做健康检查；出错的页面、使用次数达到 max_uses 的页面关闭后补新
+# - 池大小即最大并发数，多个请求可以同时各用一个标签页
+# - 每个页面开启流量统计（gcal/lean.py），借出期间的请求数 / 字节记到 trace 上；BROWSER_LEAN=1 时页面走精简模式
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager, nullcontext
+
+from gcal.config import CALENDAR_BASE_URL, CALENDAR_HOME
+from gcal.lean import LEAN_MODE, prepare_page, stats_for
+from gcal.waits import HOUR_ROW_SELECTOR, XHRTracker, wait_view_ready
+from monitor.metrics import metrics
+
+log = logging.getLogger(__name__)
+
+VIEWS = ("day", "week", "month")
+
+
+def view_path(day, view: str = "day") -> str:
+    return f"/calendar/u/0/r/{view}/{day.year}/{day.month}/{day.day}"
+
+
+def view_url(day, view: str = "day") -> str:
+    return f"{CALENDAR_BASE_URL}{view_path(day, view)}"
+
+
+class PoolTimeout(Exception):
+    """等不到空闲页面（只在借出时指定了 timeout 才会出现）"""
+
+
+class CalendarPagePool:
+    def __init__(self, context, size: int = 2, max_uses: int = 50, lean: bool = LEAN_MODE):
+        self.context = context
+        self.size = size
+        self.max_uses = max_uses
+        self.lean = lean
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._uses = {}
+        self._broken = set()
+        self._created = 0
+
+    # -------------------------
+    # 创建 / 预热
+    # -------------------------
+    async def _new_page(self):
+        page = await self.context.new_page()
+        await prepare_page(page, self.lean)
+        t0 = time.perf_counter()
+        await page.goto(CALENDAR_HOME, wait_until="domcontentloaded")
+        await page.wait_for_selector(HOUR_ROW_SELECTOR, timeout=30000)
+        metrics.observe("browser_page_load_seconds", time.perf_counter() - t0)
+        self._uses[page] = 0
+        return page
+
+    async def adopt(self, page):
+        """把已经停在日历主界面的页面（如登录检查用的页面）直接放进池里"""
+        await prepare_page(page, self.lean)
+        self._uses[page] = 0
+        self._created += 1
+        await self._idle.put(page)
+
+    async def warm_up(self):
+        missing = self.size - self._created
+        if missing <= 0:
+            return
+        self._created += missing
+        pages = await asyncio.gather(
+            *(self._new_page() for _ in range(missing)), return_exceptions=True
+        )
+        for p in pages:
+            if isinstance(p, Exception):
+                log.warning("预热日历页面失败：%r", p)
+                self._created -= 1
+            else:
+                await self._idle.put(p)
+
+    # -------------------------
+    # 健康检查 / 导航
+    # -------------------------
+    async def _healthy(self, page) -> bool:
+        if page.is_closed():
+            return False
+        try:
+            return await asyncio.wait_for(
+                page.evaluate(f"() => !!document.querySelector('{HOUR_ROW_SELECTOR}, [data-datekey]')"),
+                timeout=2,
+            )
+        except Exception:
+            return False
+
+    async def _navigate(self, page, day, view: str = "day"):
+        """切到目标日期的日 / 周 / 月视图：前端路由优先，失败再整页加载"""
+        # 关掉可能残留的弹窗
+        await page.keyboard.press("Escape")
+
+        path = view_path(day, view)
+        async with XHRTracker(page) as net:
+            try:
+                await page.evaluate(
+                    """
+                    (path) => {
+                        if (location.pathname !== path) {
+                            history.pushState({}, "", path);
+                            dispatchEvent(new PopStateEvent("popstate", { state: {} }));
+                        }
+                    }
+                    """,
+                    path,
+                )
+                await page.wait_for_function(
+                    "(path) => location.pathname === path", arg=path, timeout=2000
+                )
+                await wait_view_ready(page, view, timeout=3000)
+            except Exception:
+                log.info("前端路由切换失败，整页加载：%s", path)
+                await page.goto(view_url(day, view), wait_until="domcontentloaded")
+                await wait_view_ready(page, view, timeout=30000)
+
+            # 视图内事件数据的请求结束后，事件块才完整
+            await net.idle(timeout=3000)
+
+    # -------------------------
+    # 借出 / 归还
+    # -------------------------
+    async def _acquire(self, timeout: float = None):
+        """timeout：等空闲页面最多多少秒（None 为一直等），超时抛 PoolTimeout"""
+        if self._idle.empty() and self._created < self.size:
+            self._created += 1
+            try:
+                return await self._new_page()
+            except Exception:
+                self._created -= 1
+                raise
+
+        try:
+            page = await asyncio.wait_for(self._idle.get(), timeout)
+        except asyncio.TimeoutError:
+            raise PoolTimeout(f"{timeout}s 内没有空闲的日历页面") from None
+        if await self._healthy(page):
+            return page
+
+        log.info("日历页面不健康，重新创建")
+        await self._discard(page)
+        self._created += 1
+        try:
+            return await self._new_page()
+        except Exception:
+            self._created -= 1
+            raise
+
+    async def _discard(self, page):
+        self._uses.pop(page, None)
+        self._broken.discard(page)
+        self._created -= 1
+        if not page.is_closed():
+            try:
+                await page.close()
+            except Exception:
+                pass
+
+    def available(self) -> int:
+        """现在不用等待就能借出的页面数（空闲的 + 还能新建的）"""
+        return self._idle.qsize() + max(0, self.size - self._created)
+
+    def invalidate(self, page):
+        """操作失败后调用：页面归还时直接关闭并补新"""
+        self._broken.add(page)
+
+    async def _release(self, page):
+        self._uses[page] = self._uses.get(page, 0) + 1
+        if page in self._broken or self._uses[page] >= self.max_uses or page.is_closed():
+            await self._discard(page)
+            # 后台补一个新页面，下一个请求不必等待加载
+            asyncio.create_task(self.warm_up())
+            return
+        await self._idle.put(page)
+
+    @asynccontextmanager
+    async def page(self, day=None, trace=None, view: str = "day", timeout: float = None):
+        """
+        借出一个页面；传入 day 时先切换到该日期所在的视图（默认日视图）。trace 用于记录借出 / 导航耗时。
+        timeout：等待空闲页面的上限（秒），超时抛 PoolTimeout；默认一直等
+        """
+        async with trace.step("checkout") if trace else nullcontext():
+            page = await self._acquire(timeout)
+        stats = stats_for(page)
+        r0, b0 = (stats.requests, stats.bytes) if stats else (0, 0)
+        try:
+            if day is not None:
+                async with trace.step("navigate") if trace else nullcontext():
+                    await self._navigate(page, day, view)
+        except Exception:
+            self.invalidate(page)
+            await self._release(page)
+            raise
+
+        try:
+            yield page
+        except Exception:
+            self.invalidate(page)
+            raise
+        finally:
+            if trace and stats:
+                trace.count("requests", stats.requests - r0)
+                trace.count("bytes", stats.bytes - b0)
+            await self._release(page)
+
+    async def close(self):
+        while not self._idle.empty():
+            page = self._idle.get_nowait()
+            if not page.is_closed():
+                await page.close()
+        self._uses.clear()
+        self._created = 0
+
+
+def create_page_pool(context, lean: bool = LEAN_MODE) -> CalendarPagePool:
+    return CalendarPagePool(
+        context,
+        size=int(os.environ.get("CALENDAR_POOL_SIZE", 2)),
+        max_uses=int(os.environ.get("CALENDAR_POOL_MAX_USES", 50)),
+        lean=lean,
+    )
@@ -0,0 +1,335 @@
+# backend/gcal/shards.py
+# 浏览器分片：N 个无头 Chromium 进程，各自用保存的登录状态（storage_state）建 context 和页面池
+#
+# - 首次运行还没有登录状态时，才打开有界面的持久化浏览器完成人工登录（在单独的线程里，
+#   等待终端回车不会卡住事件循环），随后导出 storage_state
+# - 运行期间每 STORAGE_STATE_REFRESH 秒从健康分片重新导出一次 storage_state，cookie 续期后重启也能用
+# - 请求路由到当前在途操作最少的分片；同一日历的索引由所有分片共享
+# - 分片启动失败或浏览器进程崩溃 / 断开后自动重启（指数退避），期间请求只会落到其他分片
+# - BROWSER_LEAN=1 时分片走精简模式（gcal/lean.py）；非持久化 context 的 HTTP 缓存在进程存活期间有效
+
+import asyncio
+import logging
+import os
+from contextlib import AsyncExitStack, asynccontextmanager
+from pathlib import Path
+
+from gcal.calendar_ops import CalendarOperator
+from gcal.config import CALENDAR_BASE_URL, CALENDAR_HOME
+from gcal.event_index import event_index
+from gcal.lean import launch_args, prepare_context, prepare_page
+from gcal.page_pool import create_page_pool
+from gcal.waits import HOUR_ROW_SELECTOR
+
+log = logging.getLogger(__name__)
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+STORAGE_STATE_PATH = BACKEND_DIR / "playwright_storage_state.json"
+
+BROWSER_ARGS = ["--disable-blink-features=AutomationControlled", "--disable-infobars"]
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+RESTART_BACKOFF_MAX = 30.0
+STORAGE_STATE_REFRESH = float(os.environ.get("STORAGE_STATE_REFRESH", 3600))
+
+
+class LoginExpiredError(RuntimeError):
+    pass
+
+
+class BrowserShard:
+    def __init__(self, shard_id: int):
+        self.id = shard_id
+        self.browser = None
+        self.context = None
+        self.pool = None
+        self.operator = None
+        self.inflight = 0
+        self.healthy = False
+        self.restarts = 0
+        self.served = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "id": self.id,
+            "healthy": self.healthy,
+            "inflight": self.inflight,
+            "served": self.served,
+            "restarts": self.restarts,
+        }
+
+
+class ShardManager:
+    def __init__(
+        self,
+        shards: int = 1,
+        headless: bool = True,
+        storage_state: Path = STORAGE_STATE_PATH,
+        index=event_index,
+    ):
+        self.headless = headless
+        self.storage_state = Path(storage_state)
+        self.index = index
+        self.shards = [BrowserShard(i) for i in range(max(1, shards))]
+        self._pw = None
+        self._started = False
+        self._start_lock = asyncio.Lock()
+        self._available = asyncio.Event()
+        self._closing = False
+        self._tasks = set()  # 重启 / 定期导出登录状态等后台任务
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    # -------------------------
+    # 启动 / 登录
+    # -------------------------
+    async def start(self):
+        async with self._start_lock:
+            if self._started:
+                return
+            if not self.storage_state.exists():
+                await self._login()
+
+            from playwright.async_api import async_playwright
+
+            self._pw = await async_playwright().start()
+            results = await asyncio.gather(
+                *(self._launch(s) for s in self.shards), return_exceptions=True
+            )
+            errors = [r for r in results if isinstance(r, Exception)]
+            if len(errors) == len(self.shards):
+                await self._pw.stop()
+                self._pw = None
+                raise errors[0]
+            for shard, r in zip(self.shards, results):
+                if isinstance(r, Exception):
+                    # 与崩溃走同一条退避重启路径；登录失效的 _restart 会直接放弃
+                    log.error("浏览器分片 %d 启动失败：%r", shard.id, r)
+                    self._spawn(self._restart(shard))
+            self._spawn(self._refresh_storage_state())
+            self._started = True
+
+    async def _login(self):
+        """
+        没有保存的登录状态：用有界面的持久化浏览器人工登录一次，导出 storage_state。
+        登录流程要在终端等回车（input），放到单独的线程和事件循环里跑
+        """
+        from gcal.browser import PlaywrightManager
+
+        log.info("未找到登录状态 %s，打开浏览器进行首次登录", self.storage_state)
+
+        async def login():
+            manager = PlaywrightManager()
+            try:
+                context = await manager.launch(headful=True)
+                await context.storage_state(path=str(self.storage_state))
+            finally:
+                await manager.close()
+
+        await asyncio.to_thread(asyncio.run, login())
+        log.info("登录状态已保存：%s", self.storage_state)
+
+    async def _refresh_storage_state(self):
+        """定期从任一健康分片导出登录状态（先写临时文件再替换，中途失败不会留下半个文件）"""
+        tmp = self.storage_state.with_suffix(".tmp")
+        while not self._closing:
+            await asyncio.sleep(STORAGE_STATE_REFRESH)
+            shard = next((s for s in self.shards if s.healthy), None)
+            if shard is None:
+                continue
+            try:
+                await shard.context.storage_state(path=str(tmp))
+                os.replace(tmp, self.storage_state)
+                log.debug("登录状态已从分片 %d 重新导出", shard.id)
+            except Exception as e:
+                log.warning("导出登录状态失败：%r", e)
+
+    async def _launch(self, shard: BrowserShard):
+        shard.browser = await self._pw.chromium.launch(
+            headless=self.headless, args=BROWSER_ARGS + launch_args()
+        )
+        shard.browser.on("disconnected", lambda _: self._on_crash(shard))
+
+        try:
+            shard.context = await shard.browser.new_context(
+                storage_state=str(self.storage_state),
+                viewport={"width": 1280, "height": 900},
+                user_agent=USER_AGENT,
+                locale="zh-CN",
+            )
+            await prepare_context(shard.context)
+            # 第一个页面顺便确认登录状态仍然有效
+            page = await shard.context.new_page()
+            await prepare_page(page)
+            await page.goto(CALENDAR_HOME, wait_until="domcontentloaded")
+            await page.wait_for_function(
+                """
+                ([sel, prefix]) => !location.href.startsWith(prefix)
+                    || document.querySelectorAll(sel).length >= 24
+                """,
+                arg=[HOUR_ROW_SELECTOR, f"{CALENDAR_BASE_URL}/calendar"],
+                timeout=30000,
+            )
+            if not page.url.startswith(f"{CALENDAR_BASE_URL}/calendar"):
+                raise LoginExpiredError(f"登录状态已失效，删除 {self.storage_state} 后重启服务重新登录")
+        except Exception:
+            if shard.browser.is_connected():
+                await shard.browser.close()
+            raise
+
+        shard.pool = create_page_pool(shard.context)
+        await shard.pool.adopt(page)
+        asyncio.create_task(shard.pool.warm_up())
+        shard.operator = CalendarOperator(shard.context, pool=shard.pool, index=self.index)
+        shard.healthy = True
+        self._available.set()
+        log.info("浏览器分片 %d 已就绪", shard.id)
+
+    # -------------------------
+    # 崩溃重启
+    # -------------------------
+    def _on_crash(self, shard: BrowserShard):
+        if self._closing or not shard.healthy:
+            return
+        log.error("浏览器分片 %d 断开，准备重启", shard.id)
+        shard.healthy = False
+        if not any(s.healthy for s in self.shards):
+            self._available.clear()
+        self._spawn(self._restart(shard))
+
+    async def _restart(self, shard: BrowserShard):
+        delay = 1.0
+        while not self._closing:
+            shard.restarts += 1
+            try:
+                await self._launch(shard)
+                return
+            except LoginExpiredError as e:
+                log.error("浏览器分片 %d 无法重启：%s", shard.id, e)
+                return
+            except Exception as e:
+                log.warning("浏览器分片 %d 重启失败（%.0fs 后重试）：%r", shard.id, delay, e)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RESTART_BACKOFF_MAX)
+
+    # -------------------------
+    # 路由
+    # -------------------------
+    async def _pick(self, timeout: float = 30.0) -> BrowserShard:
+        """在途操作最少的健康分片；相同负载时选最久未用的"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            healthy = [s for s in self.shards if s.healthy]
+            if healthy:
+                return min(healthy, key=lambda s: (s.inflight, s.served))
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise RuntimeError("没有可用的浏览器分片")
+            self._available.clear()
+            try:
+                await asyncio.wait_for(self._available.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    @asynccontextmanager
+    async def operator(self):
+        """借用最空闲分片的 CalendarOperator"""
+        await self.start()
+        shard = await self._pick()
+        shard.inflight += 1
+        shard.served += 1
+        try:
+            yield shard.operator
+        finally:
+            shard.inflight -= 1
+
+    def snapshot(self) -> list:
+        return [s.snapshot() for s in self.shards]
+
+    async def close(self):
+        self._closing = True
+        for task in list(self._tasks):
+            task.cancel()
+        for s in self.shards:
+            s.healthy = False
+            if s.pool:
+                await s.pool.close()
+            if s.browser and s.browser.is_connected():
+                await s.browser.close()
+        if self._pw:
+            await self._pw.stop()
+            self._pw = None
+        self._started = False
+
+
+class ShardedCalendar:
+    """
+    与 CalendarOperator 相同的调用方式，每次调用路由到最空闲的分片。
+    只读索引的同步方法（suggest_slots / busy_intervals）直接用任一分片的操作器，索引是共享的。
+    """
+
+    def __init__(self, manager: ShardManager):
+        self.manager = manager
+        self.index = manager.index
+        # 只读本地索引的操作器，没有页面池
+        self._reader = CalendarOperator.reader(self.index)
+
+    async def _call(self, method: str, *args, **kwargs):
+        async with self.manager.operator() as op:
+            return await getattr(op, method)(*args, **kwargs)
+
+    async def check_conflict(self, *args, **kwargs):
+        return await self._call("check_conflict", *args, **kwargs)
+
+    async def check_conflicts(self, *args, **kwargs):
+        return await self._call("check_conflicts", *args, **kwargs)
+
+    async def create_event(self, *args, **kwargs):
+        return await self._call("create_event", *args, **kwargs)
+
+    async def create_events(self, *args, **kwargs):
+        return await self._call("create_events", *args, **kwargs)
+
+    async def find_free_slots(self, *args, **kwargs):
+        return await self._call("find_free_slots", *args, **kwargs)
+
+    async def prepare_create(self, *args, **kwargs):
+        """预先打开的弹窗在某个分片的页面上：该分片一直记为在途，直到弹窗提交或取消"""
+        stack = AsyncExitStack()
+        op = await stack.enter_async_context(self.manager.operator())
+        try:
+            prepared = await op.prepare_create(*args, **kwargs)
+        except BaseException:
+            await stack.aclose()
+            raise
+        if prepared is None:
+            await stack.aclose()
+        else:
+            prepared.on_release(stack.aclose)
+        return prepared
+
+    async def scrape_range_events(self, *args, **kwargs):
+        return await self._call("scrape_range_events", *args, **kwargs)
+
+    async def scrape_day_events(self, *args, **kwargs):
+        return await self._call("scrape_day_events", *args, **kwargs)
+
+    def suggest_slots(self, *args, **kwargs):
+        return self._reader.suggest_slots(*args, **kwargs)
+
+    def busy_intervals(self, *args, **kwargs):
+        return self._reader.busy_intervals(*args, **kwargs)
+
+
+shard_manager = ShardManager(
+    shards=int(os.environ.get("BROWSER_SHARDS", 1)),
+    headless=os.environ.get("BROWSER_HEADLESS", "1") != "0",
+)
@@ -0,0 +1,122 @@
+# backend/gcal/slots.py
+# 空闲时段计算：把忙碌区间排序合并后一次扫描，得出工作时间内的空档
+
+import os
+from itertools import islice
+from datetime import date as date_cls, datetime, time as time_cls, timedelta
+
+
+def _parse_hm(s: str) -> time_cls:
+    h, m = s.split(":")
+    return time_cls(int(h), int(m))
+
+
+# 工作时间（每天）
+WORK_START = _parse_hm(os.environ.get("WORK_DAY_START", "09:00"))
+WORK_END = _parse_hm(os.environ.get("WORK_DAY_END", "18:00"))
+
+
+def merge_intervals(intervals) -> list:
+    """[(start, end)] → 按开始时间排序并合并重叠 / 相接的区间"""
+    merged = []
+    for s, e in sorted(intervals):
+        if merged and s <= merged[-1][1]:
+            if e > merged[-1][1]:
+                merged[-1][1] = e
+        else:
+            merged.append([s, e])
+    return [(s, e) for s, e in merged]
+
+
+def free_windows(busy, window_start: datetime, window_end: datetime) -> list:
+    """busy 须已合并；返回 [window_start, window_end) 内的空档"""
+    gaps = []
+    cursor = window_start
+    for s, e in busy:
+        if e <= cursor:
+            continue
+        if s >= window_end:
+            break
+        if s > cursor:
+            gaps.append((cursor, s))
+        cursor = max(cursor, e)
+        if cursor >= window_end:
+            break
+    if cursor < window_end:
+        gaps.append((cursor, window_end))
+    return gaps
+
+
+def find_free_slots(
+    busy,
+    start_date: date_cls,
+    end_date: date_cls,
+    duration: timedelta,
+    work_start: time_cls = WORK_START,
+    work_end: time_cls = WORK_END,
+) -> list:
+    """
+    busy: [(start_dt, end_dt)]（可跨多天、未排序）
+    返回 start_date ~ end_date 每天工作时间内、长度不少于 duration 的空档 [(start_dt, end_dt)]
+    """
+    merged = merge_intervals(busy)
+    slots = []
+    i = 0
+    day = start_date
+    while day <= end_date:
+        w0 = datetime.combine(day, work_start)
+        w1 = datetime.combine(day, work_end)
+        # 跳过当天窗口之前已结束的忙碌区间（merged 有序，i 只前进不后退）
+        while i < len(merged) and merged[i][1] <= w0:
+            i += 1
+        for s, e in free_windows(islice(merged, i, None), w0, w1):
+            if e - s >= duration:
+                slots.append((s, e))
+        day += timedelta(days=1)
+    return slots
+
+
+# 候选开始时间的对齐粒度（分钟）
+SLOT_STEP = int(os.environ.get("SLOT_STEP_MINUTES", 30))
+
+
+def suggest_slots(
+    busy,
+    requested_start: datetime,
+    duration: timedelta,
+    n: int = 3,
+    work_start: time_cls = WORK_START,
+    work_end: time_cls = WORK_END,
+    step: int = SLOT_STEP,
+    now: datetime = None,
+) -> list:
+    """
+    在 requested_start 当天的工作时间内，找离原定开始时间最近的 n 个可用时段 [(start, end)]。
+    候选开始时间取各空档内按 step 分钟对齐的时刻，外加每个空档里最贴近原定时间的时刻。
+    已经过去的开始时间（早于 now，默认当前时间）不给；时长不为正时不给任何候选。
+    """
+    if duration <= timedelta(0):
+        return []
+    now = datetime.now() if now is None else now
+    day = requested_start.date()
+    w0 = datetime.combine(day, work_start)
+    w1 = datetime.combine(day, work_end)
+    step_td = timedelta(minutes=step)
+
+    candidates = set()
+    for s, e in free_windows(merge_intervals(busy), w0, w1):
+        last = e - duration
+        if last < s:
+            continue
+        # 空档内最贴近原定时间的开始时刻
+        candidates.add(min(max(requested_start, s), last))
+        # 对齐到 step 的开始时刻
+        offset = (s - w0) % step_td
+        t = s if not offset else s + (step_td - offset)
+        while t <= last:
+            candidates.add(t)
+            t += step_td
+
+    # 距离相同时优先较早的时段
+    ranked = sorted((t for t in candidates if t >= now), key=lambda t: (abs(t - requested_start), t))
+    return [(t, t + duration) for t in ranked[:n]]
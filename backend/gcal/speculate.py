@@ -0,0 +1,100 @@
+# backend/gcal/speculate.py
+# 流式识别时的推测执行：部分识别结果里一出现日期，就开始做这一天的准备工作
+#
+#   - 预抓取当天事件写入索引（write_queue.prefetch，与排队中的其他请求共用一次抓取）
+#   - 再借一个页面切到当天并打开新建弹窗（PreparedCreate），说完后只剩填写 + 保存
+# 用户还在说话、识别还没结束时这些就在进行，说完后只剩识别收尾和填写保存。
+# 页面池空闲页面不足时不打开弹窗（见 calendar_ops.PREPARE_MIN_IDLE），只做预抓取。
+# 后续的部分结果换了日期就取消重来；最终解析的日期不一致（或没有解析出日程）时全部取消。
+# SPECULATE=0 关闭。
+
+import asyncio
+import logging
+import os
+
+from gcal.write_queue import write_queue
+from monitor.metrics import metrics
+from nlp.parser_v2 import partial_day
+
+log = logging.getLogger(__name__)
+
+SPECULATE_ENABLED = os.environ.get("SPECULATE", "1") != "0"
+
+
+class Speculation:
+    """一次流式识别会话内的推测工作；get_operator 为返回日历操作器的协程函数"""
+
+    def __init__(self, get_operator, queue=write_queue):
+        self.get_operator = get_operator
+        self.queue = queue
+        self.day = None
+        self._task = None
+
+    # -------------------------
+    # 部分识别结果
+    # -------------------------
+    def on_partial(self, text: str):
+        found = partial_day(text) if text else None
+        if found is None:
+            return
+        day, hour = found
+        if day == self.day:
+            return
+        if self.day is not None:
+            log.debug("推测日期变化 %s → %s，取消之前的准备", self.day, day)
+            metrics.inc("speculation_total", result="restarted")
+            asyncio.create_task(self._abandon(self._task))
+        self.day = day
+        self._task = asyncio.create_task(self._run(day, hour))
+
+    async def _run(self, day, hour):
+        """
+        先预抓取当天事件，再借页面打开弹窗；返回 PreparedCreate（页面池忙时为 None）。
+        两步串行：手里拿着一个页面再去等另一个页面，页面池小（或被其他会话占满）时会互相等死
+        """
+        op = await self.get_operator()
+        await self.queue.prefetch(op, day)
+        return await op.prepare_create(day, hour if hour is not None else 9)
+
+    @staticmethod
+    async def _abandon(task):
+        task.cancel()
+        try:
+            prepared = await task
+        except BaseException:
+            return
+        if prepared is not None:
+            await prepared.cancel()
+
+    # -------------------------
+    # 最终结果
+    # -------------------------
+    async def take(self, day):
+        """
+        最终解析出的日期与推测一致：等准备工作完成，交出打开好的弹窗（可能为 None）；
+        不一致：取消推测，返回 None
+        """
+        if self._task is None:
+            return None
+        if day != self.day:
+            metrics.inc("speculation_total", result="miss")
+            task, self._task = self._task, None
+            await self._abandon(task)
+            return None
+
+        task, self._task = self._task, None
+        try:
+            prepared = await task
+        except Exception as e:
+            log.warning("推测准备失败：%r", e)
+            prepared = None
+        metrics.inc("speculation_total", result="hit")
+        return prepared
+
+    async def cancel(self):
+        """会话结束时调用：没有被 take 走的准备工作全部撤销"""
+        task, self._task = self._task, None
+        self.day = None
+        if task is not None:
+            metrics.inc("speculation_total", result="cancelled")
+            await self._abandon(task)
@@ -0,0 +1,108 @@
+# backend/gcal/trace.py
+# 浏览器自动化的分步计时：记录每一步等待了多久、是否超时，便于定位耗时
+# 另有按操作累计的计数（页面池记的请求数 / 传输字节），结束时计入 browser_<name>_total
+
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from monitor.metrics import metrics
+
+log = logging.getLogger(__name__)
+
+# 最近的若干次操作记录，供 /api/traces 查看
+recent_traces = deque(maxlen=100)
+
+
+class StepTrace:
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.steps = []
+        self.counters = {}
+        self._t0 = time.perf_counter()
+        self._t1 = None
+        self.ok = None
+
+    @asynccontextmanager
+    async def step(self, name: str):
+        t0 = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except Exception as e:
+            status = type(e).__name__
+            raise
+        finally:
+            elapsed = time.perf_counter() - t0
+            self.steps.append((name, round(elapsed * 1000, 1), status))
+            metrics.observe("browser_step_seconds", elapsed, operation=self.operation, step=name)
+
+    def count(self, name: str, n: int):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def finish(self, ok: bool):
+        self.ok = ok
+        self._t1 = time.perf_counter()
+        for name, n in self.counters.items():
+            metrics.inc(f"browser_{name}_total", n, operation=self.operation)
+        recent_traces.append(self)
+        log.debug("[%s] %s", self.operation, self.summary())
+
+    @property
+    def total_ms(self) -> float:
+        return round(((self._t1 or time.perf_counter()) - self._t0) * 1000, 1)
+
+    def summary(self) -> str:
+        parts = [f"{name} {ms:.0f}ms" + ("" if st == "ok" else f"({st})") for name, ms, st in self.steps]
+        text = " | ".join(parts) + f" = {self.total_ms:.0f}ms"
+        if self.counters.get("bytes"):
+            text += f" ({self.counters.get('requests', 0)} req, {self.counters['bytes'] / 1024:.1f}KB)"
+        return text
+
+    def to_dict(self) -> dict:
+        return {
+            "operation": self.operation,
+            "ok": self.ok,
+            "total_ms": self.total_ms,
+            "steps": [{"step": n, "ms": ms, "status": st} for n, ms, st in self.steps],
+            "counters": dict(self.counters),
+        }
+
+
+def breakdown() -> dict:
+    """按 操作 → 步骤 汇总最近记录：次数 / 平均 / 最大耗时"""
+    agg = {}
+    for tr in recent_traces:
+        op = agg.setdefault(tr.operation, {})
+        for name, ms, _ in tr.steps:
+            s = op.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            s["count"] += 1
+            s["total_ms"] += ms
+            s["max_ms"] = max(s["max_ms"], ms)
+    for op in agg.values():
+        for s in op.values():
+            s["mean_ms"] = round(s.pop("total_ms") / s["count"], 1)
+    return agg
+
+
+def network_breakdown() -> dict:
+    """按操作汇总最近记录的页面流量：平均 / 最大请求数与字节"""
+    agg = {}
+    for tr in recent_traces:
+        if "bytes" not in tr.counters:
+            continue
+        a = agg.setdefault(tr.operation, {"count": 0, "requests": 0, "bytes": 0, "max_bytes": 0})
+        a["count"] += 1
+        a["requests"] += tr.counters.get("requests", 0)
+        a["bytes"] += tr.counters["bytes"]
+        a["max_bytes"] = max(a["max_bytes"], tr.counters["bytes"])
+    return {
+        op: {
+            "count": a["count"],
+            "mean_requests": round(a["requests"] / a["count"], 1),
+            "mean_bytes": round(a["bytes"] / a["count"]),
+            "max_bytes": a["max_bytes"],
+        }
+        for op, a in agg.items()
+    }
@@ -0,0 +1,117 @@
+# backend/gcal/waits.py
+# 基于条件的等待：替代固定 sleep，页面一就绪就继续
+
+import asyncio
+import re
+
+from gcal.config import CALENDAR_BASE_URL
+
+HOUR_ROW_SELECTOR = "div.XsRa1c"
+
+# 日历数据相关的 XHR（排除长轮询通道，否则永远等不到“空闲”）
+CALENDAR_XHR = re.compile("^" + re.escape(CALENDAR_BASE_URL) + "/calendar/")
+LONG_POLL = re.compile(r"/channel/|/bind\b")
+
+
+async def wait_hour_rows(page, timeout: float = 10000):
+    """日视图 24 个小时行全部渲染完成"""
+    await page.wait_for_function(
+        "(sel) => document.querySelectorAll(sel).length >= 24",
+        arg=HOUR_ROW_SELECTOR,
+        timeout=timeout,
+    )
+
+
+async def wait_view_ready(page, view: str = "day", timeout: float = 10000):
+    """日 / 周视图等小时行，月视图等日期格（至少四周）"""
+    if view == "month":
+        await page.wait_for_function(
+            "() => document.querySelectorAll('[data-datekey]').length >= 28",
+            timeout=timeout,
+        )
+    else:
+        await wait_hour_rows(page, timeout=timeout)
+
+
+class XHRTracker:
+    """
+    跟踪与日历数据相关的 XHR / fetch。须在触发动作之前进入，才能看到动作发出的请求：
+
+        async with XHRTracker(page) as net:
+            await 触发导航 / 点击
+            await net.idle()
+    """
+
+    def __init__(self, page, pattern=CALENDAR_XHR):
+        self.page = page
+        self.pattern = pattern
+        self.inflight = set()
+        self.seen = 0
+        self._changed = asyncio.Event()
+
+    def _relevant(self, req) -> bool:
+        return (
+            req.resource_type in ("xhr", "fetch")
+            and bool(self.pattern.search(req.url))
+            and not LONG_POLL.search(req.url)
+        )
+
+    def _on_request(self, req):
+        if self._relevant(req):
+            self.inflight.add(req)
+            self.seen += 1
+            self._changed.set()
+
+    def _on_done(self, req):
+        if req in self.inflight:
+            self.inflight.discard(req)
+            self._changed.set()
+
+    async def __aenter__(self):
+        self.page.on("request", self._on_request)
+        self.page.on("requestfinished", self._on_done)
+        self.page.on("requestfailed", self._on_done)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.page.remove_listener("request", self._on_request)
+        self.page.remove_listener("requestfinished", self._on_done)
+        self.page.remove_listener("requestfailed", self._on_done)
+
+    async def idle(self, quiet_ms: float = 150, timeout: float = 5000) -> bool:
+        """
+        等待在途请求全部结束，并保持 quiet_ms 毫秒没有新请求。
+        超时不抛异常（页面可能一直有后台请求），返回是否真正等到了空闲。
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout / 1000
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            self._changed.clear()
+            wait = remaining if self.inflight else quiet_ms / 1000
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=min(wait, remaining))
+            except asyncio.TimeoutError:
+                if not self.inflight:
+                    return True
+
+
+async def wait_input_values(page, expected: dict, timeout: float = 2000):
+    """等待输入框的值被页面接受（aria-label → 期望值）"""
+    await page.wait_for_function(
+        """
+        (expected) => Object.entries(expected).every(([label, value]) => {
+            const el = document.querySelector(`div[role='dialog'] input[aria-label="${label}"]`);
+            return el && el.value === value;
+        })
+        """,
+        arg=expected,
+        timeout=timeout,
+    )
+
+
+def is_calendar_save(response) -> bool:
+    req = response.request
+    return req.method == "POST" and bool(CALENDAR_XHR.search(response.url)) and not LONG_POLL.search(response.url)
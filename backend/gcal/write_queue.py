@@ -0,0 +1,121 @@
+# backend/gcal/write_queue.py
+# 按（日历, 日期）分区的写入队列：冲突检测 + 创建作为一个整体串行执行，避免两个请求同时通过检测后重复占用同一时段
+#
+# - 同一天的操作按到达顺序依次执行（asyncio.Lock 按 FIFO 唤醒等待者），不同日期互不阻塞
+# - 排队期间若当天还没有索引，同一天的多个请求共用一次抓取；进入队列后的冲突检测直接查索引
+
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+
+from gcal.config import CALENDAR_ID
+from gcal.event_index import event_index, FRESH, STALE
+from monitor.metrics import metrics, PIPELINE
+
+log = logging.getLogger(__name__)
+
+CONFLICT = "conflict"
+CREATED = "ok"
+FAILED = "error"
+
+
+class _DayLock:
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class WriteQueue:
+    def __init__(self, calendar_id: str = CALENDAR_ID, index=event_index):
+        self.calendar_id = calendar_id
+        self.index = index
+        self._locks = {}    # (日历, 日期) → _DayLock，没有使用者时删除
+        self._scrapes = {}  # (日历, 日期) → 进行中的抓取任务
+        self.stats = {"units": 0, "scrapes": 0, "coalesced_checks": 0}
+
+    # -------------------------
+    # 分区锁
+    # -------------------------
+    @asynccontextmanager
+    async def day(self, day):
+        key = (self.calendar_id, day)
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = _DayLock()
+        entry.users += 1
+        try:
+            async with entry.lock:
+                yield
+        finally:
+            entry.users -= 1
+            if entry.users == 0:
+                self._locks.pop(key, None)
+
+    @asynccontextmanager
+    async def days(self, days):
+        """同时占用多天（批量创建）；按日期顺序加锁，避免互相等待"""
+        async with AsyncExitStack() as stack:
+            for d in sorted(set(days)):
+                await stack.enter_async_context(self.day(d))
+            yield
+
+    # -------------------------
+    # 抓取合并
+    # -------------------------
+    async def prefetch(self, op, day):
+        """当天没有可用索引时抓取一次；同一天排队中的其他请求等待同一个抓取结果"""
+        if self.index.freshness(day) in (FRESH, STALE):
+            return
+        key = (self.calendar_id, day)
+        task = self._scrapes.get(key)
+        if task is None:
+            task = asyncio.ensure_future(op.scrape_range_events(day, day))
+            self._scrapes[key] = task
+            task.add_done_callback(lambda _: self._scrapes.pop(key, None))
+            self.stats["scrapes"] += 1
+        else:
+            self.stats["coalesced_checks"] += 1
+        try:
+            await asyncio.shield(task)
+        except Exception as e:
+            # 抓取失败时由 check_conflict 自行处理（重新抓取或按冲突处理）
+            log.warning("预抓取 %s 失败：%r", day, e)
+
+    # -------------------------
+    # 检测 + 创建
+    # -------------------------
+    async def check_and_create(self, op, title: str, start_dt, end_dt, prepared=None) -> str:
+        """
+        返回 CONFLICT / CREATED / FAILED。
+        prepared：识别过程中提前打开的新建弹窗（gcal.speculate）；日期一致且无冲突时直接在上面填写保存，
+        其他情况都会被取消（关弹窗、还页面）
+        """
+        day = start_dt.date()
+        if prepared is not None and prepared.day != day:
+            await prepared.cancel()
+            prepared = None
+        try:
+            await self.prefetch(op, day)
+
+            t0 = time.perf_counter()
+            async with self.day(day):
+                metrics.observe(PIPELINE, time.perf_counter() - t0, stage="queue_wait")
+                self.stats["units"] += 1
+                with metrics.span("conflict"):
+                    if await op.check_conflict(day, start_dt, end_dt):
+                        return CONFLICT
+                with metrics.span("create"):
+                    if prepared is not None:
+                        ok = await prepared.commit(title, start_dt, end_dt)
+                    else:
+                        ok = await op.create_event(title, start_dt, end_dt)
+                return CREATED if ok else FAILED
+        finally:
+            if prepared is not None:
+                # 冲突 / 异常时弹窗还开着；已提交的 cancel 不做任何事
+                await prepared.cancel()
+
+write_queue = WriteQueue()
@@ -1,32 +1,164 @@
 # backend/main.py
 
 import asyncio
+import logging
 import sys
 import os
-import tempfile
+import re
+import time
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import List, Optional
 
 # 解决 Windows 上的事件循环问题
 if sys.platform.startswith("win"):
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
-from fastapi import FastAPI, UploadFile, File
-from fastapi.responses import JSONResponse
-from fastapi.staticfiles import StaticFiles
+# 启动剖析最先导入，后续各模块的导入耗时都记在它名下
+from monitor.startup import startup_profile
+from monitor.readiness import readiness, IDLE
+from monitor.log import setup_logging
+from monitor.metrics import metrics, PIPELINE
 
-from ffmpeg import input as ffmpeg_input
+setup_logging()
+log = logging.getLogger("main")
+
+with startup_profile.stage("import:fastapi"):
+    from fastapi import FastAPI, UploadFile, File, WebSocket, WebSocketDisconnect, Request
+    from fastapi.responses import JSONResponse, FileResponse, PlainTextResponse
+    from fastapi.staticfiles import StaticFiles
+    from pydantic import BaseModel
 
 # -------------------------
 # 项目相关模块
 # -------------------------
-from gcal.browser import playwright_manager
-from gcal.calendar_ops import CalendarOperator
+with startup_profile.stage("import:gcal"):
+    from gcal.shards import shard_manager, ShardedCalendar
+    from gcal.write_queue import write_queue, CONFLICT, FAILED
+    from gcal.event_index import event_index
+    from gcal.speculate import SPECULATE_ENABLED, Speculation
+    from gcal import lean, trace
+
+with startup_profile.stage("import:speech"):
+    from speech import asr_vosk, tts
+    from speech.asr_pool import asr_pool, ASRBusyError
+    from speech.asr_vosk import ASRResult
+    from speech.audio_decode import AudioDecodeError, decode_to_pcm, ffmpeg_worker
+    from speech.audio_stream import create_stream_decoder
+    from speech.tts import tts_worker, tts_cache
+    from speech.vad import VAD_ENABLED, StreamingVAD
+
+with startup_profile.stage("import:nlp"):
+    from nlp.parser_v2 import parse_schedule_from_text_v2 as parse_schedule_from_text
+    from nlp.parser_v2 import MISSING_TIME_MESSAGE, parse_cache, parse_schedule_items
+    from nlp import recurrence
+    from nlp.confirm import parse_reply, suggestion_store, REJECT
+
+
+# -------------------------
+# 固定提示语（启动时预渲染进 TTS 缓存）
+# -------------------------
+GREETING_TEXT = "您好，我是您的日程助手，你要记录什么日程？"
+SUCCESS_TEXT = "日程已创建成功。"
+FAIL_TEXT = "创建日程失败，请稍后再试。"
+RETRY_TEXT = "我没有听清楚，请再说一次。"
+INVALID_SPAN_TEXT = "结束时间须晚于开始时间且在同一天，请再说一次时间。"
+
+FIXED_PROMPTS = [GREETING_TEXT, SUCCESS_TEXT, FAIL_TEXT, RETRY_TEXT, MISSING_TIME_MESSAGE, INVALID_SPAN_TEXT]
 
-from speech.asr_vosk import transcribe_audio_file
-from speech.tts import synthesize_text_async
-from nlp.parser_v2 import parse_schedule_from_text_v2 as parse_schedule_from_text
 
+def valid_span(start_dt, end_dt) -> bool:
+    """
+    日程须在同一天内且结束晚于开始（索引、日视图按天处理，跨天 / 零时长都不创建）。
+    结束于次日零点算作当天结束：晚上十一点的单点日程默认一小时，正好到 00:00（与 event_index._span 一致）
+    """
+    if end_dt <= start_dt:
+        return False
+    day = start_dt.date()
+    return end_dt.date() == day or end_dt == datetime.combine(day + timedelta(days=1), datetime.min.time())
 
-app = FastAPI()
+
+def tts_audio_url(text: str) -> str:
+    """
+    提交合成任务并立即返回音频 URL（按内容哈希确定，不同文本互不覆盖）。
+    响应不等待合成完成；客户端请求该 URL 时才会等到音频就绪。
+    """
+    job = tts_worker.submit(text)
+    return f"/api/tts/{job.key}"
+
+
+# -------------------------
+# 组件预热（端口绑定后在后台进行）
+# -------------------------
+readiness.register("asr_model")
+readiness.register("tts_engine")
+readiness.register("audio_decoder", required=False)
+# 浏览器首次使用时才启动（可能需要人工登录），不阻塞就绪状态
+readiness.register("browser", required=False, state=IDLE)
+
+
+async def warm_up_component(name: str, fn):
+    try:
+        with readiness.track(name), startup_profile.stage(f"init:{name}"):
+            await asyncio.to_thread(fn)
+    except Exception as e:
+        log.error("组件 %s 预热失败：%r", name, e)
+
+
+def warm_up_asr():
+    asr_vosk.load_model()
+    asr_pool.warm_up()
+
+
+async def warm_up_all():
+    await asyncio.gather(
+        warm_up_component("asr_model", warm_up_asr),
+        warm_up_component("tts_engine", lambda: tts.warm_up(FIXED_PROMPTS)),
+        warm_up_component("audio_decoder", ffmpeg_worker.warm_up),
+    )
+    if readiness.ready:
+        startup_profile.mark_ready()
+    startup_profile.print_report()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # lifespan 启动阶段结束后 uvicorn 才开始监听端口；
+    # 这里只创建后台任务不等待，模型加载不再拖慢启动 / reload
+    warm_task = asyncio.create_task(warm_up_all())
+    yield
+    warm_task.cancel()
+    ffmpeg_worker.close()
+    asr_pool.shutdown()
+    await shard_manager.close()
+    event_index.flush()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+class RequestStartMiddleware:
+    """纯 ASGI 中间件：记下请求到达时刻，供 upload 阶段计时"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            scope.setdefault("state", {})["t0"] = time.perf_counter()
+        await self.app(scope, receive, send)
+
+
+app.add_middleware(RequestStartMiddleware)
+
+# 抓取时才计算的指标
+metrics.gauge("parse_cache_hits", lambda: parse_cache.hits, "Parser cache hits")
+metrics.gauge("parse_cache_misses", lambda: parse_cache.misses, "Parser cache misses")
+metrics.gauge("parse_cache_size", lambda: parse_cache.stats()["size"], "Parser cache entries")
+metrics.gauge("tts_cache_bytes", lambda: tts_cache.total_bytes, "TTS cache size on disk")
+metrics.gauge("browser_network_bytes", lambda: lean.totals.bytes, "Bytes transferred by all calendar pages")
+metrics.gauge("browser_blocked_requests", lambda: lean.totals.blocked, "Requests blocked by lean mode")
 
 
 # -------------------------
@@ -37,8 +169,8 @@ FRONTEND_DIR = os.path.join(BASE_DIR, "frontend")
 BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
 TMP_DIR = os.path.join(BACKEND_DIR, "tmp")
 
-print(">>> FRONTEND_DIR =", FRONTEND_DIR)
-print(">>> TMP_DIR =", TMP_DIR)
+log.debug("FRONTEND_DIR = %s", FRONTEND_DIR)
+log.debug("TMP_DIR = %s", TMP_DIR)
 
 os.makedirs(TMP_DIR, exist_ok=True)
 
@@ -50,23 +182,94 @@ app.mount("/tmp", StaticFiles(directory=TMP_DIR), name="tmp")
 # -------------------------
 # Playwright 全局懒加载
 # -------------------------
+# 首次使用时启动浏览器分片（BROWSER_SHARDS 个无头浏览器，共享保存的登录状态）
 calendar_operator = None
-playwright_context = None
 
 
 async def get_calendar_operator():
-    """懒加载 Playwright BrowserContext + 日历操作器"""
-    global calendar_operator, playwright_context
+    """懒加载浏览器分片 + 日历操作器（每次调用路由到最空闲的分片）"""
+    global calendar_operator
 
     if calendar_operator is None:
-        print(">>> 第一次调用：初始化 Playwright ...")
-        playwright_context = await playwright_manager.launch(headful=True)
-        calendar_operator = CalendarOperator(playwright_context)
-        print(">>> Playwright 初始化完成（复用 Google 登录）")
+        log.info("第一次调用：启动浏览器分片 ...")
+        with readiness.track("browser"):
+            await shard_manager.start()
+        if calendar_operator is None:
+            calendar_operator = ShardedCalendar(shard_manager)
+        log.info("浏览器分片就绪：%d 个", len(shard_manager.shards))
 
     return calendar_operator
 
 
+# -------------------------
+# API: 就绪检查
+# -------------------------
+@app.get("/api/ready")
+async def ready():
+    """各组件预热状态；必需组件全部就绪前返回 503"""
+    is_ready = readiness.ready
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={
+            "ready": is_ready,
+            "components": readiness.snapshot(),
+            "browser_shards": shard_manager.snapshot(),
+            "startup": startup_profile.report(),
+        },
+    )
+
+
+# -------------------------
+# API: 指标（Prometheus 文本格式）
+# -------------------------
+@app.get("/api/metrics")
+async def metrics_endpoint(format: str = "prometheus"):
+    """各阶段耗时直方图 / 分位数与计数器；format=json 时返回便于人工查看的汇总"""
+    if format == "json":
+        return {"histograms": metrics.snapshot(), "parse_cache": parse_cache.stats()}
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+# -------------------------
+# API: 浏览器自动化分步耗时
+# -------------------------
+@app.get("/api/traces")
+async def traces():
+    """最近的日历操作记录（每步耗时 / 状态）及按步骤汇总"""
+    return {
+        "recent": [t.to_dict() for t in trace.recent_traces],
+        "breakdown": trace.breakdown(),
+        "network": trace.network_breakdown(),
+        "network_totals": lean.totals.to_dict(),
+        "lean": lean.LEAN_MODE,
+    }
+
+
+# -------------------------
+# API: 获取合成语音（合成中则等待完成）
+# -------------------------
+TTS_KEY_RE = re.compile(r"^[0-9a-f]{40}$")
+
+
+@app.get("/api/tts/{key}")
+async def get_tts_audio(key: str):
+    if not TTS_KEY_RE.match(key):
+        return JSONResponse(status_code=404, content={"message": "not found"})
+
+    fut = tts_worker.pending(key)
+    if fut is not None:
+        try:
+            await asyncio.wait_for(asyncio.wrap_future(fut), timeout=30)
+        except Exception as e:
+            log.error("语音合成失败：%s", e)
+            return JSONResponse(status_code=500, content={"message": "语音合成失败"})
+
+    path = tts_cache.lookup(key)
+    if path is None:
+        return JSONResponse(status_code=404, content={"message": "not found"})
+    return FileResponse(path, media_type="audio/mpeg")
+
+
 # -------------------------
 # API: 开场白
 # -------------------------
@@ -74,14 +277,11 @@ async def get_calendar_operator():
 async def start():
     await get_calendar_operator()
 
-    text = "您好，我是您的日程助手，你要记录什么日程？"
-    out_file = os.path.join(TMP_DIR, "greeting.mp3")
-
-    synthesize_text_async(text, out_path=out_file)
+    text = GREETING_TEXT
 
     return {
         "text": text,
-        "audio": "/tmp/greeting.mp3",
+        "audio": tts_audio_url(text),
     }
 
 
@@ -89,91 +289,451 @@ async def start():
 # API: 语音识别 → NLP → 创建日程
 # -------------------------
 @app.post("/api/speech")
-async def handle_speech(file: UploadFile = File(...)):
+async def handle_speech(request: Request, file: UploadFile = File(...)):
     op = await get_calendar_operator()
 
     # ----------- 读取语音数据 -----------
     data = await file.read()
+    # 上传耗时：从收到请求到表单解析、读出音频为止
+    t0 = request.scope.get("state", {}).get("t0")
+    if t0 is not None:
+        metrics.observe(PIPELINE, time.perf_counter() - t0, stage="upload")
+
+    # ----------- 内存内解码为 PCM (16000Hz 单声道) -----------
+    # WAV 在进程内直接转换；webm/ogg/mp3 交给提前拉起的 ffmpeg 进程，全程不落盘
+    try:
+        with metrics.span("decode"):
+            pcm = await asyncio.to_thread(decode_to_pcm, data)
+    except AudioDecodeError as e:
+        # 上传的文件损坏 / 不是音频：客户端的问题，不按服务端错误处理
+        log.warning("上传音频无法解码：%s", e)
+        return JSONResponse(
+            status_code=400,
+            content={"status": "error", "message": "没能读出这段录音，请重新录一次。"},
+        )
+
+    # ----------- Vosk 识别（工作池，不阻塞事件循环） -----------
+    try:
+        with metrics.span("asr"):
+            asr = await asr_pool.recognize(pcm)
+    except ASRBusyError as e:
+        log.warning("识别繁忙：%s", e)
+        return JSONResponse(
+            status_code=503,
+            content={"status": "busy", "message": "当前识别请求较多，请稍后再试。"},
+        )
+    log.info("用户语音识别结果：%s", asr)
+
+    return await handle_user_text(op, asr, client_id(request))
 
-    # ----------- 保存临时输入文件(webm/mp3/ogg等格式) -----------
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".webm") as f:
-        f.write(data)
-        temp_input_path = f.name
-
-    # ----------- 转换为 WAV (16000Hz 单声道) -----------
-    wav_path = os.path.join(TMP_DIR, "asr_temp.wav")
 
-    (
-        ffmpeg_input(temp_input_path)
-        .output(wav_path, ac=1, ar=16000, format="wav")
-        .overwrite_output()
-        .run(quiet=True)
-    )
+# -------------------------
+# API: 流式语音识别（WebSocket）
+# -------------------------
+@app.websocket("/ws/speech")
+async def speech_stream(ws: WebSocket):
+    """
+    边说边识别：
+        - 查询参数 format=webm（默认，MediaRecorder 分片）或 format=pcm16（&rate=16000）
+        - 二进制消息：音频分片
+        - 文本消息 "end"：说话结束
+    服务端推送：
+        {"type": "partial" | "segment", "text": ...}  识别中间结果
+        {"type": "endpoint"}                          检测到说完（尾部静音），前端可停止录音
+        {"type": "final", "text": ...}               最终识别文本
+        {"type": "result", ...}                      与 /api/speech 相同的处理结果
+    """
+    await ws.accept()
+
+    fmt = ws.query_params.get("format", "webm")
+    try:
+        rate = int(ws.query_params.get("rate", 16000)) if fmt == "pcm16" else 16000
+        if rate <= 0:
+            raise ValueError(rate)
+    except ValueError:
+        log.info("流式识别参数无效：rate=%r", ws.query_params.get("rate"))
+        await ws.send_json({"type": "error", "message": "采样率参数 rate 无效，应为正整数（如 16000）。"})
+        await ws.close()
+        return
+
+    # 识别器和解码器在 try 里创建：识别繁忙、ffmpeg 起不来时同样走下面的 busy / error 回复
+    transcriber = decoder = None
+    recognize_task = receive_task = None
+
+    # 开口前的静音不送识别器；开口后检测到足够长的尾部静音即视为说完，不必等 "end"
+    vad = StreamingVAD() if VAD_ENABLED and rate == 16000 else None
+    # 部分结果里一出现日期就开始预抓取当天事件、打开新建弹窗，与后续识别同时进行
+    speculation = Speculation(get_calendar_operator) if SPECULATE_ENABLED else None
+
+    async def recognize():
+        last_text = ""
+        async for pcm in decoder.pcm_chunks():
+            ended = False
+            if vad is not None:
+                pcm, ended = vad.process(pcm)
+            if pcm:
+                # AcceptWaveform 是 CPU 密集调用，交给识别工作池
+                res = await asr_pool.run(transcriber.accept, pcm)
+                if res["text"] and res["text"] != last_text:
+                    last_text = res["text"]
+                    if speculation is not None:
+                        speculation.on_partial(res["text"])
+                    await ws.send_json(res)
+            if ended:
+                return True
+        rest = vad.flush() if vad is not None else b""
+        if rest:
+            await asr_pool.run(transcriber.accept, rest)
+        return False
+
+    async def receive():
+        while True:
+            msg = await ws.receive()
+            if msg["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect()
+            if msg.get("bytes"):
+                await decoder.feed(msg["bytes"])
+            elif msg.get("text") == "end":
+                return
+
+    async def stop():
+        """出错 / 断开时收尾：停掉两个任务和解码器（还没创建的跳过）"""
+        for task in (recognize_task, receive_task):
+            if task is not None:
+                task.cancel()
+        if decoder is not None:
+            await decoder.abort()
+
+    try:
+        # 借用识别器可能要等模型加载完成，同样放到工作池里
+        transcriber = await asr_pool.run(asr_pool.open_stream, rate)
+        try:
+            decoder = await create_stream_decoder(fmt).start()
+        except BaseException:
+            # 识别器还没交给任何工作线程，可以直接归还
+            asr_pool.close_stream(transcriber)
+            raise
+
+        recognize_task = asyncio.create_task(recognize())
+        receive_task = asyncio.create_task(receive())
+        await asyncio.wait({recognize_task, receive_task}, return_when=asyncio.FIRST_COMPLETED)
+
+        if recognize_task.done() and not receive_task.done():
+            # 检测到尾部静音：提前结束，通知前端停止录音，之后收到的音频不再需要
+            recognize_task.result()
+            receive_task.cancel()
+            await decoder.abort()
+            await ws.send_json({"type": "endpoint"})
+            with metrics.span("asr_stream"):
+                asr = await asr_pool.run(transcriber.finish)
+        else:
+            receive_task.result()
+            # 音频已全部进入识别器，只剩下最后一小段需要解码
+            # asr_stream：从说完（收到 end）到拿到最终文本
+            with metrics.span("asr_stream"):
+                await decoder.close()
+                await recognize_task
+                asr = await asr_pool.run(transcriber.finish)
+        asr_pool.close_stream(transcriber)
+        if vad is not None:
+            metrics.inc("vad_stream_skipped_ms_total", vad.skipped_bytes // 32)
+        log.info("用户语音识别结果（流式）：%s", asr)
+        await ws.send_json({"type": "final", "text": str(asr)})
+
+        op = await get_calendar_operator()
+        result = await handle_user_text(op, asr, client_id(ws), speculation)
+        await ws.send_json({"type": "result", **result})
+        await ws.close()
+
+    except WebSocketDisconnect:
+        # 工作线程可能仍在使用该识别器，这里不归还，直接丢弃
+        log.info("流式识别连接已断开")
+        await stop()
+
+    except ASRBusyError as e:
+        log.warning("识别繁忙：%s", e)
+        await stop()
+        await ws.send_json({"type": "busy", "message": "当前识别请求较多，请稍后再试。"})
+        await ws.close()
+
+    except OSError as e:
+        # 解码器启动失败（如找不到 ffmpeg）或解码管道中断；前端收到关闭后改走整段上传
+        log.error("流式解码失败：%r", e)
+        await stop()
+        await ws.send_json({"type": "error", "message": "语音解码暂时不可用，请稍后再试。"})
+        await ws.close()
+
+    finally:
+        # 没被用上的推测（没说出日程、日期变了、连接断开）：关弹窗、还页面
+        if speculation is not None:
+            await speculation.cancel()
 
-    # 删除原始 webm 临时文件
-    os.remove(temp_input_path)
 
-    # ----------- Vosk 识别 -----------
-    user_text = transcribe_audio_file(wav_path)
-    print("用户语音识别结果：", user_text)
+# -------------------------
+# 识别文本 → NLP → 冲突检测 → 创建日程
+# -------------------------
+def client_id(conn) -> str:
+    """区分不同用户的会话：前端传 X-Client-Id 头（WebSocket 用 client 查询参数），否则按来源地址"""
+    return (
+        conn.headers.get("x-client-id")
+        or conn.query_params.get("client")
+        or (conn.client.host if conn.client else "anonymous")
+    )
 
-    # ----------- NLP 解析 -----------
-    parsed = parse_schedule_from_text(user_text)
 
-    # ❌ 信息不足
+def format_slot(start_dt, end_dt) -> str:
+    return f"{start_dt.strftime('%H:%M')} 到 {end_dt.strftime('%H:%M')}"
+
+
+async def handle_user_text(op, user_text, client: str = "anonymous", speculation=None) -> dict:
+    """
+    user_text：识别文本，或带逐词置信度的识别结果（ASRResult，时间词置信度不足时直接请用户重说）
+    speculation：流式识别期间的推测工作（gcal.speculate），日期一致时直接用上提前打开的弹窗
+    """
+    asr = user_text if isinstance(user_text, ASRResult) else None
+    user_text = str(user_text)
+
+    # ----------- 上一轮给出了候选时段：先看是不是简短确认 -----------
+    pending = suggestion_store.pop(client)
+    if pending is not None:
+        choice = parse_reply(user_text, len(pending.slots))
+        if choice == REJECT:
+            msg = "好的，这个日程先不安排了。"
+            return {
+                "status": "cancelled",
+                "message": msg,
+                "audio": tts_audio_url(msg),
+                "user_text": user_text,
+            }
+        if choice is not None:
+            start_dt, end_dt = pending.slots[choice]
+            log.info("用户选择候选时段 %d：%s", choice + 1, format_slot(start_dt, end_dt))
+            return await create_checked(op, pending.title, start_dt, end_dt, client, user_text, speculation)
+        # 不是对候选的回复：当作一句新的日程
+
+    # ----------- NLP 解析（一句话里可能有几件事，或是重复日程） -----------
+    with metrics.span("parse"):
+        parsed = parse_schedule_items(asr if asr is not None else user_text)
+
+    # ❌ 信息不足（含时间词置信度不足）
     if parsed.get("missing_fields"):
-        msg = parsed.get("message", "我没有听清楚，请再说一次。")
-        synthesize_text_async(msg, out_path=os.path.join(TMP_DIR, "error.mp3"))
+        if parsed.get("low_confidence"):
+            metrics.inc("parse_low_confidence_total")
+            log.info("时间词识别置信度不足：%s", parsed["low_confidence"])
+        msg = parsed.get("message", RETRY_TEXT)
         return {
             "status": "incomplete",
             "message": msg,
-            "audio": "/tmp/error.mp3",
+            "audio": tts_audio_url(msg),
         }
 
-    title = parsed["title"]
-    start_dt = parsed["start"]
-    end_dt = parsed["end"]
+    events = parsed["events"]
+    if len(events) > 1 or "recurrence" in events[0]:
+        if speculation is not None:
+            # 推测只针对单件事；先还掉占着的页面，批量创建要用
+            await speculation.cancel()
+        return await create_many(op, events, user_text)
+
+    e = events[0]
+    return await create_checked(op, e["title"], e["start"], e["end"], client, user_text, speculation)
+
 
+async def create_checked(op, title: str, start_dt, end_dt, client: str, user_text: str, speculation=None) -> dict:
     # ------------------------------
-    # 先做冲突检测
+    # 冲突检测 + 创建：同一天的请求经写入队列串行执行，不会重复占用同一时段
     # ------------------------------
-    has_conflict = await op.check_conflict(start_dt.date(), start_dt, end_dt)
+    if not valid_span(start_dt, end_dt):
+        # 晚上十点到一点 / 八点到八点：与批量创建一样不创建，请用户重说
+        log.info("时间段无效：%s ~ %s", start_dt, end_dt)
+        return {
+            "status": "invalid",
+            "message": INVALID_SPAN_TEXT,
+            "audio": tts_audio_url(INVALID_SPAN_TEXT),
+            "user_text": user_text,
+        }
 
-    if has_conflict:
-        msg = f"您在 {start_dt.strftime('%m月%d日 %H:%M')} 到 {end_dt.strftime('%H:%M')} 已有日程，请换个时间。"
-        synthesize_text_async(msg, out_path=os.path.join(TMP_DIR, "conflict.mp3"))
+    prepared = await speculation.take(start_dt.date()) if speculation is not None else None
+    result = await write_queue.check_and_create(op, title, start_dt, end_dt, prepared=prepared)
+
+    if result == CONFLICT:
+        msg = f"您在 {start_dt.strftime('%m月%d日 %H:%M')} 到 {end_dt.strftime('%H:%M')} 已有日程"
+        suggestions = op.suggest_slots(start_dt, end_dt)
+        if suggestions:
+            # 记下候选，用户回答“好”或“第二个”即可，不必重新口述整句
+            suggestion_store.put(client, title, suggestions)
+            options = "；".join(
+                f"第{'一二三四五'[i]}个 {format_slot(s, e)}" for i, (s, e) in enumerate(suggestions)
+            )
+            msg += f"。当天可以改到：{options}。回答“好”选第一个，或者说“第二个”。"
+        else:
+            msg += "，当天工作时间内没有合适的空档，请换个时间。"
         return {
             "status": "conflict",
             "message": msg,
-            "audio": "/tmp/conflict.mp3"
+            "audio": tts_audio_url(msg),
+            # WebSocket 用 send_json 直接序列化，这里先转成字符串
+            "suggestions": [{"start": s.isoformat(), "end": e.isoformat()} for s, e in suggestions],
         }
 
-    # ------------------------------
-    # 没有冲突：继续创建
-    # ------------------------------
-    ok = await op.create_event(title, start_dt, end_dt)
-
-    if ok is False:
-        msg = "创建日程失败，请稍后再试。"
-        synthesize_text_async(msg, out_path=os.path.join(TMP_DIR, "fail.mp3"))
+    if result == FAILED:
+        msg = FAIL_TEXT
         return {
             "status": "error",
             "message": msg,
-            "audio": "/tmp/fail.mp3",
+            "audio": tts_audio_url(msg),
         }
 
     # ----------- 成功反馈 -----------
-    msg = "日程已创建成功。"
-    synthesize_text_async(msg, out_path=os.path.join(TMP_DIR, "success.mp3"))
+    msg = SUCCESS_TEXT
 
     return {
         "status": "ok",
         "message": msg,
-        "audio": "/tmp/success.mp3",
+        "audio": tts_audio_url(msg),
         "user_text": user_text,
     }
 
 
+async def create_many(op, events: list, user_text: str) -> dict:
+    """
+    一句话里的几件事 / 重复日程：重复日程按 RECUR_WINDOW_DAYS 的时间窗展开成每一次（最多 RECUR_MAX_OCCURRENCES 次），
+    整批做冲突检测（缺索引的日期合并抓取一次）后，同一天的共用一个页面依次创建；冲突的跳过，其余照常创建
+    """
+    window_end = datetime.now() + timedelta(days=recurrence.WINDOW_DAYS)
+    batch, invalid, rules = [], [], []
+    for e in events:
+        rule = e.get("recurrence")
+        if rule is None:
+            occurrences = [(e["start"], e["end"])]
+        else:
+            rules.append(rule.describe())
+            occurrences = islice(
+                recurrence.expand(e["start"], e["end"], rule, window_end=window_end), recurrence.MAX_OCCURRENCES
+            )
+        for s, end in occurrences:
+            if not valid_span(s, end):
+                # 时间本身不成立（跨天 / 零时长），不是创建失败，单独告诉用户
+                invalid.append({"title": e["title"], "start": s, "end": end, "status": "invalid"})
+                continue
+            batch.append({"title": e["title"], "start": s, "end": end})
+
+    metrics.inc("multi_event_total", kind="recurring" if rules else "multiple")
+    async with write_queue.days(e["start"].date() for e in batch):
+        results = await op.create_events(batch)
+
+    ok = [r for r in results if r["status"] == "ok"]
+    conflicts = [r for r in results if r["status"] == "conflict"]
+    failed = len(results) - len(ok) - len(conflicts)
+
+    msg = f"已创建 {len(ok)} 个日程"
+    if rules:
+        msg += f"（{'、'.join(rules)}，安排到 {window_end.strftime('%m月%d日')}）"
+    if conflicts:
+        shown = "、".join(r["start"].strftime("%m月%d日 %H:%M") for r in conflicts[:5])
+        msg += f"；{shown}{' 等' if len(conflicts) > 5 else ''} 已有日程，没有创建"
+    if invalid:
+        msg += f"；{len(invalid)} 个时间无效（结束须晚于开始且在同一天），没有创建"
+    if failed:
+        msg += f"；{failed} 个创建失败"
+    msg += "。"
+
+    if ok and len(ok) == len(results) and not invalid:
+        status = "ok"
+    elif ok:
+        status = "partial"
+    elif conflicts:
+        status = "conflict"
+    elif invalid and not failed:
+        status = "invalid"
+    else:
+        status = "error"
+
+    return {
+        "status": status,
+        "message": msg,
+        "audio": tts_audio_url(msg),
+        "user_text": user_text,
+        "events": [
+            {"title": r["title"], "start": r["start"].isoformat(), "end": r["end"].isoformat(), "status": r["status"]}
+            for r in results + invalid
+        ],
+        "recurrence": [e["recurrence"].to_dict() for e in events if "recurrence" in e],
+    }
+
+
+# -------------------------
+# API: 批量创建日程
+# -------------------------
+class BatchEvent(BaseModel):
+    """口述原文（text）或已结构化的 title / start / end，二选一"""
+    text: Optional[str] = None
+    title: Optional[str] = None
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+
+
+class BatchRequest(BaseModel):
+    events: List[BatchEvent]
+
+
+@app.post("/api/events/batch")
+async def create_events_batch(req: BatchRequest):
+    """
+    一次导入多条日程：整批做冲突检测（包括批内互相重叠），
+    同一天的日程共用一个浏览器页面依次填写。返回每条的状态。
+    """
+    op = await get_calendar_operator()
+
+    results = [None] * len(req.events)
+    valid, positions = [], []
+
+    for i, item in enumerate(req.events):
+        if item.text:
+            parsed = parse_schedule_from_text(item.text)
+            if parsed.get("missing_fields"):
+                results[i] = {"index": i, "text": item.text, "status": "incomplete", "message": parsed["message"]}
+                continue
+            event = {"title": item.title or parsed["title"], "start": parsed["start"], "end": parsed["end"]}
+        elif item.start is not None:
+            # 与口述解析一致：只给开始时间时默认 1 小时
+            end = item.end or item.start + timedelta(hours=1)
+            event = {"title": item.title or "日程", "start": item.start, "end": end}
+        else:
+            results[i] = {"index": i, "status": "incomplete", "message": MISSING_TIME_MESSAGE}
+            continue
+
+        if not valid_span(event["start"], event["end"]):
+            results[i] = {"index": i, **event, "status": "invalid", "message": INVALID_SPAN_TEXT}
+            continue
+        valid.append(event)
+        positions.append(i)
+
+    # 批量涉及的每一天都占住写入队列，批内检测与创建期间不会插入其他请求
+    async with write_queue.days(e["start"].date() for e in valid):
+        created = await op.create_events(valid)
+
+    for i, r in zip(positions, created):
+        r["index"] = i
+        results[i] = r
+
+    summary = {}
+    for r in results:
+        summary[r["status"]] = summary.get(r["status"], 0) + 1
+
+    return {"results": results, "summary": summary}
+
+
+# -------------------------
+# API: 空闲时段查询
+# -------------------------
+@app.get("/api/free_slots")
+async def free_slots(start: date, end: Optional[date] = None, minutes: int = 60):
+    """start ~ end（默认只查 start 当天）工作时间内能放下 minutes 分钟的空档"""
+    op = await get_calendar_operator()
+    found = await op.find_free_slots(start, end or start, timedelta(minutes=minutes))
+    return {"slots": [{"start": s, "end": e} for s, e in found]}
+
+
 # -------------------------
 # NLP 测试接口
 # -------------------------
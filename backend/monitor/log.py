@@ -0,0 +1,32 @@
+# backend/monitor/log.py
+# 日志配置：级别由 LOG_LEVEL 控制（默认 INFO，逐条事件等细节为 DEBUG）。
+# 记录先进入内存队列，由后台线程写 stdout，请求处理路径上不做同步输出。
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+
+LOG_FORMAT = "%(asctime)s %(levelname)-5s %(name)s: %(message)s"
+
+_listener = None
+
+
+def setup_logging(level: str = None):
+    global _listener
+    if _listener is not None:
+        return
+
+    level = (level or os.environ.get("LOG_LEVEL", "INFO")).upper()
+
+    q = queue.SimpleQueue()
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter(LOG_FORMAT))
+    _listener = logging.handlers.QueueListener(q, stream)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(q)]
+    root.setLevel(level)
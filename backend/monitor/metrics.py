@@ -0,0 +1,162 @@
+# backend/monitor/metrics.py
+# 轻量埋点：各处理阶段的耗时直方图 + 计数器，/api/metrics 以 Prometheus 文本格式输出
+#
+# - observe() 只做一次 bisect 和几次加法（持锁），不做任何 I/O，可以放在热路径上
+# - 直方图用固定桶（Prometheus histogram）；p50 / p95 / p99 取自最近 window 个样本
+# - gauge 在抓取时才回调取值（解析缓存、TTS 缓存等）
+
+import bisect
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# 秒；覆盖从解析（微秒级）到浏览器操作（数秒）的范围
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+PIPELINE = "pipeline_stage_seconds"
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS, window: int = 1024):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最后一格为 +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+    def quantiles(self, qs=QUANTILES) -> dict:
+        data = sorted(self.recent)
+        if not data:
+            return {q: None for q in qs}
+        return {q: data[min(len(data) - 1, int(q * len(data)))] for q in qs}
+
+
+def _labels(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hist = {}      # (family, labels) → Histogram
+        self._counters = {}  # (name, labels) → int
+        self._gauges = {}    # name → (help, fn)
+        self._help = {
+            PIPELINE: "Latency of each voice pipeline stage",
+            "browser_step_seconds": "Latency of each browser automation step",
+        }
+
+    # -------------------------
+    # 记录
+    # -------------------------
+    def observe(self, family: str, seconds: float, **labels):
+        key = (family, tuple(sorted(labels.items())))
+        with self._lock:
+            h = self._hist.get(key)
+            if h is None:
+                h = self._hist[key] = Histogram()
+            h.observe(seconds)
+
+    def inc(self, name: str, value: int = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    @contextmanager
+    def span(self, stage: str):
+        """处理阶段计时：with metrics.span("asr"): ...；异常时另计 pipeline_stage_errors_total"""
+        t0 = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc("pipeline_stage_errors_total", stage=stage)
+            raise
+        finally:
+            self.observe(PIPELINE, time.perf_counter() - t0, stage=stage)
+
+    def gauge(self, name: str, fn, help: str = ""):
+        """注册一个抓取时才计算的指标；fn 返回数值"""
+        self._gauges[name] = (help, fn)
+
+    def describe(self, family: str, help: str):
+        self._help[family] = help
+
+    # -------------------------
+    # 输出
+    # -------------------------
+    def snapshot(self) -> dict:
+        """{family: {labels: {count, mean_ms, p50_ms, ...}}}，供调试查看"""
+        out = {}
+        with self._lock:
+            items = [(k, h.count, h.sum, h.quantiles()) for k, h in self._hist.items()]
+        for (family, labels), count, total, qs in items:
+            entry = {"count": count, "mean_ms": round(total / count * 1000, 3) if count else None}
+            for q, v in qs.items():
+                entry[f"p{int(q * 100)}_ms"] = round(v * 1000, 3) if v is not None else None
+            out.setdefault(family, {})[_labels(labels) or "{}"] = entry
+        return out
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            hists = sorted(
+                (k, list(h.counts), h.sum, h.count, h.quantiles(), h.buckets)
+                for k, h in self._hist.items()
+            )
+            counters = sorted(self._counters.items())
+
+        seen = set()
+        for (family, labels), counts, total, count, qs, buckets in hists:
+            if family not in seen:
+                seen.add(family)
+                lines.append(f"# HELP {family} {self._help.get(family, family)}")
+                lines.append(f"# TYPE {family} histogram")
+            acc = 0
+            for le, c in zip(list(buckets) + ["+Inf"], counts):
+                acc += c
+                lines.append(f"{family}_bucket{_labels(labels + (('le', le),))} {acc}")
+            lines.append(f"{family}_sum{_labels(labels)} {total}")
+            lines.append(f"{family}_count{_labels(labels)} {count}")
+
+        # 分位数单独作为 summary 指标族（同一指标族不能既是 histogram 又是 summary）
+        seen = set()
+        for (family, labels), _, _, _, qs, _ in hists:
+            name = family.replace("_seconds", "_quantile_seconds")
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} gauge")
+            for q, v in qs.items():
+                if v is not None:
+                    lines.append(f"{name}{_labels(labels + (('quantile', q),))} {v}")
+
+        seen = set()
+        for (name, labels), v in counters:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_labels(labels)} {v}")
+
+        for name, (help, fn) in sorted(self._gauges.items()):
+            try:
+                value = fn()
+            except Exception:
+                continue
+            if help:
+                lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
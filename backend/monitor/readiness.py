@@ -0,0 +1,63 @@
+# backend/monitor/readiness.py
+# 各组件预热状态：供 /api/ready 查询
+
+import time
+import threading
+from contextlib import contextmanager
+
+PENDING = "pending"    # 尚未开始
+LOADING = "loading"    # 正在加载
+READY = "ready"        # 可用
+FAILED = "failed"      # 加载失败
+IDLE = "idle"          # 按需加载，尚未被触发
+
+
+class Readiness:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._components = {}
+        self._required = set()
+
+    def register(self, name: str, required: bool = True, state: str = PENDING):
+        with self._lock:
+            self._components[name] = {"state": state}
+            if required:
+                self._required.add(name)
+
+    def mark(self, name: str, state: str, **extra):
+        with self._lock:
+            info = self._components.setdefault(name, {})
+            info["state"] = state
+            info.update(extra)
+
+    def state(self, name: str) -> str:
+        with self._lock:
+            return self._components.get(name, {}).get("state", PENDING)
+
+    @contextmanager
+    def track(self, name: str):
+        """loading → ready / failed，并记录耗时"""
+        t0 = time.perf_counter()
+        self.mark(name, LOADING)
+        try:
+            yield
+        except Exception as e:
+            self.mark(name, FAILED, error=repr(e),
+                      duration_ms=round((time.perf_counter() - t0) * 1000, 1))
+            raise
+        self.mark(name, READY, duration_ms=round((time.perf_counter() - t0) * 1000, 1))
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            return all(self._components[n]["state"] == READY for n in self._required)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                name: dict(info, required=name in self._required)
+                for name, info in self._components.items()
+            }
+
+
+readiness = Readiness()
@@ -0,0 +1,53 @@
+# backend/monitor/startup.py
+# 冷启动耗时剖析：记录各阶段（模块导入、组件初始化）的耗时
+#
+# main.py 最先导入本模块，因此 T0 近似等于进程开始执行应用代码的时刻。
+
+import logging
+import time
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+T0 = time.perf_counter()
+
+
+class StartupProfile:
+    def __init__(self):
+        self.stages = []
+        self.ready_at_ms = None
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append({
+                "stage": name,
+                "start_ms": round((t0 - T0) * 1000, 1),
+                "duration_ms": round((time.perf_counter() - t0) * 1000, 1),
+            })
+
+    def mark_ready(self):
+        """所有必需组件就绪时调用一次：冷启动总耗时"""
+        if self.ready_at_ms is None:
+            self.ready_at_ms = round((time.perf_counter() - T0) * 1000, 1)
+
+    def report(self) -> dict:
+        return {
+            "cold_start_ms": self.ready_at_ms,
+            "uptime_ms": round((time.perf_counter() - T0) * 1000, 1),
+            "stages": list(self.stages),
+        }
+
+    def print_report(self):
+        lines = ["启动耗时剖析："]
+        for s in self.stages:
+            lines.append(f"    {s['stage']:<28} +{s['start_ms']:>8.1f} ms  {s['duration_ms']:>8.1f} ms")
+        if self.ready_at_ms is not None:
+            lines.append(f"    {'cold start (ready)':<28} {self.ready_at_ms:>9.1f} ms")
+        log.info("\n".join(lines))
+
+
+startup_profile = StartupProfile()
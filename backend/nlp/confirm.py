@@ -0,0 +1,80 @@
+# backend/nlp/confirm.py
+# 冲突时给出的候选时段：按客户端暂存，用户用一句简短回复（“好” / “第二个” / “算了”）即可确认
+
+import os
+import re
+import threading
+import time
+
+from nlp.parser_v2 import cn2num, partial_day
+
+REJECT = -1
+
+ACCEPT_WORDS = ("好", "好的", "好啊", "好好", "可以", "可以的", "行", "行的", "没问题", "就这个", "就这个时间", "确定", "对", "对的", "嗯", "ok")
+REJECT_WORDS = ("不用", "不要", "算了", "取消", "不行", "都不行")
+
+_ORDINAL_RE = re.compile(r"第\s*([一二三四五六七八九十\d]{1,2})\s*[个条]?")
+_PUNCT_RE = re.compile(r"[\s，。！？、,.!?吧呀啊]+")
+
+# 超过这个长度就当作一句新的日程，而不是对候选时段的回复
+MAX_REPLY_LEN = 8
+
+
+def parse_reply(text: str, n: int):
+    """
+    简短回复 → 选中的候选序号（0 起）/ REJECT / None（不是回复，按新的日程处理）
+    带日期 / 时间的（“好，三点吧”）是重新给了时间，不当作对候选的回复
+    """
+    t = _PUNCT_RE.sub("", text or "").lower()
+    if not t or len(t) > MAX_REPLY_LEN:
+        return None
+    if partial_day(t) is not None:
+        return None
+
+    m = _ORDINAL_RE.search(t)
+    if m:
+        k = cn2num(m.group(1))
+        return k - 1 if k and 1 <= k <= n else None
+
+    if any(w in t for w in REJECT_WORDS):
+        return REJECT
+    # “就这个吧”“好的”等（去掉标点和语气词后须与确认词完全一致）→ 第一个候选
+    if t in ACCEPT_WORDS:
+        return 0
+    return None
+
+
+class PendingSuggestion:
+    __slots__ = ("title", "slots", "expires")
+
+    def __init__(self, title: str, slots: list, expires: float):
+        self.title = title
+        self.slots = slots
+        self.expires = expires
+
+
+class SuggestionStore:
+    """client_id → 待确认的候选时段；超过 ttl 秒自动失效"""
+
+    def __init__(self, ttl: float = 120.0):
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def put(self, client_id: str, title: str, slots: list):
+        now = time.monotonic()
+        with self._lock:
+            # 顺带清理过期条目，字典不会无限增长
+            for k in [k for k, v in self._data.items() if v.expires < now]:
+                del self._data[k]
+            self._data[client_id] = PendingSuggestion(title, slots, now + self.ttl)
+
+    def pop(self, client_id: str):
+        with self._lock:
+            p = self._data.pop(client_id, None)
+        if p is None or p.expires < time.monotonic():
+            return None
+        return p
+
+
+suggestion_store = SuggestionStore(float(os.environ.get("SUGGESTION_TTL", 120)))
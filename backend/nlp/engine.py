@@ -0,0 +1,345 @@
+# backend/nlp/engine.py
+#
+# 规则表驱动的解析引擎：用户口述和日历事件块的 aria-label 共用同一套规则。
+#
+# 每条规则 = 名字 + 正则片段 + 动作。全部规则按表中顺序拼成一个组合正则（编译一次），
+# finditer 单遍把文本切成 token，按命中的规则名分派给动作，动作把结果写进 Scan。
+# 新增说法（如“月底”“周末”）只需往表里加一条规则再 Engine(rules) 重新编译，不必改扫描逻辑。
+#
+# 扫描结果与当前时间无关（“明天”记为 +1 天、“下周三”记为星期几），时段词按端点分别记录，
+# 换算成 24 小时制、具体日期都在 resolve_* 里完成，因此 Scan 可以按原文缓存（见 parser_v2.ParseCache）。
+
+from datetime import datetime, timedelta
+import re
+from typing import Callable, NamedTuple
+
+from nlp.recurrence import DAILY, MONTHLY, WEEKLY, Recurrence
+
+# -----------------------------
+# 词表
+# -----------------------------
+CN_NUM = {
+    "零": 0, "〇": 0,
+    "一": 1, "二": 2, "两": 2, "三": 3, "四": 4, "五": 5,
+    "六": 6, "七": 7, "八": 8, "九": 9,
+    "十": 10, "十一": 11, "十二": 12
+}
+
+WEEKDAY_MAP = {
+    "一": 0, "二": 1, "三": 2, "四": 3, "五": 4, "六": 5, "日": 6, "天": 6
+}
+
+DATE_OFFSET = {"今天": 0, "明天": 1, "明日": 1, "后天": 2, "大后天": 3}
+
+PERIOD_WORDS = ("上午", "下午", "晚上", "早上", "傍晚", "清晨", "明早", "中午")
+PM_WORDS = {"下午", "晚上", "傍晚"}
+# 中午一点 = 13 点，中午十二点 = 12 点
+NOON_WORDS = {"中午"}
+# 晚上十二点 = 当天 24:00（次日零点），不是中午
+MIDNIGHT_WORDS = {"晚上"}
+
+TITLE_STRIP = " \t，,。；;、：:"
+
+SEP_WORDS = ("到", "至", "~", "～", "-", "—", "–", "－")
+
+
+# -----------------------------
+# 中文数字查表（0 ~ 99）
+# -----------------------------
+def _build_cn_table():
+    digits = {k: v for k, v in CN_NUM.items() if v < 10}
+    table = dict(digits)
+    table["十"] = 10
+    for s, v in digits.items():
+        if v == 0:
+            continue
+        table["十" + s] = 10 + v
+        table[s + "十"] = v * 10
+        for s2, v2 in digits.items():
+            if v2:
+                table[s + "十" + s2] = v * 10 + v2
+    return table
+
+
+_CN_VALUE = _build_cn_table()
+
+
+def cn2num(s: str):
+    """中文 / 阿拉伯数字 → int（查表，支持到九十九，如 二十三）"""
+    if s.isdigit():
+        return int(s)
+    return _CN_VALUE.get(s)
+
+
+# -----------------------------
+# 扫描结果
+# -----------------------------
+class Scan:
+    """一次扫描得到的全部信息；start / end 为原始钟点，时段词按端点另记"""
+
+    __slots__ = (
+        "day_offset", "weekday", "next_week", "recurrence", "period", "start", "end", "start_period", "end_period",
+        "consumed", "time_spans", "title",
+    )
+
+    def __init__(self):
+        self.day_offset = None
+        self.weekday = None
+        self.next_week = False    # weekday 是“下周 X”；否则为今天起最近的星期 X（含今天）
+        self.recurrence = None    # nlp.recurrence.Recurrence；“每周”没说星期几时 weekdays 为空，由调用方按首日补上
+        self.period = None        # 单独出现的时段词（第一个），作用于没有自带时段词的时间
+        self.start = None
+        self.end = None
+        self.start_period = None  # 时间段两端各自带的时段词（下午三点到晚上五点）
+        self.end_period = None
+        self.consumed = []
+        # 实际采用的日期 / 时段 / 时间 token 在原文中的位置，用于检查识别置信度
+        self.time_spans = []
+        self.title = None
+
+
+# -----------------------------
+# 规则表
+# -----------------------------
+class Rule(NamedTuple):
+    name: str
+    pattern: str
+    action: Callable  # (scan, match) → None
+    first: str = ""   # token 可能的首字符；全部规则都给出时用作前瞻，无关字符一次判断即跳过
+
+
+class Engine:
+    """把规则表编译成一个组合正则；scan(text) 单遍扫描"""
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self._actions = {r.name: r.action for r in self.rules}
+        alternatives = "|".join(f"(?P<{r.name}>{r.pattern})" for r in self.rules)
+        lead = ""
+        if all(r.first for r in self.rules):
+            chars = "".join(sorted(set("".join(r.first for r in self.rules))))
+            lead = f"(?=[{re.escape(chars)}])"
+        self.regex = re.compile(f"{lead}(?:{alternatives})")
+
+    def scan(self, text: str) -> Scan:
+        res = Scan()
+        actions = self._actions
+        for m in self.regex.finditer(text):
+            actions[m.lastgroup](res, m)
+        return res
+
+
+_CN_CHARS = "零〇一二两三四五六七八九十"
+_CN = f"[{_CN_CHARS}]{{1,3}}"
+# 中文分钟：带“分”的任意中文数字，或含“十”的两位数（三点十五），避免把“三点一起”读成 3:01
+_CN_MINUTE = f"[一二三四五]?十[一二三四五六七八九]?|{_CN}(?=\\s*分)"
+_PERIOD = "|".join(PERIOD_WORDS)
+_SEP = "|".join(re.escape(w) for w in SEP_WORDS)
+_TIME_FIRST = "0123456789" + _CN_CHARS
+
+
+def time_pattern(x: str, allow_bare: bool, bare_guard: str = "") -> str:
+    """
+    时间片段：10:30 / 十点半 / 3点15分；allow_bare 时还接受不带“点”的裸数字（仅用于时间段）。
+    各部分之间允许空格：Vosk 的识别结果按词分隔（十 点 半 / 十 点 三十 分）。
+    bare_guard：接在裸数字后面的前瞻（时间段的前一端要求后面紧跟连接词）
+    """
+    pat = (
+        rf"(?P<{x}_ch>\d{{1,2}})[:：](?P<{x}_cm>\d{{2}})"
+        rf"|(?P<{x}_hn>\d{{1,2}}|{_CN})\s*[点时](?:\s*(?P<{x}_half>半)|\s*(?P<{x}_mn>\d{{1,2}}|{_CN_MINUTE})\s*分?)?"
+    )
+    if allow_bare:
+        pat += rf"|(?P<{x}_num>(?<!\d)\d{{1,2}}(?![\d年月日号])|{_CN}(?![{_CN_CHARS}年月日号])){bare_guard}"
+    return f"(?:{pat})"
+
+
+_TIME_GROUPS = {x: tuple(f"{x}_{k}" for k in ("ch", "cm", "hn", "half", "mn", "num")) for x in "ab"}
+
+
+def time_value(m, x: str):
+    """从匹配结果中取出前缀为 x 的时间片段 → (hour, minute)，无法识别时返回 None"""
+    ch, cm, hn, half, mn, num = m.group(*_TIME_GROUPS[x])
+    if ch is not None:
+        h, mi = int(ch), int(cm)
+    elif hn is not None:
+        h = cn2num(hn)
+        mi = 30 if half else (cn2num(mn) if mn else 0)
+    elif num is not None:
+        h, mi = cn2num(num), 0
+    else:
+        return None
+
+    if h is None or mi is None or h > 23 or mi > 59:
+        return None
+    return h, mi
+
+
+def _on_date(res: Scan, m):
+    if res.day_offset is None and res.weekday is None:
+        res.day_offset = DATE_OFFSET[m.group("date")]
+        res.time_spans.append(m.span())
+    res.consumed.append(m.span())
+
+
+def _on_week(res: Scan, m):
+    if res.day_offset is None and res.weekday is None:
+        wd = m.group("weekday")
+        # 周末按周六算
+        res.weekday = 5 if wd == "末" else WEEKDAY_MAP[wd]
+        res.next_week = m.group("next_week") is not None
+        res.time_spans.append(m.span())
+    res.consumed.append(m.span())
+
+
+def _on_recur(res: Scan, m):
+    if res.recurrence is None:
+        g = m.group
+        if g("r_daily"):
+            rule = Recurrence(DAILY)
+        elif g("r_workday"):
+            rule = Recurrence(WEEKLY, (0, 1, 2, 3, 4))
+        elif g("r_weekend"):
+            rule = Recurrence(WEEKLY, (5, 6))
+        elif g("r_from"):
+            a, b = WEEKDAY_MAP[g("r_from")], WEEKDAY_MAP[g("r_to")]
+            # 每周五到周一：跨过周末取模
+            rule = Recurrence(WEEKLY, tuple(sorted(d % 7 for d in range(a, b + 8 if b < a else b + 1))))
+        elif g("r_mday"):
+            mday = cn2num(g("r_mday"))
+            if not mday or mday > 31:
+                return
+            rule = Recurrence(MONTHLY, monthday=mday)
+        else:
+            days = g("r_days") or ""
+            rule = Recurrence(WEEKLY, tuple(sorted({WEEKDAY_MAP[c] for c in days if c in WEEKDAY_MAP})))
+        res.recurrence = rule
+        res.time_spans.append(m.span())
+    res.consumed.append(m.span())
+
+
+def _skip(res: Scan, m):
+    pass
+
+
+def _on_time(res: Scan, m):
+    """单点时间或时间段（两端可各带时段词）；前一端是裸数字时必须是时间段"""
+    if res.start is not None:
+        return
+    t1 = time_value(m, "a")
+    if m.group("tail") is None:
+        if t1 is None or m.group("a_num") is not None:
+            return
+        res.start, res.start_period = t1, m.group("pa")
+    else:
+        t2 = time_value(m, "b")
+        if t1 is None or t2 is None:
+            return
+        res.start, res.end = t1, t2
+        res.start_period, res.end_period = m.group("pa"), m.group("pb")
+    res.consumed.append(m.span())
+    res.time_spans.append(m.span())
+
+
+def _on_period(res: Scan, m):
+    if res.period is None:
+        res.period = m.group("period")
+    res.consumed.append(m.span())
+    res.time_spans.append(m.span())
+
+
+_WD = "[一二三四五六日天]"
+# 每周一三五：星期几后面紧跟“点”时算钟点（每周二三点 = 周二 3 点）
+_RECUR = (
+    r"每(?P<r_daily>天|日)"
+    r"|每个?(?P<r_workday>工作日)"
+    r"|每个?(?P<r_weekend>周末)"
+    rf"|每个?(?:周|星期|礼拜)(?P<r_from>{_WD})(?:到|至)(?:周|星期|礼拜)?(?P<r_to>{_WD})"
+    rf"|每个?月(?P<r_mday>\d{{1,2}}|{_CN})[号日]"
+    rf"|每个?(?:周|星期|礼拜)(?P<r_days>(?:{_WD}(?![点时:：\d])[、和]?)*)"
+)
+
+# 单点时间和时间段合成一条规则：同一位置只匹配一次时间，不必先试时间段失败后再按单点重新匹配。
+# 时间段的前一端可以是裸数字（9到10点），但要求后面紧跟连接词
+_BEFORE_SEP = rf"(?=\s*(?:{_SEP}))"
+_TIME = (
+    rf"(?:(?P<pa>{_PERIOD})\s*)?{time_pattern('a', True, _BEFORE_SEP)}"
+    rf"(?P<tail>\s*(?:{_SEP})\s*(?:(?P<pb>{_PERIOD})\s*)?{time_pattern('b', True)})?"
+)
+# 下周三 / 这周三 / 周三 / 星期天 / 周末；前面是数字或“上”“每”时不算（两周三次、上周三、每周三由 recur 处理）
+_WEEK = (
+    r"(?:(?P<next_week>下个?)|(?<![零〇一二两三四五六七八九十\d上每])(?:这个?|本)?)"
+    r"(?:周|星期|礼拜)(?P<weekday>[一二三四五六日天末])"
+)
+# 事件块 aria-label 末尾的日期（2025年11月20日）：整段跳过，不在每个数字上逐个尝试时间规则
+_CALENDAR_DATE = r"\d{2,4}年\d{1,2}月\d{1,2}日"
+
+# 顺序即优先级：时间（可带时段词）排在单独的时段词之前
+RULES = [
+    Rule("caldate", _CALENDAR_DATE, _skip, "0123456789"),
+    Rule("recur", _RECUR, _on_recur, "每"),
+    Rule("date", "大后天|今天|明天|明日|后天", _on_date, "今明后大"),
+    Rule("week", _WEEK, _on_week, "下这本周星礼"),
+    Rule("time", _TIME, _on_time, "上下晚早傍清明中" + _TIME_FIRST),
+    Rule("period", _PERIOD, _on_period, "上下晚早傍清明中"),
+]
+
+engine = Engine(RULES)
+scan = engine.scan
+
+
+# -----------------------------
+# 换算
+# -----------------------------
+def to_24h(t, period):
+    h, mi = t
+    if period in PM_WORDS and h < 12:
+        h += 12
+    elif period in NOON_WORDS and h < 6:
+        h += 12
+    elif period in MIDNIGHT_WORDS and h == 12:
+        h = 24
+    return h, mi
+
+
+def resolve_time(res: Scan):
+    """("range", (h, m), (h, m)) / ("single", (h, m)) / None；晚上十二点为 (24, 0)，调用方按次日零点换算"""
+    if res.start is None:
+        return None
+    p1 = res.start_period or res.period
+    start = to_24h(res.start, p1)
+    if res.end is None:
+        return ("single", start)
+
+    end = to_24h(res.end, res.end_period or p1)
+    # 上午十一点到一点：结束时间没有时段词且早于开始，按跨过中午处理
+    if res.end_period is None and end < start and end[0] + 12 <= 23:
+        end = (end[0] + 12, end[1])
+    return ("range", start, end)
+
+
+def resolve_date(res: Scan, today: datetime) -> datetime:
+    if res.day_offset is not None:
+        return today + timedelta(days=res.day_offset)
+    if res.weekday is not None:
+        # 星期 X：今天起最近的一个（含今天）；下周 X 再往后一周
+        delta = (res.weekday - today.weekday()) % 7
+        if res.next_week:
+            delta += 7
+        return today + timedelta(days=delta)
+    return today
+
+
+def resolve_title(text: str, res: Scan) -> str:
+    if res.title is not None:
+        return res.title
+
+    parts = []
+    pos = 0
+    for s, e in sorted(res.consumed):
+        parts.append(text[pos:s])
+        pos = max(pos, e)
+    parts.append(text[pos:])
+    # 去掉时间后留在两端的标点（“明天下午三点，和王总开会”）
+    t = "".join(parts).strip(TITLE_STRIP)
+    res.title = t if t else "日程"
+    return res.title
@@ -1,156 +1,298 @@
 # backend/nlp/parser_v2.py
-
+#
+# 日程解析的对外接口：扫描交给规则表引擎（nlp/engine.py，与事件块 aria-label 的解析共用），
+# 这里负责按原文缓存扫描结果，以及组装 {title, start, end}。
+# 早期实现保留作对照：parser.py（最初版本）、parser_v2_regex.py（多遍正则），见 bench/diff_parser.py。
+#
+# 扫描结果与当前时间无关（“明天”记为 +1 天、“下周三”记为星期几），
+# 因此可以按原文缓存，取出时再结合当前时钟换算成具体日期，跨过零点也不会出错。
+
+from collections import OrderedDict
 from datetime import datetime, timedelta
+import os
 import re
+import threading
 
-# -----------------------------
-# 中文数字转换表
-# -----------------------------
-CN_NUM = {
-    "零": 0, "〇": 0,
-    "一": 1, "二": 2, "两": 2, "三": 3, "四": 4, "五": 5,
-    "六": 6, "七": 7, "八": 8, "九": 9,
-    "十": 10, "十一": 11, "十二": 12
-}
+from nlp.engine import (  # noqa: F401  CN_NUM 等词表仍从这里导出
+    CN_NUM, DATE_OFFSET, PERIOD_WORDS, PM_WORDS, WEEKDAY_MAP, Scan, cn2num,
+    resolve_date as _resolve_date, resolve_time as _resolve_time, resolve_title as _resolve_title,
+    scan as _scan,
+)
+from nlp.recurrence import WEEKLY, Recurrence, expand
+
+MISSING_TIME_MESSAGE = "我没有听清楚时间，请再说一次，例如：明天早上九点到十点。"
+
+# 识别结果里日期 / 时段 / 时间这些词的置信度低于此值，就当作没听清，直接请用户重说
+TIME_MIN_CONFIDENCE = float(os.environ.get("PARSE_TIME_MIN_CONF", 0.5))
 
-WEEKDAY_MAP = {
-    "一": 0, "二": 1, "三": 2, "四": 3, "五": 4, "六": 5, "日": 6, "天": 6
-}
 
 # -----------------------------
-# 中文数字 → 数字
+# 解析结果缓存（LRU）
 # -----------------------------
-def cn2num(s: str):
-    if s in CN_NUM:
-        return CN_NUM[s]
-    # “十七”类情况
-    if len(s) == 2 and s[0] == "十":
-        return 10 + CN_NUM.get(s[1], 0)
-    return None
+class ParseCache:
+    """
+    原文 → 扫描结果 的有界 LRU 缓存。
+    用户常重复同样的说法，check_conflict 也会反复解析相同的 aria-label。
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def scan(self, text: str) -> Scan:
+        with self._lock:
+            res = self._data.get(text)
+            if res is not None:
+                self._data.move_to_end(text)
+                self.hits += 1
+                return res
+            self.misses += 1
+
+        res = _scan(text)
+
+        with self._lock:
+            self._data[text] = res
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return res
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+parse_cache = ParseCache(int(os.environ.get("PARSE_CACHE_SIZE", 1024)))
 
 
 # -----------------------------
 # 日期解析
 # -----------------------------
 def parse_date(text: str):
-    today = datetime.now()
-
-    if "今天" in text:
-        return today
-    if "明天" in text or "明日" in text:
-        return today + timedelta(days=1)
-    if "后天" in text:
-        return today + timedelta(days=2)
-
-    # 下周 X
-    m = re.search(r"下周([一二三四五六日天])", text)
-    if m:
-        target = WEEKDAY_MAP[m.group(1)]
-        delta = (7 - today.weekday() + target) % 7 + 7
-        return today + timedelta(days=delta)
-
-    return today
+    return _resolve_date(parse_cache.scan(text), datetime.now())
 
 
 # -----------------------------
 # 时间解析（单点 / 时间段）
 # -----------------------------
 def parse_time(text: str):
-    t = text.replace(" ", "")
-
-    # 上午/下午判断
-    is_pm = any(k in t for k in ["下午", "晚上", "傍晚"])
-    is_am = any(k in t for k in ["上午", "早上", "清晨", "明早"])
-
-    def normalize(h):
-        h = int(h)
-        if is_pm and h < 12:
-            h += 12
-        return h
-
-    # ① 数字时间段：9点到10点 / 9:30-10:30
-    m = re.search(r"(\d+)(?:点|时|:|：)?(\d*)?\s*(?:到|-|至|~)\s*(\d+)(?:点|时|:|：)?(\d*)?", t)
-    if m:
-        h1, m1, h2, m2 = m.group(1), m.group(2), m.group(3), m.group(4)
-        h1 = normalize(h1)
-        h2 = normalize(h2)
-        m1 = int(m1) if m1 else 0
-        m2 = int(m2) if m2 else 0
-        return ("range", (h1, m1), (h2, m2))
-
-    # ② 中文时间段：九点到十点
-    m = re.search(r"([一二两三四五六七八九十]+)点(?:到|-|至)([一二两三四五六七八九十]+)点?", t)
-    if m:
-        h1 = cn2num(m.group(1))
-        h2 = cn2num(m.group(2))
-        return ("range", (normalize(h1), 0), (normalize(h2), 0))
-
-    # ③ 数字单点：9点 / 9:30
-    m = re.search(r"(\d+)(?:点|时|:|：)?(\d*)?", t)
-    if m:
-        h, m1 = normalize(m.group(1)), int(m.group(2)) if m.group(2) else 0
-        return ("single", (h, m1))
-
-    # ④ 中文单点：九点
-    m = re.search(r"([一二两三四五六七八九十]+)点", t)
-    if m:
-        h = cn2num(m.group(1))
-        return ("single", (normalize(h), 0))
-
-    return None
+    return _resolve_time(parse_cache.scan(text))
 
 
 # -----------------------------
-# 提取标题（此版本非常准！）
+# 部分识别结果：已经能确定的日期
 # -----------------------------
-def extract_title(text: str):
-    t = text
-
-    # 去掉日期词
-    t = re.sub(r"(今天|明天|后天|上午|下午|早上|晚上|傍晚|清晨|明早)", "", t)
-
-    # 去掉数字时间 & 时间段
-    t = re.sub(r"\d+(点|时|:|：)?\d*", "", t)
-    t = re.sub(r"(到|至|-|~)", "", t)
+def partial_day(text: str):
+    """
+    说到一半的识别文本里已经出现日期或时间时，返回 (日期, 小时 / None)；什么都还没有时返回 None。
+    只有时间没有日期时按今天算（与完整解析一致）。
+    部分文本几乎不会重复出现，不进解析缓存。
+    """
+    res = _scan(text)
+    if res.day_offset is None and res.weekday is None and res.start is None:
+        return None
+    day = _resolve_date(res, datetime.now()).date()
+    t = _resolve_time(res)
+    if t is None:
+        return day, None
+    hour = t[1][0]
+    if hour >= 24:
+        # 晚上十二点：日程在次日零点
+        day, hour = day + timedelta(days=1), hour - 24
+    return day, hour
 
-    # 去掉中文数字时间
-    t = re.sub(r"[一二两三四五六七八九十]+点", "", t)
 
-    return t.strip() if t.strip() else "日程"
+# -----------------------------
+# 提取标题
+# -----------------------------
+def extract_title(text: str):
+    return _resolve_title(text, parse_cache.scan(text))
 
 
 # -----------------------------
 # 主入口：解析日程
 # -----------------------------
-def parse_schedule_from_text_v2(text: str):
-
-    date = parse_date(text)
-    t = parse_time(text)
+def low_confidence_tokens(asr, res: Scan, min_conf: float = None, offset: int = 0) -> list:
+    """识别结果中置信度不足的日期 / 时段 / 时间 token：[{"token", "conf"}]；offset 为 res 对应文本在原文中的起点"""
+    min_conf = TIME_MIN_CONFIDENCE if min_conf is None else min_conf
+    low = []
+    for s, e in res.time_spans:
+        s, e = s + offset, e + offset
+        conf = asr.span_confidence(s, e)
+        if conf is not None and conf < min_conf:
+            low.append({"token": asr.text[s:e], "conf": round(conf, 3)})
+    return low
+
+
+def _has_date(res: Scan) -> bool:
+    return res.day_offset is not None or res.weekday is not None or res.recurrence is not None
+
+
+def _has_period(res: Scan) -> bool:
+    return res.period is not None or res.start_period is not None or res.end_period is not None
+
+
+def _after(t, prev: datetime):
+    """
+    没带时段词的时间早于同一天前一件事：与 resolve_time 的跨中午规则一样整体加 12 小时
+    （下午三点开会然后五点吃饭 → 17 点）
+    """
+    (h, m) = t[1]
+    if h >= prev.hour or h + 12 > 23:
+        return t
+    return (t[0],) + tuple((hh + 12, mm) if hh < 12 else (hh, mm) for hh, mm in t[1:])
+
+
+def _event(
+    text: str, res: Scan, now: datetime, asr=None, offset: int = 0, base: Scan = None, prev: datetime = None
+) -> dict:
+    """
+    一段文本的扫描结果 → {title, start, end[, recurrence]}，或 missing_fields。
+    base：同一句话里前一件事的扫描结果，本段没说日期时沿用它的日期 / 重复规则；
+    prev：前一件事的开始时间，本段沿用日期且没说时段词时，时间不早于它（见 _after）
+    """
+    t = _resolve_time(res)
 
     if t is None:
         return {
             "missing_fields": True,
-            "message": "我没有听清楚时间，请再说一次，例如：明天早上九点到十点。",
+            "message": MISSING_TIME_MESSAGE,
         }
 
+    if asr is not None:
+        low = low_confidence_tokens(asr, res, offset=offset)
+        if low:
+            return {
+                "missing_fields": True,
+                "message": MISSING_TIME_MESSAGE,
+                "low_confidence": low,
+            }
+
+    src = res if _has_date(res) or base is None else base
+    if src is not res and prev is not None and not _has_period(res):
+        t = _after(t, prev)
+    # 从当天零点加上钟点：晚上十二点（24:00）落到次日零点
+    midnight = _resolve_date(src, now).replace(hour=0, minute=0, second=0, microsecond=0)
     mode = t[0]
 
     # 时间段
     if mode == "range":
         (h1, m1), (h2, m2) = t[1], t[2]
-        start = date.replace(hour=h1, minute=m1, second=0)
-        end = date.replace(hour=h2, minute=m2, second=0)
+        start = midnight + timedelta(hours=h1, minutes=m1)
+        end = midnight + timedelta(hours=h2, minutes=m2)
 
     # 单点时间 → 默认 1 小时
     else:
         (h, m) = t[1]
-        start = date.replace(hour=h, minute=m, second=0)
+        start = midnight + timedelta(hours=h, minutes=m)
         end = start + timedelta(hours=1)
 
-    title = extract_title(text)
-
-    return {
-        "title": title,
+    event = {
+        "title": _resolve_title(text, res),
         "start": start,
         "end": end,
     }
+
+    rule = src.recurrence
+    if rule is not None:
+        if rule.freq == WEEKLY and not rule.weekdays:
+            # “每周十点例会”：按第一次所在的星期几
+            rule = Recurrence(WEEKLY, (start.weekday(),))
+        # 没说从哪天开始：第一次为现在之后最近的一次
+        explicit = src.day_offset is not None or src.weekday is not None
+        first = next(expand(start, end, rule, window_start=start if explicit else now), None)
+        if first is not None:
+            event["start"], event["end"] = first
+        event["recurrence"] = rule
+
+    return event
+
+
+def parse_schedule_from_text_v2(text):
+    """
+    text 可以是字符串，也可以是带逐词置信度的识别结果（speech.asr_vosk.ASRResult）：
+    后者的日期 / 时段 / 时间 token 置信度不足时按没听清处理，不再往下走冲突检查和创建。
+    整句只当作一件事；一句话里说了几件事用 parse_schedule_items。
+    """
+    asr = None
+    if hasattr(text, "span_confidence"):
+        asr, text = text, text.text
+
+    return _event(text, parse_cache.scan(text), datetime.now(), asr)
+
+
+# -----------------------------
+# 一句话里的多件事 / 重复日程
+# -----------------------------
+# 分句：标点和“然后 / 还有 / 另外”；没有时间的分句并入前一件事（或作为下一件事的前缀）
+_CLAUSE_SEP_RE = re.compile(r"[，,；;。！!？?\n]+|然后|还有|另外")
+
+
+def _clauses(text: str) -> list:
+    """[(起点, 终点)]，含分隔符前的内容"""
+    out, pos = [], 0
+    for m in _CLAUSE_SEP_RE.finditer(text):
+        out.append((pos, m.start()))
+        pos = m.end()
+    out.append((pos, len(text)))
+    return [(s, e) for s, e in out if text[s:e].strip()]
+
+
+def parse_schedule_items(text):
+    """
+    “明天上午十点开会，下午三点看牙” → 两件事，第二件沿用第一件的日期；
+    “每周一三五上午九点站会” → 一件带 recurrence（nlp.recurrence.Recurrence）的事，start / end 为第一次。
+    返回 {"events": [{title, start, end[, recurrence]}]}；任何一件事缺时间或时间词置信度不足时，
+    与 parse_schedule_from_text_v2 一样返回 missing_fields（整句请用户重说）。
+    text 同样可以是 ASRResult。
+    """
+    asr = None
+    if hasattr(text, "span_confidence"):
+        asr, text = text, text.text
+
+    now = datetime.now()
+    clauses = _clauses(text)
+    if len(clauses) <= 1:
+        event = _event(text, parse_cache.scan(text), now, asr)
+        return event if event.get("missing_fields") else {"events": [event]}
+
+    groups, lead = [], None
+    for s, e in clauses:
+        if _scan(text[s:e]).start is None:
+            if groups:
+                groups[-1][1] = e
+            elif lead is None:
+                lead = s
+        else:
+            groups.append([s if lead is None else lead, e])
+            lead = None
+
+    if not groups:
+        return _event(text, parse_cache.scan(text), now, asr)
+
+    events, base = [], None
+    for s, e in groups:
+        chunk = text[s:e]
+        res = _scan(chunk)
+        prev = events[-1]["start"] if events else None
+        event = _event(chunk, res, now, asr, offset=s, base=base, prev=prev)
+        if event.get("missing_fields"):
+            return event
+        if _has_date(res):
+            base = res
+        events.append(event)
+    return {"events": events}
@@ -0,0 +1,82 @@
+# backend/nlp/recurrence.py
+# 重复日程：每天 / 工作日 / 每周一三五 / 每月十五号
+#
+# 解析器只记录规则（Recurrence）和第一次的时间，不展开；需要具体日期时由 expand 按请求的时间窗
+# 逐个生成，调用方用 islice 截取前若干个即可。没给时间窗终点时最多往后看 HORIZON_DAYS 天，
+# 永远不会命中的规则（空的星期列表、不存在的几号）也不会无限循环。
+
+import os
+from dataclasses import dataclass
+from datetime import date as date_cls, datetime, timedelta
+
+DAILY = "daily"
+WEEKLY = "weekly"
+MONTHLY = "monthly"
+
+WEEKDAY_NAMES = "一二三四五六日"
+RRULE_DAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+# 口述重复日程时默认安排多远（天）/ 最多展开多少次
+WINDOW_DAYS = int(os.environ.get("RECUR_WINDOW_DAYS", 28))
+MAX_OCCURRENCES = int(os.environ.get("RECUR_MAX_OCCURRENCES", 50))
+# 没有时间窗终点时最多往后找多少天（一年内必定能碰到每个合法的几号 / 星期几）
+HORIZON_DAYS = 366
+
+
+@dataclass(frozen=True)
+class Recurrence:
+    freq: str
+    weekdays: tuple = ()   # WEEKLY：0 = 周一
+    monthday: int = None   # MONTHLY：几号（当月没有这一天时跳过）
+
+    def matches(self, day: date_cls) -> bool:
+        if self.freq == DAILY:
+            return True
+        if self.freq == WEEKLY:
+            return day.weekday() in self.weekdays
+        return day.day == self.monthday
+
+    def dates(self, first: date_cls, last: date_cls):
+        """first ~ last（含）之间符合规则的日期，惰性生成"""
+        for i in range((last - first).days + 1):
+            day = first + timedelta(days=i)
+            if self.matches(day):
+                yield day
+
+    def describe(self) -> str:
+        if self.freq == DAILY:
+            return "每天"
+        if self.freq == WEEKLY:
+            if self.weekdays == (0, 1, 2, 3, 4):
+                return "每个工作日"
+            return "每周" + "".join(WEEKDAY_NAMES[d] for d in self.weekdays)
+        return f"每月{self.monthday}号"
+
+    def to_rrule(self) -> str:
+        """RFC 5545 RRULE（不含 DTSTART / UNTIL）"""
+        if self.freq == DAILY:
+            return "FREQ=DAILY"
+        if self.freq == WEEKLY:
+            return "FREQ=WEEKLY;BYDAY=" + ",".join(RRULE_DAYS[d] for d in self.weekdays)
+        return f"FREQ=MONTHLY;BYMONTHDAY={self.monthday}"
+
+    def to_dict(self) -> dict:
+        return {"rule": self.describe(), "rrule": self.to_rrule()}
+
+
+def expand(start: datetime, end: datetime, rule: Recurrence, window_start: datetime = None, window_end: datetime = None):
+    """
+    第一次为 start ~ end 的重复日程 → 落在 [window_start, window_end) 内的每一次 (start, end)，惰性生成。
+    window_start 默认为第一次的开始时间（已经过去的不再安排）；window_end 为 None 时看 HORIZON_DAYS 天。
+    """
+    window_start = max(window_start or start, start)
+    if window_end is None:
+        window_end = window_start + timedelta(days=HORIZON_DAYS)
+    duration = end - start
+    at = start.time()
+    for day in rule.dates(window_start.date(), window_end.date()):
+        s = datetime.combine(day, at)
+        if s >= window_end:
+            return
+        if s >= window_start:
+            yield s, s + duration
@@ -0,0 +1,159 @@
+# backend/speech/asr_pool.py
+# Vosk 识别工作池：把 CPU 密集的解码从事件循环挪到工作线程
+#
+# - 线程而非进程：Kaldi 经 cffi 调用时会释放 GIL，多线程即可跑满多核，
+#   且所有线程共享同一个已加载的 Model，不需要每个进程各加载一份
+# - 识别器预热复用：用完 Reset() 放回空闲队列，省掉每次创建 KaldiRecognizer 的开销
+# - 背压：排队数量有上限，等不到名额时抛出 ASRBusyError，由接口层返回 503
+# - 语法约束识别（speech/grammar.py，ASR_GRAMMAR=1 开启）：两种识别器各自预热一份，
+#   置信度不足时同一个任务里接着用开放词表识别器重识别
+# - VAD（speech/vad.py，ASR_VAD=0 关闭）：整段识别前切掉首尾静音，剩下的（第一次开口到最后一次停声）
+#   作为一个任务解码。不按停顿切开：切开后每段都要占一个排队名额，段数一多就会被自己的分段挤成 503，
+#   而且每段重新开始解码，语言模型的上下文断在句中（“明天下午 / 三点开会”）
+
+import asyncio
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+from monitor.metrics import metrics
+from speech.asr_vosk import ASRResult, new_recognizer, recognize_pcm, StreamingTranscriber
+from speech.grammar import GRAMMAR_ENABLED
+from speech.vad import VAD_ENABLED, speech_regions
+
+SAMPLE_RATE = 16000
+BYTES_PER_SECOND = SAMPLE_RATE * 2
+
+
+class ASRBusyError(RuntimeError):
+    """识别队列已满"""
+
+
+class RecognizerPool:
+    def __init__(
+        self,
+        workers: int | None = None,
+        max_queue: int | None = None,
+        queue_timeout: float = 2.0,
+        grammar: bool = GRAMMAR_ENABLED,
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue if max_queue is not None else self.workers * 2
+        self.queue_timeout = queue_timeout
+        self.grammar = grammar
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="asr"
+        )
+        # 同时在途（执行中 + 排队中）的任务上限
+        self._slots = asyncio.Semaphore(self.workers + self.max_queue)
+        self._idle = queue.SimpleQueue()
+        self._idle_grammar = queue.SimpleQueue()
+        self.pending = 0
+
+    # -------------------------
+    # 预热识别器
+    # -------------------------
+    def warm_up(self):
+        """为每个工作线程准备一个可直接使用的识别器"""
+        for _ in range(self.workers - self._idle.qsize()):
+            self._idle.put(new_recognizer(SAMPLE_RATE))
+        if self.grammar:
+            for _ in range(self.workers - self._idle_grammar.qsize()):
+                self._idle_grammar.put(new_recognizer(SAMPLE_RATE, grammar=True))
+
+    def acquire_recognizer(self, grammar: bool = False):
+        try:
+            return (self._idle_grammar if grammar else self._idle).get_nowait()
+        except queue.Empty:
+            return new_recognizer(SAMPLE_RATE, grammar=grammar)
+
+    def release_recognizer(self, rec, grammar: bool = False):
+        rec.Reset()
+        (self._idle_grammar if grammar else self._idle).put(rec)
+
+    # -------------------------
+    # 提交任务
+    # -------------------------
+    async def run(self, fn, *args):
+        """在工作线程里执行 fn(*args)，返回可 await 的结果；排队超时抛 ASRBusyError"""
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise ASRBusyError(f"识别队列已满（{self.pending} 个任务在途）")
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+            self._slots.release()
+
+    async def recognize(self, pcm: bytes, vad: bool = VAD_ENABLED) -> ASRResult:
+        """识别整段 PCM，返回带逐词时间 / 置信度的结果（时间以整段录音为准）"""
+        if not vad:
+            return await self.run(self._recognize, pcm, 0.0)
+
+        regions = speech_regions(pcm)
+        metrics.inc("vad_input_ms_total", len(pcm) // 32)
+        if not regions:
+            # 没找到语音（极低音量等）：不冒险丢掉，整段交给识别器
+            metrics.inc("vad_speech_ms_total", len(pcm) // 32)
+            return await self.run(self._recognize, pcm, 0.0)
+
+        s, e = regions[0][0], regions[-1][1]
+        metrics.inc("vad_speech_ms_total", (e - s) // 32)
+        return await self.run(self._recognize, pcm[s:e], s / BYTES_PER_SECOND)
+
+    async def transcribe(self, pcm: bytes, vad: bool = VAD_ENABLED) -> str:
+        return str(await self.recognize(pcm, vad))
+
+    def _recognize(self, pcm: bytes, offset: float) -> ASRResult:
+        if self.grammar:
+            rec, fallback = self.acquire_recognizer(grammar=True), self.acquire_recognizer()
+            try:
+                return recognize_pcm(pcm, SAMPLE_RATE, rec=rec, fallback_rec=fallback, offset=offset)
+            finally:
+                self.release_recognizer(rec, grammar=True)
+                self.release_recognizer(fallback)
+
+        rec = self.acquire_recognizer()
+        try:
+            return recognize_pcm(pcm, SAMPLE_RATE, rec=rec, offset=offset)
+        finally:
+            self.release_recognizer(rec)
+
+    # -------------------------
+    # 流式会话
+    # -------------------------
+    def open_stream(self, sample_rate: int = SAMPLE_RATE) -> StreamingTranscriber:
+        """流式会话也优先借用预热好的识别器，会话结束后调用 close_stream 归还"""
+        if sample_rate != SAMPLE_RATE:
+            return StreamingTranscriber(sample_rate)
+        if self.grammar:
+            return StreamingTranscriber(
+                sample_rate,
+                rec=self.acquire_recognizer(grammar=True),
+                fallback_rec=self.acquire_recognizer(),
+            )
+        return StreamingTranscriber(sample_rate, rec=self.acquire_recognizer())
+
+    def close_stream(self, transcriber: StreamingTranscriber):
+        if transcriber.sample_rate != SAMPLE_RATE:
+            return
+        if transcriber.fallback_rec is not None:
+            self.release_recognizer(transcriber.rec, grammar=True)
+            self.release_recognizer(transcriber.fallback_rec)
+        else:
+            self.release_recognizer(transcriber.rec)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+asr_pool = RecognizerPool(
+    workers=int(os.environ.get("ASR_WORKERS", 0)) or None,
+    max_queue=int(os.environ["ASR_MAX_QUEUE"]) if "ASR_MAX_QUEUE" in os.environ else None,
+    queue_timeout=float(os.environ.get("ASR_QUEUE_TIMEOUT", 2.0)),
+)
@@ -2,52 +2,273 @@
 
 import os
 import json
+import logging
 import wave
-from vosk import Model, KaldiRecognizer
+import threading
+
+from monitor.metrics import metrics
+from speech.grammar import confident, grammar_json
+
+log = logging.getLogger(__name__)
+
+# 没有识别出任何文字时返回的文本
+RECOGNITION_FAILED = "（识别失败）"
 
 # -------------------------
-# 加载模型（只加载一次）
+# 加载模型（懒加载，只加载一次）
 # -------------------------
+# 导入本模块不再触发模型加载：服务启动后由后台任务调用 load_model() 预热，
+# 在此之前到达的识别请求会在 load_model() 处等待加载完成。
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 MODEL_PATH = os.path.join(BASE_DIR, "speech", "vosk-model")
 
-print(">>> 加载 Vosk 中文模型中...")
-model = Model(MODEL_PATH)
-print(">>> Vosk 模型加载完成")
+_model = None
+_model_lock = threading.Lock()
+
+
+def load_model():
+    global _model
+    if _model is not None:
+        return _model
+
+    with _model_lock:
+        if _model is None:
+            from vosk import Model
+
+            log.info("加载 Vosk 中文模型中...")
+            _model = Model(MODEL_PATH)
+            log.info("Vosk 模型加载完成")
+    return _model
+
+
+def is_model_loaded() -> bool:
+    return _model is not None
+
+
+# -------------------------
+# 结构化识别结果
+# -------------------------
+class Word:
+    __slots__ = ("word", "start", "end", "conf")
+
+    def __init__(self, word: str, start: float = 0.0, end: float = 0.0, conf: float = 1.0):
+        self.word = word
+        self.start = start
+        self.end = end
+        self.conf = conf
+
+    @classmethod
+    def from_vosk(cls, d: dict, offset: float = 0.0) -> "Word":
+        return cls(d.get("word", ""), d.get("start", 0.0) + offset, d.get("end", 0.0) + offset, d.get("conf", 1.0))
+
+    def to_dict(self) -> dict:
+        return {"word": self.word, "start": round(self.start, 2), "end": round(self.end, 2), "conf": round(self.conf, 3)}
+
+
+class ASRResult:
+    """
+    识别结果：文本 + 逐词时间 / 置信度（SetWords(True) 的 result 字段）。
+    有逐词结果时 text 就是各词以空格连接，词在 text 中的字符位置可以直接算出，
+    解析器据此查看时间相关 token 的置信度（span_confidence）。
+    str(result) 为文本，没有识别出内容时为 RECOGNITION_FAILED。
+    """
+
+    __slots__ = ("text", "words")
+
+    def __init__(self, words=(), text: str = None):
+        self.words = list(words)
+        self.text = " ".join(w.word for w in self.words) if text is None else text.strip()
+
+    def __str__(self) -> str:
+        return self.text or RECOGNITION_FAILED
+
+    def __bool__(self) -> bool:
+        return bool(self.text)
+
+    def confident(self) -> bool:
+        return confident(self.words)
+
+    def span_confidence(self, start: int, end: int):
+        """text[start:end] 覆盖到的词里最低的置信度；没有逐词结果时返回 None"""
+        if not self.words:
+            return None
+        lowest, pos = None, 0
+        for w in self.words:
+            w_end = pos + len(w.word)
+            if pos < end and w_end > start:
+                lowest = w.conf if lowest is None else min(lowest, w.conf)
+            pos = w_end + 1
+        return lowest
+
+    def to_dict(self) -> dict:
+        return {"text": self.text, "words": [w.to_dict() for w in self.words]}
 
 
 # -------------------------
 # 识别 WAV 文件（16kHz / mono）
 # -------------------------
-def transcribe_audio_file(wav_path: str) -> str:
+def recognize_audio_file(wav_path: str, grammar: bool = False) -> ASRResult:
     """
-    从 WAV 文件路径识别语音
+    从 WAV 文件路径识别语音，返回带逐词时间 / 置信度的结果
     WAV 格式要求：
         - PCM
         - Mono
         - 16000 Hz
-        （在 main.py 转换时已经保证）
+    grammar=True 时先用语法约束识别（见 speech/grammar.py），置信度不足再用开放词表
     """
     wf = wave.open(wav_path, "rb")
 
-    rec = KaldiRecognizer(model, wf.getframerate())
+    if grammar:
+        try:
+            rate = wf.getframerate()
+            pcm = wf.readframes(wf.getnframes())
+        finally:
+            wf.close()
+        return recognize_pcm(
+            pcm, rate,
+            rec=new_recognizer(rate, grammar=True),
+            fallback_rec=new_recognizer(rate),
+        )
+
+    rec = new_recognizer(wf.getframerate())
+
+    def chunks():
+        while True:
+            data = wf.readframes(4000)
+            if len(data) == 0:
+                break
+            yield data
+
+    try:
+        return _recognize(rec, chunks())
+    finally:
+        wf.close()
+
+
+def transcribe_audio_file(wav_path: str, grammar: bool = False) -> str:
+    """只要文本时的简写"""
+    return str(recognize_audio_file(wav_path, grammar))
+
+
+# -------------------------
+# 识别内存中的 PCM（16kHz / mono / s16le）
+# -------------------------
+def _pcm_chunks(pcm: bytes):
+    view = memoryview(pcm)
+    return (bytes(view[i:i + 8000]) for i in range(0, len(view), 8000))
+
+
+def recognize_pcm(pcm: bytes, sample_rate: int = 16000, rec=None, fallback_rec=None, offset: float = 0.0) -> ASRResult:
+    """
+    直接识别内存中的 PCM 数据，不经过任何文件。
+    按 4000 帧（8000 字节）切片喂给识别器，与文件识别保持一致。
+    rec: 可传入已预热的识别器（见 asr_pool），不传则新建
+    fallback_rec: rec 为语法约束识别器时传入开放词表识别器，置信度不足就用它重新识别
+    offset: 这段音频在整段录音中的起始秒数，加到逐词时间上
+    """
+    if rec is None:
+        rec = new_recognizer(sample_rate)
+
+    result = _recognize(rec, _pcm_chunks(pcm), offset)
+    if fallback_rec is None:
+        return result
+
+    if result.confident():
+        metrics.inc("asr_grammar_total", result="accepted")
+        return result
+    metrics.inc("asr_grammar_total", result="fallback")
+    log.debug("语法约束识别置信度不足（%s），改用开放词表", result.text)
+    return _recognize(fallback_rec, _pcm_chunks(pcm), offset)
+
+
+def transcribe_pcm(pcm: bytes, sample_rate: int = 16000, rec=None, fallback_rec=None) -> str:
+    """只要文本时的简写，参数同 recognize_pcm"""
+    return str(recognize_pcm(pcm, sample_rate, rec=rec, fallback_rec=fallback_rec))
+
+
+def new_recognizer(sample_rate: int = 16000, grammar: bool = False):
+    """grammar=True：识别范围限定在日程领域的短语列表（speech/grammar.py）"""
+    from vosk import KaldiRecognizer
+
+    if grammar:
+        rec = KaldiRecognizer(load_model(), sample_rate, grammar_json())
+    else:
+        rec = KaldiRecognizer(load_model(), sample_rate)
     rec.SetWords(True)
+    return rec
+
+
+def _result_words(res: dict, offset: float = 0.0) -> list:
+    return [Word.from_vosk(d, offset) for d in res.get("result", [])]
 
-    text_result = ""
 
-    while True:
-        data = wf.readframes(4000)
-        if len(data) == 0:
-            break
+def _recognize(rec, chunks, offset: float = 0.0) -> ASRResult:
+    texts, words = [], []
+
+    for data in chunks:
         if rec.AcceptWaveform(data):
             res = json.loads(rec.Result())
-            text_result += res.get("text", "") + " "
+            texts.append(res.get("text", ""))
+            words += _result_words(res, offset)
 
     # Final result
     res = json.loads(rec.FinalResult())
-    text_result += res.get("text", "")
+    texts.append(res.get("text", ""))
+    words += _result_words(res, offset)
+
+    if words:
+        return ASRResult(words)
+    return ASRResult(text=" ".join(t for t in texts if t))
+
+
+# -------------------------
+# 流式识别（边收音频边解码）
+# -------------------------
+class StreamingTranscriber:
+    """
+    增量识别器：音频分片一到就喂给 KaldiRecognizer，
+    说话过程中持续产出 partial，说完只需一次 FinalResult()，无需整段重解码。
+    输入要求：s16le PCM / Mono（采样率由 sample_rate 指定）
+    fallback_rec：rec 为语法约束识别器时传入开放词表识别器；会话内的音频会留一份，
+    结束时置信度不足就用它整段重新识别
+    """
+
+    def __init__(self, sample_rate: int = 16000, rec=None, fallback_rec=None):
+        self.sample_rate = sample_rate
+        self.rec = rec if rec is not None else new_recognizer(sample_rate)
+        self.fallback_rec = fallback_rec
+        self._segments = []
+        self._words = []
+        self._audio = [] if fallback_rec is not None else None
+
+    def accept(self, pcm: bytes) -> dict:
+        """喂入一段 PCM，返回 {"type": "segment" | "partial", "text": 当前累计文本}"""
+        if self._audio is not None:
+            self._audio.append(pcm)
+        if self.rec.AcceptWaveform(pcm):
+            res = json.loads(self.rec.Result())
+            text = res.get("text", "")
+            self._words += _result_words(res)
+            if text:
+                self._segments.append(text)
+            return {"type": "segment", "text": " ".join(self._segments)}
+
+        partial = json.loads(self.rec.PartialResult()).get("partial", "")
+        return {"type": "partial", "text": " ".join(self._segments + [partial]).strip()}
 
-    wf.close()
+    def finish(self) -> ASRResult:
+        """音频结束：取出解码器里剩余的结果，返回完整的识别结果"""
+        res = json.loads(self.rec.FinalResult())
+        text = res.get("text", "")
+        self._words += _result_words(res)
+        if text:
+            self._segments.append(text)
 
-    text_result = text_result.strip()
-    return text_result if text_result else "（识别失败）"
\ No newline at end of file
+        result = ASRResult(self._words) if self._words else ASRResult(text=" ".join(self._segments))
+        if self.fallback_rec is not None:
+            if not result.confident():
+                metrics.inc("asr_grammar_total", result="fallback")
+                log.debug("语法约束识别置信度不足（%s），改用开放词表", result.text)
+                return _recognize(self.fallback_rec, _pcm_chunks(b"".join(self._audio)))
+            metrics.inc("asr_grammar_total", result="accepted")
+        return result
@@ -0,0 +1,160 @@
+# backend/speech/audio_decode.py
+# 内存内音频解码：上传的 webm/ogg/mp3/wav 字节 → 16kHz mono s16le PCM
+#
+# - WAV：纯 Python 解析 + 重采样，不落盘、不起进程
+# - 其它编码（opus/vorbis/mp3 等，前端上传的 webm 都走这里）：每个请求一个 ffmpeg 进程，
+#   全程 stdin/stdout 传输，同样不写临时文件；进程提前一个请求拉起备用，启动开销不在请求路径上
+
+import io
+import logging
+import subprocess
+import threading
+import wave
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    # audioop 在 3.11+ 会给出弃用警告，3.13 已移除；缺失时 WAV 也走 ffmpeg
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        import audioop
+except ImportError:
+    audioop = None
+
+TARGET_RATE = 16000
+TARGET_WIDTH = 2  # s16le
+
+log = logging.getLogger(__name__)
+
+
+class AudioDecodeError(RuntimeError):
+    pass
+
+
+# -------------------------
+# 格式嗅探
+# -------------------------
+def sniff_format(data: bytes) -> str:
+    head = data[:12]
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return "wav"
+    if head[:4] == b"\x1a\x45\xdf\xa3":
+        return "webm"
+    if head[:4] == b"OggS":
+        return "ogg"
+    if head[:3] == b"ID3" or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+        return "mp3"
+    return "unknown"
+
+
+# -------------------------
+# WAV：内存内解析 + 转换
+# -------------------------
+def _decode_wav(data: bytes) -> bytes:
+    with wave.open(io.BytesIO(data), "rb") as wf:
+        channels = wf.getnchannels()
+        width = wf.getsampwidth()
+        rate = wf.getframerate()
+        pcm = wf.readframes(wf.getnframes())
+
+    if (channels, width, rate) == (1, TARGET_WIDTH, TARGET_RATE):
+        return pcm
+
+    if audioop is None:
+        raise AudioDecodeError("audioop 不可用，无法在进程内转换 WAV")
+
+    if width != TARGET_WIDTH:
+        if width == 1:
+            # 8bit WAV 是无符号的
+            pcm = audioop.bias(pcm, 1, -128)
+        pcm = audioop.lin2lin(pcm, width, TARGET_WIDTH)
+
+    if channels == 2:
+        pcm = audioop.tomono(pcm, TARGET_WIDTH, 0.5, 0.5)
+    elif channels != 1:
+        raise AudioDecodeError(f"不支持的声道数：{channels}")
+
+    if rate != TARGET_RATE:
+        pcm, _ = audioop.ratecv(pcm, TARGET_WIDTH, 1, rate, TARGET_RATE, None)
+
+    return pcm
+
+
+# -------------------------
+# 其它编码：ffmpeg 管道（备用进程）
+# -------------------------
+class FFmpegPipeWorker:
+    """
+    ffmpeg 一个进程只能处理一路输入（读到输入结尾就退出），没法常驻复用，每个请求仍是一个新进程。
+    这里始终保留一个“已启动、等待 stdin”的备用进程：请求到来时直接写入数据，同时在后台拉起下一个，
+    进程启动开销就不在请求的关键路径上。补位固定用一个后台线程，不为每个请求新开线程。
+    并发请求多于一个时，后到的请求拿不到备用进程，自己现场启动。
+    """
+
+    def __init__(self, sample_rate: int = TARGET_RATE):
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        self._standby = None
+        self._refiller = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ffmpeg-standby")
+
+    def _spawn(self):
+        return subprocess.Popen(
+            [
+                "ffmpeg",
+                "-loglevel", "error",
+                "-i", "pipe:0",
+                "-ac", "1",
+                "-ar", str(self.sample_rate),
+                "-f", "s16le",
+                "pipe:1",
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+
+    def _take(self):
+        with self._lock:
+            proc, self._standby = self._standby, None
+        if proc is None or proc.poll() is not None:
+            proc = self._spawn()
+        return proc
+
+    def _refill(self):
+        with self._lock:
+            if self._standby is None:
+                self._standby = self._spawn()
+
+    def warm_up(self):
+        self._refill()
+
+    def decode(self, data: bytes) -> bytes:
+        proc = self._take()
+        self._refiller.submit(self._refill)
+
+        pcm, err = proc.communicate(data)
+        if proc.returncode != 0:
+            raise AudioDecodeError(f"ffmpeg 解码失败：{err.decode(errors='ignore').strip()}")
+        return pcm
+
+    def close(self):
+        self._refiller.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            proc, self._standby = self._standby, None
+        if proc and proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+
+ffmpeg_worker = FFmpegPipeWorker()
+
+
+def decode_to_pcm(data: bytes) -> bytes:
+    """上传音频字节 → 16kHz mono s16le PCM（全程内存）"""
+    if sniff_format(data) == "wav":
+        try:
+            return _decode_wav(data)
+        except (wave.Error, AudioDecodeError) as e:
+            log.warning("WAV 进程内解码失败，改用 ffmpeg：%s", e)
+
+    return ffmpeg_worker.decode(data)
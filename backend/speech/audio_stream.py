@@ -0,0 +1,98 @@
+# backend/speech/audio_stream.py
+# 流式音频解码：WebSocket 收到的分片 → 16kHz mono s16le PCM
+
+import asyncio
+
+# 每次向识别器投喂的字节数（4000 帧 * 2 字节，与 transcribe_audio_file 保持一致）
+PCM_CHUNK_BYTES = 8000
+
+
+class PCMStreamDecoder:
+    """
+    客户端直接发送 s16le PCM 时使用：不做转码，只负责按块转发。
+    接口与 FFmpegStreamDecoder 保持一致：start / feed / close / abort / pcm_chunks
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    async def start(self):
+        return self
+
+    async def feed(self, chunk: bytes):
+        if chunk:
+            await self._queue.put(chunk)
+
+    async def close(self):
+        await self._queue.put(None)
+
+    async def abort(self):
+        await self.close()
+
+    async def pcm_chunks(self):
+        while True:
+            chunk = await self._queue.get()
+            if chunk is None:
+                return
+            yield chunk
+
+
+class FFmpegStreamDecoder:
+    """
+    浏览器 MediaRecorder 产出的 webm/ogg 分片无法直接喂给 Vosk，
+    这里为整个会话常驻一个 ffmpeg 进程：stdin 持续写入分片，stdout 持续读出 PCM。
+    """
+
+    def __init__(self, sample_rate: int = 16000):
+        self.sample_rate = sample_rate
+        self._proc = None
+
+    async def start(self):
+        self._proc = await asyncio.create_subprocess_exec(
+            "ffmpeg",
+            "-loglevel", "quiet",
+            # 尽量少探测，拿到头部就开始输出，降低首个 partial 的延迟
+            "-probesize", "4096",
+            "-analyzeduration", "0",
+            "-i", "pipe:0",
+            "-ac", "1",
+            "-ar", str(self.sample_rate),
+            "-f", "s16le",
+            "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        return self
+
+    async def feed(self, chunk: bytes):
+        if not chunk:
+            return
+        self._proc.stdin.write(chunk)
+        await self._proc.stdin.drain()
+
+    async def close(self):
+        """输入结束：关闭 stdin，让 ffmpeg 把剩余 PCM 刷出来"""
+        if self._proc and not self._proc.stdin.is_closing():
+            self._proc.stdin.close()
+
+    async def abort(self):
+        """客户端中途断开：直接结束进程"""
+        if self._proc and self._proc.returncode is None:
+            self._proc.kill()
+            await self._proc.wait()
+
+    async def pcm_chunks(self):
+        while True:
+            data = await self._proc.stdout.read(PCM_CHUNK_BYTES)
+            if not data:
+                break
+            yield data
+        await self._proc.wait()
+
+
+def create_stream_decoder(fmt: str):
+    """根据客户端声明的格式选择解码器：pcm16 直通，其余交给 ffmpeg"""
+    if fmt == "pcm16":
+        return PCMStreamDecoder()
+    return FFmpegStreamDecoder()
@@ -0,0 +1,153 @@
+# backend/speech/grammar.py
+# 语法约束识别（ASR_GRAMMAR=1 开启）：用日程领域的词表构造 Vosk 短语列表
+#
+# 词表来自解析器自己的表（日期词、星期、时段词、中文数字、点 / 半 / 分 / 到），
+# 加上可扩展的标题词表（speech/title_lexicon.txt，或 ASR_TITLE_LEXICON 指定的文件）
+# 和候选确认回复（“好” / “第二个” / “算了”）。
+# Vosk 用这些短语估一个二元语言模型，搜索空间比开放词表小得多，解码更快，领域内的词也更不容易听错。
+# 说了词表外的内容时置信度会明显偏低（或出现 [unk]），此时由调用方改用开放词表重新识别。
+
+import json
+import logging
+import os
+from functools import lru_cache
+
+from nlp.confirm import ACCEPT_WORDS, REJECT_WORDS
+from nlp.parser_v2 import CN_NUM, DATE_OFFSET, PERIOD_WORDS, WEEKDAY_MAP
+
+log = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_WORDS_PATH = os.path.join(BASE_DIR, "vosk-model", "graph", "words.txt")
+DEFAULT_LEXICON = os.path.join(BASE_DIR, "title_lexicon.txt")
+
+GRAMMAR_ENABLED = os.environ.get("ASR_GRAMMAR", "0") == "1"
+# 逐词置信度的平均值低于此值就回退到开放词表
+MIN_CONFIDENCE = float(os.environ.get("ASR_GRAMMAR_MIN_CONF", 0.65))
+
+UNK = "[unk]"
+SEP_WORDS = ("到", "至")
+MINUTES = (5, 10, 15, 20, 25, 30, 40, 45, 50)
+
+
+# -------------------------
+# 词表
+# -------------------------
+def num2cn(n: int) -> str:
+    """0 ~ 59 → 中文数字（与解析器的 cn2num 互逆）"""
+    digits = {v: k for k, v in CN_NUM.items() if v < 10 and k not in ("〇", "两")}
+    if n < 10:
+        return digits[n]
+    tens, ones = divmod(n, 10)
+    return ("" if tens == 1 else digits[tens]) + "十" + (digits[ones] if ones else "")
+
+
+def load_titles() -> list:
+    titles = []
+    for path in (DEFAULT_LEXICON, os.environ.get("ASR_TITLE_LEXICON")):
+        if not path or not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#") and line not in titles:
+                    titles.append(line)
+    return titles
+
+
+def date_words() -> list:
+    words = list(DATE_OFFSET)
+    for w in WEEKDAY_MAP:
+        words += [f"下周{w}", f"下星期{w}", f"周{w}", f"星期{w}"]
+    words += ["周末", "下周末", "每周末"]
+    return words
+
+
+def time_phrases() -> list:
+    """一点 / 十点半 / 八点二十五分 / 两点到三点 …（12 小时制 + 下午常用的 24 小时制）"""
+    hours = [num2cn(h) for h in range(1, 24)] + ["两"]
+    out = []
+    for h in hours:
+        out += [[h, "点"], [h, "点", "半"]]
+        out += [[h, "点", num2cn(m), "分"] for m in MINUTES]
+    for h in range(1, 23):
+        for sep in SEP_WORDS:
+            out.append([num2cn(h), "点", sep, num2cn(h + 1), "点"])
+    return out
+
+
+def phrases(titles=None) -> list:
+    """全部短语，每个短语是一串词"""
+    titles = load_titles() if titles is None else titles
+    dates = date_words()
+    out = [[w] for w in dates + list(PERIOD_WORDS) + titles + list(SEP_WORDS)]
+    out += [[d, p] for d in dates for p in PERIOD_WORDS]
+    out += time_phrases()
+    # 完整句式：把日期 / 时段 / 时间段 / 标题串起来，让二元模型学到词与词之间的衔接
+    for i, t in enumerate(titles):
+        d, p, h = dates[i % len(dates)], PERIOD_WORDS[i % len(PERIOD_WORDS)], 1 + i % 11
+        out.append([d, p, num2cn(h), "点", "到", num2cn(h + 1), "点", t])
+        out.append([d, p, num2cn(h), "点", t])
+    # 冲突候选的确认回复
+    out += [[w] for w in ACCEPT_WORDS + REJECT_WORDS if not w.isascii()]
+    out += [["第", num2cn(k), "个"] for k in range(1, 6)]
+    return out
+
+
+@lru_cache(maxsize=1)
+def model_vocabulary():
+    """模型词表（graph/words.txt）；没有时返回 None，不做过滤"""
+    if not os.path.exists(MODEL_WORDS_PATH):
+        return None
+    with open(MODEL_WORDS_PATH, encoding="utf-8") as f:
+        return frozenset(line.split()[0] for line in f if line.strip())
+
+
+def _to_model_words(words, vocab) -> list:
+    """词表里没有的词拆成单字；单字也不在词表里则丢弃整个短语"""
+    out = []
+    for w in words:
+        if w in vocab:
+            out.append(w)
+        elif all(c in vocab for c in w):
+            out.extend(w)
+        else:
+            return None
+    return out
+
+
+@lru_cache(maxsize=1)
+def grammar_json() -> str:
+    """传给 KaldiRecognizer 的短语列表（JSON 字符串）"""
+    vocab = model_vocabulary()
+    seen, out = set(), []
+    for words in phrases():
+        if vocab is None:
+            # 不知道模型的分词：整词和逐字两种写法都给，不认识的词 Vosk 会忽略
+            candidates = [words, [c for w in words for c in w]]
+        else:
+            candidates = [_to_model_words(words, vocab)]
+        for c in candidates:
+            text = " ".join(c) if c else ""
+            if text and text not in seen:
+                seen.add(text)
+                out.append(text)
+    out.append(UNK)
+    log.info("语法约束识别：%d 条短语", len(out))
+    return json.dumps(out, ensure_ascii=False)
+
+
+# -------------------------
+# 置信度
+# -------------------------
+def confident(words, min_conf: float = None) -> bool:
+    """
+    words：逐词识别结果（speech.asr_vosk.Word，有 word / conf 属性）。
+    没有词、出现 [unk] 或平均置信度不足（默认 MIN_CONFIDENCE）时返回 False（应回退到开放词表）。
+    """
+    min_conf = MIN_CONFIDENCE if min_conf is None else min_conf
+    if not words:
+        return False
+    if any(w.word == UNK for w in words):
+        return False
+    return sum(w.conf for w in words) / len(words) >= min_conf
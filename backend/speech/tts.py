@@ -1,31 +1,237 @@
 # backend/speech/tts.py
 import pyttsx3
 import os
+import hashlib
+import logging
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
 
-def synthesize_text_async(text: str, out_path: str = "tmp/output.mp3"):
-    """
-    完全离线 TTS，不需要网络、不需要 API Key、不走微软 Edge。
-    适合在 Edge-TTS 401 时作为稳定 fallback。
-    """
-    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+from monitor.metrics import metrics
+
+log = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(BACKEND_DIR, "tmp", "tts_cache")
+CACHE_MAX_BYTES = int(os.environ.get("TTS_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+
+TTS_RATE = 185       # 语速
+TTS_VOLUME = 1.0     # 音量
+# 声音偏好（匹配 voice.id / voice.name），同时参与缓存键计算
+TTS_VOICE = os.environ.get("TTS_VOICE", "ZH")
+
+# -------------------------
+# 引擎（只初始化一次）
+# -------------------------
+# pyttsx3 引擎不是线程安全的（Windows SAPI 还要求在创建它的线程里使用），
+# 因此只在 TTSWorker 的专用线程里创建和调用。
+_engine = None
 
-    try:
+
+def get_engine():
+    """初始化引擎并选定声音，之后复用；不再每次合成都扫描全部 voices"""
+    global _engine
+    if _engine is None:
         engine = pyttsx3.init()
-        engine.setProperty('rate', 185)      # 语速
-        engine.setProperty('volume', 1.0)    # 音量
+        engine.setProperty('rate', TTS_RATE)
+        engine.setProperty('volume', TTS_VOLUME)
 
         voices = engine.getProperty('voices')
         # 尝试选择中文女声
         for v in voices:
-            if "ZH" in v.id.upper() or "CHINESE" in v.name.upper():
+            if TTS_VOICE.upper() in v.id.upper() or "CHINESE" in v.name.upper():
                 engine.setProperty('voice', v.id)
                 break
 
-        engine.save_to_file(text, out_path)
-        engine.runAndWait()
-        print(f"[TTS] ✔ 离线语音合成成功: {out_path}")
-        return out_path
+        _engine = engine
+    return _engine
+
+
+def _synthesize(text: str, out_path: str):
+    engine = get_engine()
+    engine.save_to_file(text, out_path)
+    engine.runAndWait()
+
+
+# -------------------------
+# 内容寻址缓存（text + voice + rate → 文件）
+# -------------------------
+def cache_key(text: str, voice: str = TTS_VOICE, rate: int = TTS_RATE) -> str:
+    raw = f"{voice}\x00{rate}\x00{text}".encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()
+
+
+class TTSCache:
+    """
+    磁盘 LRU：按最近使用顺序维护索引，总大小超过 max_bytes 时淘汰最久未用的文件。
+    固定提示语（pinned）不参与淘汰。
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index = OrderedDict()  # filename -> size，越靠后越新
+        self._pinned = set()
+        self.total_bytes = 0
+        self._load()
+
+    def _load(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if os.path.isfile(path):
+                st = os.stat(path)
+                entries.append((st.st_mtime, name, st.st_size))
+        for _, name, size in sorted(entries):
+            self._index[name] = size
+            self.total_bytes += size
+
+    @staticmethod
+    def filename(key: str) -> str:
+        return f"{key}.mp3"
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, self.filename(key))
+
+    def lookup(self, key: str) -> str | None:
+        name = self.filename(key)
+        with self._lock:
+            if name not in self._index:
+                return None
+            self._index.move_to_end(name)
+
+        path = self.path(key)
+        try:
+            # mtime 记录最近使用时间，重启后按它恢复 LRU 顺序
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.total_bytes -= self._index.pop(name, 0)
+            return None
+        return path
+
+    def add(self, key: str, pinned: bool = False):
+        name = self.filename(key)
+        size = os.path.getsize(self.path(key))
+        with self._lock:
+            self.total_bytes += size - self._index.pop(name, 0)
+            self._index[name] = size
+            if pinned:
+                self._pinned.add(name)
+            self._evict()
+
+    def _evict(self):
+        for name in list(self._index):
+            if self.total_bytes <= self.max_bytes:
+                break
+            if name in self._pinned:
+                continue
+            self.total_bytes -= self._index.pop(name)
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+
+
+tts_cache = TTSCache()
+
+
+# -------------------------
+# 合成工作线程
+# -------------------------
+class TTSJob:
+    def __init__(self, key: str, future: Future):
+        self.key = key
+        self.filename = TTSCache.filename(key)
+        self.future = future
+
+
+class TTSWorker:
+    """
+    专用合成线程 + 任务队列：submit() 立即返回（URL 已由内容哈希确定），
+    合成在后台完成，调用方通过 future 等待或直接把 URL 交给客户端。
+    同一文本的并发请求只合成一次。
+    """
+
+    def __init__(self, cache: TTSCache):
+        self.cache = cache
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._jobs = {}  # key -> Future（合成中）
+        self._thread = None
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="tts", daemon=True)
+                self._thread.start()
+
+    def submit(self, text: str, pinned: bool = False) -> TTSJob:
+        key = cache_key(text)
+
+        if self.cache.lookup(key):
+            if pinned:
+                self.cache.add(key, pinned=True)
+            done = Future()
+            done.set_result(self.cache.filename(key))
+            return TTSJob(key, done)
+
+        with self._lock:
+            fut = self._jobs.get(key)
+            if fut is None:
+                fut = self._jobs[key] = Future()
+                self._queue.put((key, text, pinned, fut))
+        self._ensure_started()
+        return TTSJob(key, fut)
+
+    def pending(self, key: str) -> Future | None:
+        with self._lock:
+            return self._jobs.get(key)
+
+    def call(self, fn) -> Future:
+        """在合成线程里执行任意函数（如初始化引擎）"""
+        fut = Future()
+        self._queue.put((None, fn, False, fut))
+        self._ensure_started()
+        return fut
+
+    def _run(self):
+        while True:
+            key, payload, pinned, fut = self._queue.get()
+
+            if key is None:
+                try:
+                    fut.set_result(payload())
+                except Exception as e:
+                    fut.set_exception(e)
+                continue
+
+            path = self.cache.path(key)
+            try:
+                with metrics.span("tts"):
+                    _synthesize(payload, path)
+                self.cache.add(key, pinned=pinned)
+                log.debug("离线语音合成成功: %s", path)
+                fut.set_result(self.cache.filename(key))
+            except Exception as e:
+                log.error("离线 TTS 失败: %s", e)
+                fut.set_exception(e)
+            finally:
+                with self._lock:
+                    self._jobs.pop(key, None)
+
+
+tts_worker = TTSWorker(tts_cache)
+
 
-    except Exception as e:
-        print(f"[TTS] ❌ 离线 TTS 失败: {e}")
-        return None
+def warm_up(prompts=()):
+    """启动时在合成线程里初始化引擎，并预先渲染固定提示语（阻塞直到完成）"""
+    tts_worker.call(get_engine).result()
+    for job in [tts_worker.submit(text, pinned=True) for text in prompts]:
+        try:
+            job.future.result()
+        except Exception:
+            pass
@@ -0,0 +1,198 @@
+# backend/speech/vad.py
+# 语音活动检测（VAD）：按 30ms 帧的能量区分语音 / 静音
+#
+# - 整段上传：切掉首尾静音，静音不再送进识别器解码（中间的停顿保留，整句一起解码）
+# - 流式识别：开口前的静音只保留一小段预滚，开口后检测到足够长的尾部静音即判定说完，
+#   不必等前端发 "end"
+# 阈值自适应：取本段（流式时为开头若干帧）能量的低分位作为底噪，乘以倍数，且不低于下限 VAD_MIN_RMS；
+# 整段时下限再按本段峰值放宽，麦克风增益低、说话都达不到 VAD_MIN_RMS 的录音不会被整个当成静音。
+# 输入均为 16kHz mono s16le PCM。
+
+import logging
+import os
+import warnings
+from array import array
+from dataclasses import dataclass
+
+try:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        import audioop
+except ImportError:
+    audioop = None
+
+log = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+FRAME_BYTES = SAMPLE_RATE * FRAME_MS // 1000 * 2
+
+VAD_ENABLED = os.environ.get("ASR_VAD", "1") != "0"
+# 下限：再安静的环境，低于这个能量也不算说话
+MIN_RMS = int(os.environ.get("VAD_MIN_RMS", 300))
+# 整段录音的下限不高于峰值能量的这个比例（低增益麦克风）
+PEAK_FLOOR_RATIO = float(os.environ.get("VAD_PEAK_FLOOR_RATIO", 0.2))
+# 阈值 = 底噪 × NOISE_RATIO
+NOISE_RATIO = float(os.environ.get("VAD_NOISE_RATIO", 3.0))
+
+
+def frame_rms(frame: bytes) -> float:
+    if audioop is not None:
+        return audioop.rms(frame, 2)
+    samples = array("h", frame)
+    if not samples:
+        return 0.0
+    return (sum(s * s for s in samples) / len(samples)) ** 0.5
+
+
+def frame_energies(pcm: bytes) -> list:
+    """每 FRAME_MS 一帧的 RMS；不足一帧的尾巴单独算一帧"""
+    return [frame_rms(pcm[i:i + FRAME_BYTES]) for i in range(0, len(pcm) - 1, FRAME_BYTES)]
+
+
+def noise_threshold(energies, min_rms: int = MIN_RMS, ratio: float = NOISE_RATIO) -> float:
+    """底噪取 10% 分位；录音几乎全是语音时底噪偏高，阈值再以 90% 分位的 30% 封顶"""
+    if not energies:
+        return float(min_rms)
+    ranked = sorted(energies)
+    floor = ranked[len(ranked) // 10]
+    loud = ranked[len(ranked) * 9 // 10]
+    return max(float(min_rms), min(floor * ratio, loud * 0.3))
+
+
+@dataclass
+class VADConfig:
+    min_speech_ms: int = 90     # 短于此的能量突起（咔哒声、碰麦）不算语音
+    pad_ms: int = 240           # 语音段前后各保留的余量，避免切掉轻声的字头字尾
+    split_ms: int = 600         # 停顿超过此长度才切成两段
+    end_silence_ms: int = 700   # 流式：开口后连续静音达到此长度判定说完
+
+    @property
+    def frames(self):
+        f = lambda ms: max(1, ms // FRAME_MS)  # noqa: E731
+        return f(self.min_speech_ms), f(self.pad_ms), f(self.split_ms), f(self.end_silence_ms)
+
+
+DEFAULT_CONFIG = VADConfig(
+    end_silence_ms=int(os.environ.get("VAD_END_SILENCE_MS", 700)),
+)
+
+
+# -------------------------
+# 整段：语音区间 / 去首尾静音 / 切句
+# -------------------------
+def speech_regions(pcm: bytes, config: VADConfig = DEFAULT_CONFIG) -> list:
+    """返回 [(起始字节, 结束字节)]，已合并短停顿、去掉过短的突起并加上前后余量"""
+    energies = frame_energies(pcm)
+    peak = max(energies, default=0.0)
+    threshold = noise_threshold(energies, min_rms=min(MIN_RMS, peak * PEAK_FLOOR_RATIO))
+    min_speech, pad, split, _ = config.frames
+
+    runs, start = [], None
+    for i, e in enumerate(energies + [0.0]):
+        if e >= threshold and start is None:
+            start = i
+        elif e < threshold and start is not None:
+            runs.append([start, i])
+            start = None
+
+    merged = []
+    for run in runs:
+        if merged and run[0] - merged[-1][1] < split:
+            merged[-1][1] = run[1]
+        else:
+            merged.append(run)
+
+    regions = []
+    for s, e in merged:
+        if e - s < min_speech:
+            continue
+        s, e = max(0, s - pad), min(len(energies), e + pad)
+        if regions and s <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], e)
+        else:
+            regions.append((s, e))
+    return [(s * FRAME_BYTES, min(len(pcm), e * FRAME_BYTES)) for s, e in regions]
+
+
+def trim(pcm: bytes, config: VADConfig = DEFAULT_CONFIG) -> bytes:
+    """切掉首尾静音（中间的停顿保留）；整段都是静音时返回空字节串"""
+    regions = speech_regions(pcm, config)
+    if not regions:
+        return b""
+    return pcm[regions[0][0]:regions[-1][1]]
+
+
+# -------------------------
+# 流式：预滚 + 尾部静音端点检测
+# -------------------------
+class StreamingVAD:
+    """
+    逐块喂入 PCM：process(chunk) → (需要解码的 PCM, 是否已说完)
+    开口前只缓存最近 pad_ms 的音频；检测到开口后连同预滚一起放行；
+    开口后连续 end_silence_ms 的静音即判定说完，之后的音频不再放行。
+    """
+
+    # 用开头多少帧估计底噪（此前只用 MIN_RMS）
+    CALIBRATE_FRAMES = 10
+
+    def __init__(self, config: VADConfig = DEFAULT_CONFIG):
+        self.config = config
+        self.min_speech, self.pad, _, self.end_silence = config.frames
+        self._rest = b""
+        self._preroll = []
+        self._calib = []
+        self.threshold = float(MIN_RMS)
+        self._voiced_run = 0
+        self._silent_run = 0
+        self.started = False
+        self.ended = False
+        self.skipped_bytes = 0
+
+    def _frame_is_speech(self, frame: bytes) -> bool:
+        e = frame_rms(frame)
+        if len(self._calib) < self.CALIBRATE_FRAMES and not self.started:
+            self._calib.append(e)
+            if len(self._calib) == self.CALIBRATE_FRAMES:
+                self.threshold = noise_threshold(self._calib)
+        return e >= self.threshold
+
+    def process(self, chunk: bytes) -> tuple:
+        if self.ended:
+            self.skipped_bytes += len(chunk)
+            return b"", True
+
+        data = self._rest + chunk
+        usable = len(data) - len(data) % FRAME_BYTES
+        self._rest = data[usable:]
+        out = []
+
+        for i in range(0, usable, FRAME_BYTES):
+            frame = data[i:i + FRAME_BYTES]
+            speech = self._frame_is_speech(frame)
+
+            if not self.started:
+                self._preroll.append(frame)
+                self._voiced_run = self._voiced_run + 1 if speech else 0
+                if self._voiced_run >= self.min_speech:
+                    self.started = True
+                    out.extend(self._preroll)
+                    self._preroll = []
+                elif len(self._preroll) > self.pad + self.min_speech:
+                    self._preroll.pop(0)
+                    self.skipped_bytes += FRAME_BYTES
+                continue
+
+            out.append(frame)
+            self._silent_run = 0 if speech else self._silent_run + 1
+            if self._silent_run >= self.end_silence:
+                self.ended = True
+                self.skipped_bytes += usable - i - FRAME_BYTES
+                break
+
+        return b"".join(out), self.ended
+
+    def flush(self) -> bytes:
+        """音频结束：已开口则放行剩余不足一帧的尾巴"""
+        rest, self._rest = self._rest, b""
+        return rest if self.started and not self.ended else b""